@@ -2,6 +2,10 @@ import requests
 import time
 import pandas as pd
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.ddragon import latest_version, patch_of
 
 # =======================================================
 # 🛠️ 설정
@@ -9,6 +13,7 @@ import os
 # =======================================================
 SOURCE_FILE = "../raw_data/top_1000_by_lp.csv"
 OUTPUT_FILE = "../raw_data/match_data_current_patch_10x.csv"
+BANS_FILE = "../raw_data/match_bans_current_patch_10x.csv"
 QUEUE_ID = 420
 
 with open('../default_info/api.txt', 'r', encoding='utf-8') as f:
@@ -20,15 +25,24 @@ headers = {"X-Riot-Token": api_key}
 # =======================================================
 print("현재 패치 버전을 확인합니다.")
 try:
-    ver_url = "https://ddragon.leagueoflegends.com/api/versions.json"
-    versions = requests.get(ver_url).json()
-    latest_full_ver = versions[0]
-    target_patch = ".".join(latest_full_ver.split(".")[:2])
+    # 버전 목록은 로컬 캐시(하루 단위 갱신) 사용
+    target_patch = patch_of(latest_version())
     print(f"타겟 패치 버전: {target_patch}")
 except Exception as e:
     print(f"버전 확인 실패: {e}")
     exit()
 
+
+def append_csv(df_new, path):
+    if not os.path.exists(path):
+        df_new.to_csv(path, index=False, encoding='utf-8-sig', mode='w')
+    else:
+        # 이어쓰기 시 기존 파일 헤더 순서에 맞춤 (이전 버전 파일과 컬럼 구성이 다를 수 있음)
+        existing_cols = pd.read_csv(path, nrows=0, encoding='utf-8-sig').columns
+        df_new = df_new.reindex(columns=existing_cols)
+        df_new.to_csv(path, index=False, encoding='utf-8-sig', mode='a', header=False)
+
+
 # =======================================================
 # 2. 이어하기 준비
 # =======================================================
@@ -83,6 +97,7 @@ for idx, row in df_rankers.iterrows():
             break
 
         current_batch_data = []
+        current_batch_bans = []
         for m_i, match_id in enumerate(match_ids):
             if match_id in collected_match_ids:
                 continue
@@ -105,11 +120,15 @@ for idx, row in df_rankers.iterrows():
                     keep_searching = False
                     break
                 game_duration = info['gameDuration']
-                ban_list = []
+                # 밴은 참가자 행이 아닌 매치당 한 번, 양 팀 10개 모두 별도 파일에 기록
                 for team in info['teams']:
                     for ban in team['bans']:
-                        ban_list.append(ban['championId'])
-                while len(ban_list) < 10: ban_list.append(-1)
+                        current_batch_bans.append({
+                            'match_id': match_id,
+                            'team_id': team['teamId'],
+                            'pick_turn': ban['pickTurn'],
+                            'champion_id': ban['championId']
+                        })
                 team_objs = {}
                 for team in info['teams']:
                     team_objs[team['teamId']] = {
@@ -142,6 +161,7 @@ for idx, row in df_rankers.iterrows():
                         'game_duration': game_duration,
                         'win': 1 if p['win'] else 0,
                         'champion': p['championName'],
+                        'champion_id': p['championId'],
                         'position': p['teamPosition'],
                         'lane': p['lane'],
                         'kills': p['kills'], 'deaths': p['deaths'], 'assists': p['assists'],
@@ -160,9 +180,7 @@ for idx, row in df_rankers.iterrows():
                         'spell1': p['summoner1Id'], 'spell2': p['summoner2Id'],
                         'team_dragon': my_team_obj.get('dragon', 0),
                         'team_baron': my_team_obj.get('baron', 0),
-                        'team_horde': my_team_obj.get('horde', 0),
-                        'ban_1': ban_list[0], 'ban_2': ban_list[1], 'ban_3': ban_list[2],
-                        'ban_4': ban_list[3], 'ban_5': ban_list[4]
+                        'team_horde': my_team_obj.get('horde', 0)
                     }
                     current_batch_data.append(row_data)
 
@@ -178,11 +196,9 @@ for idx, row in df_rankers.iterrows():
 
         # [Step 3] 저장
         if current_batch_data:
-            df_new = pd.DataFrame(current_batch_data)
-            if not os.path.exists(OUTPUT_FILE):
-                df_new.to_csv(OUTPUT_FILE, index=False, encoding='utf-8-sig', mode='w')
-            else:
-                df_new.to_csv(OUTPUT_FILE, index=False, encoding='utf-8-sig', mode='a', header=False)
+            append_csv(pd.DataFrame(current_batch_data), OUTPUT_FILE)
+        if current_batch_bans:
+            append_csv(pd.DataFrame(current_batch_bans), BANS_FILE)
 
         if not keep_searching: break
 
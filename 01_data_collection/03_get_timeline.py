@@ -1,15 +1,16 @@
 import requests
-import json
 import time
 import pandas as pd
-from sqlalchemy import create_engine
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.db import get_engine, read_sql
 
 # =======================================================
 # ⚙️ 설정
 # =======================================================
 API_KEY_FILE = "../default_info/api.txt"
-CONFIG_FILE = "../default_info/db_config.txt"
 REGION = "asia"
 
 FILES = {
@@ -20,6 +21,15 @@ FILES = {
     "wards": "raw_data/timeline_data/timeline_wards.csv"
 }
 
+# CSV 컬럼 순서 고정 (이벤트 종류마다 dict 키 순서가 달라도 항상 같은 순서로 기록)
+TIMELINE_COLUMNS = {
+    "items": ['match_id', 'timestamp', 'participantId', 'itemId', 'type'],
+    "skills": ['match_id', 'timestamp', 'participantId', 'skillSlot', 'levelUpType'],
+    "kills": ['match_id', 'timestamp', 'killerId', 'victimId', 'x', 'y'],
+    "objectives": ['match_id', 'timestamp', 'type', 'subtype', 'teamId', 'lane'],
+    "wards": ['match_id', 'timestamp', 'type', 'wardType', 'creatorId', 'killerId', 'x', 'y']
+}
+
 if not os.path.exists(API_KEY_FILE):
     print(f"'{API_KEY_FILE}' 파일이 없습니다.")
     exit()
@@ -29,15 +39,7 @@ with open(API_KEY_FILE, 'r', encoding='utf-8') as f:
 
 headers = {"X-Riot-Token": API_KEY}
 
-if not os.path.exists(CONFIG_FILE):
-    print(f"'{CONFIG_FILE}' 파일이 없습니다.")
-    exit()
-
-with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-    config = json.load(f)
-
-DB_URL = f"mysql+pymysql://{config['user']}:{config['password']}@{config['host']}/{config['db_name']}?charset=utf8mb4"
-engine = create_engine(DB_URL)
+engine = get_engine()
 
 
 # =======================================================
@@ -127,8 +129,8 @@ def parse_timeline(timeline_json, match_id):
                         'match_id': match_id, 'timestamp': timestamp,
                         'type': 'BUILDING_KILL',
                         'subtype': event.get('buildingType'),
-                        'lane': event.get('laneType'),
-                        'teamId': event.get('teamId')
+                        'teamId': event.get('teamId'),
+                        'lane': event.get('laneType')
                     })
 
                 elif evt_type == 'TURRET_PLATE_DESTROYED':
@@ -136,8 +138,8 @@ def parse_timeline(timeline_json, match_id):
                         'match_id': match_id, 'timestamp': timestamp,
                         'type': 'TURRET_PLATE_DESTROYED',
                         'subtype': 'TURRET_PLATE',
-                        'lane': event.get('laneType'),
-                        'teamId': event.get('teamId')
+                        'teamId': event.get('teamId'),
+                        'lane': event.get('laneType')
                     })
 
                 elif evt_type == 'WARD_PLACED':
@@ -146,6 +148,7 @@ def parse_timeline(timeline_json, match_id):
                         'type': 'WARD_PLACED',
                         'wardType': event.get('wardType'),
                         'creatorId': event.get('creatorId'),
+                        'killerId': None,
                         'x': event.get('position', {}).get('x'),
                         'y': event.get('position', {}).get('y')
                     })
@@ -154,6 +157,7 @@ def parse_timeline(timeline_json, match_id):
                         'match_id': match_id, 'timestamp': timestamp,
                         'type': 'WARD_KILL',
                         'wardType': event.get('wardType'),
+                        'creatorId': None,
                         'killerId': event.get('killerId'),
                         'x': event.get('position', {}).get('x'),
                         'y': event.get('position', {}).get('y')
@@ -164,17 +168,20 @@ def parse_timeline(timeline_json, match_id):
         return None, None, None, None, None
 
 
-def save_batch(data_dict, first_write=False):
+def save_batch(data_dict):
     for key, filename in FILES.items():
         if data_dict[key]:
             directory = os.path.dirname(filename)
             if not os.path.exists(directory):
                 os.makedirs(directory)
 
-            df = pd.DataFrame(data_dict[key])
-            mode = 'w' if first_write and not os.path.exists(filename) else 'a'
-            header = True if mode == 'w' else False
-            df.to_csv(filename, index=False, mode=mode, header=header, encoding='utf-8-sig')
+            df = pd.DataFrame(data_dict[key], columns=TIMELINE_COLUMNS[key])
+            if os.path.exists(filename):
+                # 기존 파일의 헤더 순서에 맞춰 이어쓰기
+                df = df.reindex(columns=pd.read_csv(filename, nrows=0, encoding='utf-8-sig').columns)
+                df.to_csv(filename, index=False, mode='a', header=False, encoding='utf-8-sig')
+            else:
+                df.to_csv(filename, index=False, mode='w', header=True, encoding='utf-8-sig')
 
 
 # =======================================================
@@ -184,7 +191,7 @@ def main():
     print("타임라인 수집")
 
     try:
-        df_matches = pd.read_sql("SELECT DISTINCT match_id FROM match_data", engine)
+        df_matches = read_sql("SELECT DISTINCT match_id FROM match_data", engine)
         all_match_ids = set(df_matches['match_id'].tolist())
     except Exception as e:
         print(f"DB 연결 실패: {e}")
@@ -222,7 +229,7 @@ def main():
         time.sleep(1.2)
 
         if (idx + 1) % 50 == 0:
-            save_batch(batch_data, first_write=(len(processed_ids) == 0 and idx < 50))
+            save_batch(batch_data)
             print("\n 완료")
             batch_data = {"items": [], "skills": [], "kills": [], "objectives": [], "wards": []}
 
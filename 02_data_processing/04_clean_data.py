@@ -1,79 +1,57 @@
 import pandas as pd
-import requests
 import os
-import json
+import sys
 import time
-from sqlalchemy import create_engine, text
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.schema import conform
+from common.db import get_engine, prepare_tables, write_frame
+from common.dims import DIM_TABLES, build_champion_key_map, build_dim_frames
+from common.ddragon import resolve_version, load_static_bundle
+from common.aggregates import fold_new_matches
 
 # =======================================================
 # 설정
 # =======================================================
 INPUT_FILE = "../raw_data/match_data_current_patch_10x.csv"
+BANS_INPUT_FILE = "../raw_data/match_bans_current_patch_10x.csv"
 OUTPUT_CLEAN_FILE = "../raw_data/match_data_cleaned.csv"
-DB_CONFIG_FILE = "../default_info/db_config.txt"
 TABLE_NAME = "match_data"
+TEAM_TABLE_NAME = "match_team"
+BANS_TABLE_NAME = "match_bans"
+TEAM_IDS = {'Blue': 100, 'Red': 200}
+# 아이템 분류 기준이 바뀌었을 때 등 누적 집계를 처음부터 다시 만들려면 LOL_AGG_REBUILD=1
+REBUILD_AGGREGATES = os.environ.get('LOL_AGG_REBUILD', '').lower() in ('1', 'true', 'yes')
 
 # =======================================================
-# 1. 라이엇 메타 데이터 로드 & 매핑 사전 구축
+# 1. 라이엇 메타 데이터 로드 & 차원 테이블 구축
 # =======================================================
-print("[1/4] 메타 데이터 다운로드 및 매핑 사전 구축")
+print("[1/4] 메타 데이터 로드 및 차원 테이블 구축")
 
 try:
-    ver_url = "https://ddragon.leagueoflegends.com/api/versions.json"
-    latest_version = requests.get(ver_url).json()[0]
-
-    url_kr = f"https://ddragon.leagueoflegends.com/cdn/{latest_version}/data/ko_KR/champion.json"
-    data_kr = requests.get(url_kr).json()['data']
-
-    url_en = f"https://ddragon.leagueoflegends.com/cdn/{latest_version}/data/en_US/champion.json"
-    data_en = requests.get(url_en).json()['data']
-
-    item_data = requests.get(f"https://ddragon.leagueoflegends.com/cdn/{latest_version}/data/ko_KR/item.json").json()[
-        'data']
-    spell_data = \
-    requests.get(f"https://ddragon.leagueoflegends.com/cdn/{latest_version}/data/ko_KR/summoner.json").json()['data']
-    rune_data_list = requests.get(
-        f"https://ddragon.leagueoflegends.com/cdn/{latest_version}/data/ko_KR/runesReforged.json").json()
+    # 수집된 매치의 패치(최빈 game_version)에 맞는 DataDragon 버전 사용 (버전별 로컬 캐시)
+    # 차원 테이블은 패치 키 없이 이 버전 하나로만 만들어지므로, 여러 패치가 섞인 데이터에서는
+    # 다른 패치에서 바뀐 아이템 가격/분류나 새로 나온 챔피언·아이템 이름이 이 버전 기준으로 붙습니다
+    game_version = None
+    if os.path.exists(INPUT_FILE):
+        versions = pd.read_csv(INPUT_FILE, usecols=['game_version'])['game_version'].dropna()
+        if not versions.empty: game_version = versions.mode()[0]
+    ddragon_version = resolve_version(game_version)
+    print(f"DataDragon 버전: {ddragon_version} (매치 패치: {game_version})")
+
+    static = load_static_bundle(ddragon_version)
+    data_kr = static['champion_kr']
+    data_en = static['champion_en']
+    item_data = static['item']
+    spell_data = static['spell']
+    rune_data_list = static['rune']
 
 except Exception as e:
     print(f"메타 데이터 로드 실패: {e}")
     exit()
 
-champ_map_final = {}
-for key, val in data_kr.items():
-    kr_name = val['name']
-    champ_id = val['key']
-    champ_map_final[key] = kr_name
-    champ_map_final[key.lower()] = kr_name
-    champ_map_final[champ_id] = kr_name
-
-for key, val in data_en.items():
-    en_name = val['name']
-    if key in data_kr:
-        kr_name = data_kr[key]['name']
-        champ_map_final[en_name] = kr_name
-        champ_map_final[en_name.replace(" ", "")] = kr_name
-
-manual_fixes = {
-    "FiddleSticks": "피들스틱", "Fiddlesticks": "피들스틱",
-    "MonkeyKing": "오공", "Wukong": "오공",
-    "DrMundo": "문도 박사", "JarvanIV": "자르반 4세",
-    "Nunu": "누누와 윌럼프", "Belveth": "벨베스",
-    "Renata": "레나타 글라스크", "KogMaw": "코그모", "RekSai": "렉사이",
-    "LeeSin": "리 신", "Lee Sin": "리 신"
-}
-champ_map_final.update(manual_fixes)
-
-item_map = {int(k): v['name'] for k, v in item_data.items()}
-item_map[0] = "None"
-spell_map = {int(v['key']): v['name'] for k, v in spell_data.items()}
-rune_map = {}
-for style in rune_data_list:
-    rune_map[style['id']] = style['name']
-    for slot in style['slots']:
-        for rune in slot['runes']:
-            rune_map[rune['id']] = rune['name']
-rune_map[-1] = "Unknown"
+champ_key_map = build_champion_key_map(data_kr, data_en)
+dim_frames = build_dim_frames(data_kr, item_data, spell_data, rune_data_list)
 
 # =======================================================
 # 2. 데이터 로드 및 정제
@@ -107,51 +85,78 @@ df.drop(columns=['temp_idx'], inplace=True)
 print("✅ 'team' 및 'participant_id' 컬럼 생성 완료")
 
 
-def robust_champ_map(value):
+def resolve_champion_id(value):
     try:
-        if pd.isna(value) or value == "": return "Unknown"
-        val_str = str(int(value)) if isinstance(value, (int, float)) else str(value)
-        if val_str in champ_map_final: return champ_map_final[val_str]
-        if val_str.lower() in champ_map_final: return champ_map_final[val_str.lower()]
-        return val_str
+        if pd.isna(value) or value == "": return -1
+        return champ_key_map.get(str(value).lower(), -1)
     except:
-        return str(value)
+        return -1
 
 
-print("한글 변환 적용")
-df['champion'] = df['champion'].apply(robust_champ_map)
-
-for i in range(1, 6):
-    col = f'ban_{i}'
-    if col in df.columns:
-        df[col] = df[col].apply(robust_champ_map)
-
-for i in range(7):
-    df[f'item{i}'] = df[f'item{i}'].apply(lambda x: item_map.get(x, "None"))
-df['spell1'] = df['spell1'].apply(lambda x: spell_map.get(x, x))
-df['spell2'] = df['spell2'].apply(lambda x: spell_map.get(x, x))
-for col in ['rune_main', 'rune_key', 'rune_sub']:
-    df[col] = df[col].apply(lambda x: rune_map.get(x, x))
+# 팩트 테이블은 정수 ID 를 그대로 유지 (이름 변환은 리포트 단계에서 dim_* 조인)
+if 'champion_id' not in df.columns:
+    print("championId 컬럼 없음 → 챔피언 이름으로 ID 복원")
+    df['champion_id'] = df['champion'].apply(resolve_champion_id)
+else:
+    df['champion_id'] = df['champion_id'].fillna(df['champion'].apply(resolve_champion_id))
+df['champion_id'] = df['champion_id'].astype(int)
+df.drop(columns=['champion'], inplace=True)
 
 df.to_csv(OUTPUT_CLEAN_FILE, index=False, encoding='utf-8-sig')
 print(f"데이터 저장 완료: '{OUTPUT_CLEAN_FILE}'")
 
+# 매치 x 팀 팩트: 메타 분석이 매번 참가자 행을 GROUP BY 하지 않도록 미리 집계
+match_team = df.groupby(['match_id', 'team'], sort=False).agg(
+    game_version=('game_version', 'first'),
+    gameDuration=('gameDuration', 'max'),
+    win=('win', 'max'),
+    dragon_count=('team_dragon', 'max'),
+    baron_count=('team_baron', 'max'),
+    horde_count=('team_horde', 'max'),
+    total_kills=('kills', 'sum')
+).reset_index()
+match_team['team_id'] = match_team['team'].map(TEAM_IDS)
+print(f"✅ '{TEAM_TABLE_NAME}' 팩트 생성 완료 ({len(match_team):,}행)")
+
+# 밴: 매치당 한 번 (match_id, team_id, pick_turn, champion_id)
+bans = pd.read_csv(BANS_INPUT_FILE) if os.path.exists(BANS_INPUT_FILE) else pd.DataFrame(
+    columns=['match_id', 'team_id', 'pick_turn', 'champion_id'])
+
+# 이전 수집분은 참가자 행의 ban_1~5 (첫 번째 팀 밴만 기록됨) 로부터 복원
+legacy_cols = [f'ban_{i}' for i in range(1, 6) if f'ban_{i}' in df.columns]
+if legacy_cols:
+    legacy = df.loc[~df['match_id'].isin(bans['match_id']), ['match_id'] + legacy_cols].drop_duplicates('match_id')
+    legacy = legacy.melt(id_vars=['match_id'], value_vars=legacy_cols, var_name='pick_turn', value_name='champion_id')
+    legacy['pick_turn'] = legacy['pick_turn'].str.replace('ban_', '').astype(int)
+    legacy['team_id'] = TEAM_IDS['Blue']
+    bans = pd.concat([bans, legacy.dropna(subset=['champion_id'])], ignore_index=True)
+
+# 밴을 건너뛴 슬롯(-1)은 제외하고, 10분 필터를 통과한 매치만 유지
+bans = bans[bans['match_id'].isin(df['match_id']) & (bans['champion_id'] >= 0)]
+bans = bans.astype({'team_id': int, 'pick_turn': int, 'champion_id': int})
+print(f"✅ '{BANS_TABLE_NAME}' 생성 완료 ({len(bans):,}행)")
+
 # =======================================================
 # 3. DB 업로드
 # =======================================================
 print("[3/4] DB 업로드 시작")
 
 try:
-    with open(DB_CONFIG_FILE, 'r', encoding='utf-8') as f:
-        db_cfg = json.load(f)
+    engine = get_engine()
 
-    db_url = f"mysql+pymysql://{db_cfg['user']}:{db_cfg['password']}@{db_cfg['host']}/{db_cfg['db_name']}?charset=utf8mb4"
-    engine = create_engine(db_url)
+    # 테이블을 DDL 로 먼저 생성 (고정 폭 타입 + 복합 PK + 인덱스)
+    prepare_tables(engine, DIM_TABLES + [TABLE_NAME, TEAM_TABLE_NAME, BANS_TABLE_NAME])
 
-    print(f"📤 '{TABLE_NAME}' 테이블 덮어쓰기 진행 중 (데이터: {len(df):,}행)")
+    for dim_name, dim_df in dim_frames.items():
+        write_frame(conform(dim_df, dim_name), dim_name, engine)
+    print(f"차원 테이블 적재 완료 ({', '.join(DIM_TABLES)})")
+
+    print(f"📤 '{TABLE_NAME}' 테이블 적재 진행 중 (데이터: {len(df):,}행)")
     start_time = time.time()
 
-    df.to_sql(name=TABLE_NAME, con=engine, if_exists='replace', index=False, chunksize=1000)
+    write_frame(conform(df, TABLE_NAME), TABLE_NAME, engine, chunksize=1000)
+    write_frame(conform(match_team, TEAM_TABLE_NAME), TEAM_TABLE_NAME, engine, chunksize=1000)
+    write_frame(conform(bans, BANS_TABLE_NAME), BANS_TABLE_NAME, engine, chunksize=1000)
 
     end_time = time.time()
     print(f"DB 업로드 완료 (소요 시간: {end_time - start_time:.2f}초)")
@@ -161,19 +166,18 @@ except Exception as e:
     exit()
 
 # =======================================================
-# 4. DB 인덱스 최적화
+# 4. 누적 집계 갱신 (새 매치만)
 # =======================================================
-print("[4/4] 인덱스 생성")
-try:
-    with engine.connect() as conn:
-        conn.execute(text(f"ALTER TABLE {TABLE_NAME} ADD INDEX idx_match_id (match_id(20));"))
-        conn.execute(text(f"ALTER TABLE {TABLE_NAME} ADD INDEX idx_champion (champion(20));"))
-
-        conn.execute(text(f"ALTER TABLE {TABLE_NAME} ADD INDEX idx_position (`position`(10));"))
-
-        conn.execute(text(f"ALTER TABLE {TABLE_NAME} ADD INDEX idx_game_duration (gameDuration);"))
+print("[4/4] 누적 집계(agg_champion_stats) 갱신")
 
-    print("\n 완료")
+try:
+    dim_item = dim_frames['dim_item']
+    core_ids = set(dim_item.loc[dim_item['is_core'] == 1, 'item_id'])
+    folded = fold_new_matches(engine, df, match_team, bans, core_ids, rebuild=REBUILD_AGGREGATES)
+    print(f"새 매치 {folded:,}개 반영 완료" if folded else "새 매치 없음 (Skip)")
 
 except Exception as e:
-    print(f"인덱스 생성 중 경고 (이미 존재할 수 있음): {e}")
\ No newline at end of file
+    print(f"누적 집계 갱신 실패: {e}")
+    exit()
+
+print("\n 완료")
\ No newline at end of file
@@ -1,14 +1,23 @@
 import pandas as pd
-from sqlalchemy import create_engine, text
+import numpy as np
+from pandas.api.types import is_numeric_dtype
 import os
-import json
+import sys
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.schema import conform, assign_event_seq
+from common.db import get_engine, prepare_tables, write_frame, read_sql, bump_generations, ensure_generations_table
+from common.timeline_summary import TimelineSummary, SUMMARY_TABLE
+from common.purchases import PurchaseStream, PURCHASES_TABLE
+from common.dims import load_item_flags, flagged_ids
 
 # =======================================================
 # 설정
 # =======================================================
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-CONFIG_FILE = os.path.join(BASE_DIR, 'default_info', 'db_config.txt')
 
 FILES_MAP = {
     os.path.join(BASE_DIR, "raw_data", "timeline_data", "timeline_items.csv"): "timeline_items",
@@ -18,19 +27,15 @@ FILES_MAP = {
     os.path.join(BASE_DIR, "raw_data", "timeline_data", "timeline_wards.csv"): "timeline_wards"
 }
 
-CHUNK_SIZE = 5000
-
-if not os.path.exists(CONFIG_FILE):
-    print(f"'{CONFIG_FILE}' 파일이 없습니다!")
-    exit()
+QUARANTINE_DIR = os.path.join(BASE_DIR, "raw_data", "timeline_data", "quarantine")
 
-with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-    config = json.load(f)
+CHUNK_SIZE = 5000
+MAX_WORKERS = 8  # 동시 전송 커넥션 수 (pool_size 이내)
+MAX_PENDING = MAX_WORKERS * 2  # 메모리에 대기시킬 최대 청크 수
 
-DB_URL = f"mysql+pymysql://{config['user']}:{config['password']}@{config['host']}/{config['db_name']}?charset=utf8mb4"
+os.makedirs(QUARANTINE_DIR, exist_ok=True)
 
-engine = create_engine(
-    DB_URL,
+engine = get_engine(
     pool_pre_ping=True,
     pool_recycle=3600,
     pool_size=10,
@@ -39,100 +44,233 @@ engine = create_engine(
 
 
 # =======================================================
-# 데이터 보정 함수
+# 청크 검증 규칙
+# =======================================================
+PARTICIPANTS = range(1, 11)
+TEAM_IDS = [100, 200, 300]
+LANE_TYPES = ['TOP_LANE', 'MID_LANE', 'BOT_LANE']
+
+NUMERIC_COLUMNS = {
+    "timeline_items": ['timestamp', 'participantId', 'itemId'],
+    "timeline_skills": ['timestamp', 'participantId', 'skillSlot'],
+    "timeline_kills": ['timestamp', 'killerId', 'victimId', 'x', 'y'],
+    "timeline_objectives": ['timestamp', 'teamId'],
+    "timeline_wards": ['timestamp', 'creatorId', 'killerId', 'x', 'y']
+}
+
+# 컬럼별 허용 값 (NaN 허용 여부 포함)
+VALUE_DOMAINS = {
+    "timeline_items": {
+        'participantId': (PARTICIPANTS, False),
+        'type': (['ITEM_PURCHASED', 'ITEM_SOLD', 'ITEM_DESTROYED', 'ITEM_UNDO'], False)
+    },
+    "timeline_skills": {
+        'participantId': (PARTICIPANTS, False),
+        'skillSlot': ([1, 2, 3, 4], False)
+    },
+    "timeline_kills": {
+        'killerId': (range(0, 11), False),
+        'victimId': (PARTICIPANTS, False)
+    },
+    "timeline_objectives": {
+        'type': (['ELITE_MONSTER_KILL', 'BUILDING_KILL', 'TURRET_PLATE_DESTROYED'], False),
+        'teamId': (TEAM_IDS, True),
+        'lane': (LANE_TYPES, True)
+    },
+    "timeline_wards": {
+        'type': (['WARD_PLACED', 'WARD_KILL'], False),
+        'creatorId': (range(0, 11), True),
+        'killerId': (range(0, 11), True)
+    }
+}
+
+
+# =======================================================
+# 데이터 보정/검증 함수
 # =======================================================
-def clean_objectives_chunk(df):
-    if 'teamId' in df.columns:
-        mixed_mask = pd.to_numeric(df['teamId'], errors='coerce').isna()
-        if mixed_mask.any():
-            if 'lane' in df.columns:
-                bad_team_ids = df.loc[mixed_mask, 'teamId']
-                bad_lanes = df.loc[mixed_mask, 'lane']
-                df.loc[mixed_mask, 'teamId'] = bad_lanes
-                df.loc[mixed_mask, 'lane'] = bad_team_ids
-        df['teamId'] = pd.to_numeric(df['teamId'], errors='coerce')
+def repair_legacy_objectives(df):
+    # 컬럼 순서 고정 이전에 수집된 CSV 는 배치에 따라 teamId/lane 이 뒤바뀌어 있음
+    swapped = df['lane'].isin(TEAM_IDS + [str(t) for t in TEAM_IDS])
+    if swapped.any():
+        team_ids, lanes = df['teamId'].copy(), df['lane'].copy()
+        df['teamId'] = np.where(swapped, lanes, team_ids)
+        df['lane'] = np.where(swapped, team_ids, lanes)
     return df
 
 
+def validate_chunk(df, table_name):
+    # 숫자 컬럼이 문자열로 읽힌 (오염된) 청크에서만 숫자 변환
+    for col in NUMERIC_COLUMNS[table_name]:
+        if col in df.columns and not is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    conditions = [df['match_id'].isna(), ~(df['timestamp'] >= 0)]
+    reasons = ['match_id', 'timestamp']
+    for col, (domain, nullable) in VALUE_DOMAINS[table_name].items():
+        if col not in df.columns: continue
+        ok = df[col].isin(domain)
+        if nullable:
+            ok |= df[col].isna()
+        conditions.append(~ok)
+        reasons.append(col)
+
+    reject_reason = np.select(conditions, reasons, default='')
+    bad_mask = reject_reason != ''
+    bad_rows = df[bad_mask].assign(reject_reason=reject_reason[bad_mask])
+    return df[~bad_mask], bad_rows
+
+
+def quarantine(bad_rows, table_name):
+    # 검증 실패 행은 테이블별 사이드 파일로 분리 (테이블당 읽기 스레드 하나만 기록)
+    path = os.path.join(QUARANTINE_DIR, f"{table_name}.csv")
+    bad_rows.to_csv(path, index=False, mode='a', header=not os.path.exists(path), encoding='utf-8-sig')
+
+
 # =======================================================
-# 인덱스 생성 함수
+# 병렬 적재 함수
 # =======================================================
-def add_indexes(table_name):
-    print(f"   🔨 '{table_name}' 인덱스 생성 및 최적화")
-    with engine.connect() as con:
+def iter_chunks(csv_file, table_name):
+    # event_seq 가 청크 순서에 의존하므로 읽기/보정은 테이블당 한 스레드에서 순차 처리
+    seq_offsets = {}
+    quarantine_path = os.path.join(QUARANTINE_DIR, f"{table_name}.csv")
+    if os.path.exists(quarantine_path):
+        os.remove(quarantine_path)
+
+    for chunk in pd.read_csv(csv_file, chunksize=CHUNK_SIZE, low_memory=False):
+        # 순번은 원본 행 순서 기준으로 먼저 부여 (격리된 행이 있어도 다른 행의 순번 유지)
+        chunk = assign_event_seq(chunk, seq_offsets)
+        if table_name == "timeline_objectives":
+            chunk = repair_legacy_objectives(chunk)
+        chunk, bad_rows = validate_chunk(chunk, table_name)
+        if not bad_rows.empty:
+            quarantine(bad_rows, table_name)
+            print(f"   [{table_name}] 검증 실패 {len(bad_rows):,}행 격리")
+        if table_name == "timeline_wards":
+            chunk = chunk.assign(creatorId=chunk['creatorId'].fillna(0).astype(int))
+        yield conform(chunk, table_name)
+
+
+def write_chunk(table_name, chunk, chunk_no):
+    # 워커마다 풀에서 자기 커넥션을 받아 청크 단위 트랜잭션으로 전송
+    max_retries = 3
+    for attempt in range(max_retries):
         try:
-            con.execute(text(f"CREATE INDEX idx_{table_name}_match ON {table_name} (match_id(20))"))
+            write_frame(chunk, table_name, engine, bump=False)
+            return len(chunk)
+        except Exception as e:
+            if attempt < max_retries - 1:
+                print(f"   [{table_name}] chunk {chunk_no} 전송 실패 (재시도 {attempt + 1}/{max_retries}) 잠시 대기")
+                time.sleep(2)
+            else:
+                raise e
 
-            if table_name == "timeline_items":
-                con.execute(text(f"CREATE INDEX idx_item_id ON {table_name} (itemId)"))
-                con.execute(text(f"CREATE INDEX idx_item_part ON {table_name} (participantId)"))
-                res = con.execute(text(f"SHOW COLUMNS FROM {table_name} LIKE 'type'"))
-                if res.fetchone():
-                    con.execute(text(f"CREATE INDEX idx_item_type ON {table_name} (type(15))"))
 
-            elif table_name == "timeline_skills":
-                con.execute(text(f"CREATE INDEX idx_skill_part ON {table_name} (participantId)"))
+def load_table(csv_file, table_name, pool, slots, summary, purchases):
+    start_time = time.time()
 
-            elif table_name == "timeline_objectives":
-                con.execute(text(f"CREATE INDEX idx_obj_type ON {table_name} (type(15), subtype(20))"))
+    # 적재 전에 DDL 로 테이블/PK/인덱스 생성
+    prepare_tables(engine, [table_name])
 
-            elif table_name == "timeline_wards":
-                con.execute(text(f"CREATE INDEX idx_ward_type ON {table_name} (type(15))"))
-                con.execute(text(f"CREATE INDEX idx_ward_map ON {table_name} (x, y)"))
+    futures = []
+    for i, chunk in enumerate(iter_chunks(csv_file, table_name)):
+        # 같은 청크로 참가자 요약용 부분 집계 (타임라인을 다시 읽지 않음)
+        if summary is not None:
+            summary.add(table_name, chunk)
+        if table_name == "timeline_items":
+            purchases.add(chunk)
+        slots.acquire()
+        future = pool.submit(write_chunk, table_name, chunk, i + 1)
+        future.add_done_callback(lambda _: slots.release())
+        futures.append(future)
+
+    total_rows = sum(future.result() for future in futures)
+    # 모든 청크가 커밋된 뒤 테이블당 한 번만 세대 번호를 올림 (분석 조회 캐시 무효화)
+    bump_generations(engine, [table_name])
+    print(f"'{table_name}' 적재 완료! (총 {total_rows:,} 행, 청크 {len(futures)}개, {int(time.time() - start_time)}초)")
+    return total_rows
 
-            print(f"인덱스 적용 완료")
-        except Exception as e:
-            pass
+
+def load_summary_inputs():
+    # 요약 테이블은 04 단계의 match_data/dim_item 을 기준으로 만듦
+    try:
+        participants = read_sql("SELECT match_id, participant_id, team, position FROM match_data", engine)
+        item_flags = load_item_flags(engine)
+    except Exception as e:
+        print(f"⚠️ match_data/dim_item 조회 실패로 '{SUMMARY_TABLE}' 생성을 건너뜁니다. ({e})")
+        return None, None
+    return participants, TimelineSummary(flagged_ids(item_flags, 'is_core'), flagged_ids(item_flags, 'is_trinket'))
+
+
+def save_purchases(purchases):
+    # 구매/UNDO 를 참가자별로 한 번 정렬해 취소된 구매를 제외한 스트림을 적재
+    start_time = time.time()
+    purchases_df = purchases.build()
+    prepare_tables(engine, [PURCHASES_TABLE])
+    write_frame(conform(purchases_df, PURCHASES_TABLE), PURCHASES_TABLE, engine, chunksize=CHUNK_SIZE)
+    print(f"'{PURCHASES_TABLE}' 생성 완료! (총 {len(purchases_df):,} 행, {int(time.time() - start_time)}초)")
+    return purchases_df
+
+
+def save_summary(summary, participants, purchases_df):
+    start_time = time.time()
+    summary_df = summary.build(participants, purchases_df)
+    prepare_tables(engine, [SUMMARY_TABLE])
+    write_frame(conform(summary_df, SUMMARY_TABLE), SUMMARY_TABLE, engine, chunksize=1000)
+    print(f"'{SUMMARY_TABLE}' 생성 완료! (총 {len(summary_df):,} 행, {int(time.time() - start_time)}초)")
 
 
 # =======================================================
 # 실행
 # =======================================================
 def main():
+    targets = []
     for csv_file, table_name in FILES_MAP.items():
         if not os.path.exists(csv_file):
             print(f"⚠️ '{os.path.basename(csv_file)}' 파일이 없어서 건너뜁니다.")
             continue
+        print(f"📂 '{os.path.basename(csv_file)}' -> DB 테이블 '{table_name}'")
+        targets.append((csv_file, table_name))
 
-        print(f"\n📂 '{os.path.basename(csv_file)}' -> DB 테이블 '{table_name}'")
-        start_time = time.time()
+    if not targets:
+        print("적재할 파일이 없습니다.")
+        return
 
-        try:
-            total_rows = 0
-            for i, chunk in enumerate(pd.read_csv(csv_file, chunksize=CHUNK_SIZE, low_memory=False)):
-                if table_name == "timeline_objectives":
-                    chunk = clean_objectives_chunk(chunk)
-                if table_name == "timeline_wards":
-                    if 'creatorId' in chunk.columns:
-                        chunk['creatorId'] = chunk['creatorId'].fillna(0).astype(int)
-                mode = 'replace' if i == 0 else 'append'
-                max_retries = 3
-                for attempt in range(max_retries):
-                    try:
-                        chunk.to_sql(name=table_name, con=engine, if_exists=mode, index=False)
-                        break
-                    except Exception as e:
-                        if attempt < max_retries - 1:
-                            print(f"전송 실패 (재시도 {attempt + 1}/{max_retries}) 잠시 대기")
-                            time.sleep(2)
-                            engine.dispose()
-                        else:
-                            raise e
-
-                total_rows += len(chunk)
-                print(f"   Writing chunk {i + 1} ({len(chunk):,} rows)", end='\r')
-
-            print(f"\n적재 완료! (총 {total_rows:,} 행)")
-
-            # 인덱스 생성
-            add_indexes(table_name)
+    start_time = time.time()
+    # 읽기 스레드들이 동시에 세대 번호 테이블을 만들지 않도록 먼저 생성
+    ensure_generations_table(engine)
+    slots = threading.BoundedSemaphore(MAX_PENDING)
+    participants, summary = load_summary_inputs()
+    purchases = PurchaseStream()
 
-        except Exception as e:
-            print(f"\n'{table_name}'에러: {e}")
+    # 테이블별 읽기 스레드 + 공용 전송 워커 풀 (테이블 간/청크 간 동시 적재)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool, \
+            ThreadPoolExecutor(max_workers=len(targets)) as readers:
+        jobs = {readers.submit(load_table, csv_file, table_name, pool, slots, summary, purchases): table_name
+                for csv_file, table_name in targets}
+        loaded, failed = set(), set()
+        for job in as_completed(jobs):
+            try:
+                job.result()
+                loaded.add(jobs[job])
+            except Exception as e:
+                failed.add(jobs[job])
+                print(f"\n'{jobs[job]}'에러: {e}")
+
+    # 파생 테이블은 입력이 끝까지 적재된 경우에만 다시 만듦 (중간에 실패한 스트림으로 덮어쓰지 않음)
+    purchases_df = None
+    if 'timeline_items' in loaded:
+        purchases_df = save_purchases(purchases)
+    elif 'timeline_items' in failed:
+        print(f"⚠️ 'timeline_items' 적재 실패로 '{PURCHASES_TABLE}' 생성을 건너뜁니다.")
 
-        print(f"소요 시간: {int(time.time() - start_time)}초")
+    if summary is not None:
+        failed_inputs = failed & (set(summary.parts) | {'timeline_items'})
+        if failed_inputs:
+            print(f"⚠️ {', '.join(sorted(failed_inputs))} 적재 실패로 '{SUMMARY_TABLE}' 생성을 건너뜁니다.")
+        else:
+            save_summary(summary, participants, purchases_df)
 
-    print("\n적재 완료")
+    print(f"\n적재 완료 (전체 소요 시간: {int(time.time() - start_time)}초)")
 
 
 if __name__ == "__main__":
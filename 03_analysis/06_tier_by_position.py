@@ -1,27 +1,22 @@
 import pandas as pd
 import numpy as np
-from sqlalchemy import create_engine
 import os
-import json
+import sys
 
 # =======================================================
 # ⚙️ 설정
 # =======================================================
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-CONFIG_FILE = os.path.join(BASE_DIR, 'default_info', 'db_config.txt')
 EXPORT_FOLDER = os.path.join(BASE_DIR, 'tier_reports')
 
-if not os.path.exists(CONFIG_FILE):
-    print(f"설정 파일이 없습니다: {CONFIG_FILE}")
-    exit()
-
-with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-    config = json.load(f)
-
-DB_URL = f"mysql+pymysql://{config['user']}:{config['password']}@{config['host']}/{config['db_name']}?charset=utf8mb4"
-engine = create_engine(DB_URL)
+sys.path.append(os.path.dirname(BASE_DIR))
+from common.reports import report, run_module
+from common.aggregates import AGG_TABLE
+from common.dims import attach_names
+from common.significance import wilson_interval, shrunk_rate
 
 POSITIONS = ['TOP', 'JUNGLE', 'MIDDLE', 'BOTTOM', 'UTILITY']
+FILE_POSITIONS = ['SUPPORT' if pos == 'UTILITY' else pos for pos in POSITIONS]
 
 # 폴더 생성
 if not os.path.exists(EXPORT_FOLDER):
@@ -30,7 +25,59 @@ if not os.path.exists(EXPORT_FOLDER):
     os.makedirs(os.path.join(EXPORT_FOLDER, 'Minor'), exist_ok=True)
 
 
-def analyze_tiers():
+# =======================================================
+# 점수 모델 (stats: 전 포지션 행, 포지션 안에서 비교되는 값)
+# =======================================================
+def min_max_by_position(stats, col):
+    grouped = stats.groupby('position', observed=True)[col]
+    low, high = grouped.transform('min'), grouped.transform('max')
+    # 포지션 안에서 값이 모두 같으면 0
+    return ((stats[col] - low) / (high - low).where(high != low)).fillna(0)
+
+
+def op_score(stats):
+    # 승률 7 : 픽밴 3 (포지션 안에서 각각 min-max 정규화)
+    pick_ban = stats['pick_rate'] + stats['ban_rate']
+    return min_max_by_position(stats, 'win_rate') * 7.0 + \
+        min_max_by_position(stats.assign(pick_ban=pick_ban), 'pick_ban') * 3.0
+
+
+def wilson_score(stats):
+    # 승률의 Wilson 하한 (%), 표본이 적은 챔피언일수록 낮게 보정
+    low, _ = wilson_interval(stats['win_count'], stats['pick_count'])
+    return low * 100
+
+
+def bayes_score(stats):
+    # 포지션 평균 승률 쪽으로 수축한 승률 (%)
+    grouped = stats.groupby('position', observed=True)
+    prior = grouped['win_count'].transform('sum') / grouped['pick_count'].transform('sum')
+    return shrunk_rate(stats['win_count'], stats['pick_count'], prior) * 100
+
+
+SCORE_MODELS = {
+    'op_score': op_score,
+    'wilson_score': wilson_score,
+    'bayes_score': bayes_score,
+}
+TIER_SCORE = os.environ.get('LOL_TIER_SCORE', 'op_score')
+
+TIER_CUTS = [(0.96, 'OP'), (0.85, '1티어'), (0.65, '2티어'), (0.40, '3티어'), (0.15, '4티어')]
+
+
+def assign_tiers(stats, score_col, minor_threshold):
+    # 포지션 안에서의 백분위수 기반 티어 (픽 수가 기준 미만이면 연구용)
+    stats['percentile'] = stats.groupby('position', observed=True)[score_col].rank(pct=True)
+    conditions = [stats['pick_count'] < minor_threshold] + [stats['percentile'] >= cut for cut, _ in TIER_CUTS]
+    choices = ['연구용'] + [tier for _, tier in TIER_CUTS]
+    stats['tier'] = np.select(conditions, choices, default='5티어')
+    return stats
+
+
+@report('06.tiers', inputs=[AGG_TABLE, 'dim_champion'],
+        outputs=[f'tier_reports/{kind}/{pos}_{kind_file}.csv' for pos in FILE_POSITIONS
+                 for kind, kind_file in (('Major', 'TierList'), ('Minor', 'MinorList'))])
+def analyze_tiers(ctx):
     print("[티어 분석기] 시작\n")
 
     # =======================================================
@@ -38,103 +85,61 @@ def analyze_tiers():
     # =======================================================
     print("[1/2] 글로벌 밴률 계산 중")
 
-    sql_total = "SELECT COUNT(DISTINCT match_id) FROM match_data"
-    total_matches = pd.read_sql(sql_total, engine).iloc[0, 0]
+    # 누적 집계 기준 (대상 패치의 매치 수 / 밴 수 / 포지션별 픽·승)
+    total_matches = int(ctx.aggregates('matches')['games'].sum())
     print(f"   - 총 매치 수: {total_matches:,} 게임")
 
     if total_matches == 0:
         print("데이터 부족으로 종료.")
         return
 
-    # 중복 제거된 밴 데이터 로드
-    sql_ban = "SELECT DISTINCT match_id, ban_1, ban_2, ban_3, ban_4, ban_5 FROM match_data"
-    df_bans = pd.read_sql(sql_ban, engine)
-
-    # Wide -> Long 변환
-    bans_melted = df_bans.melt(id_vars=['match_id'], value_vars=['ban_1', 'ban_2', 'ban_3', 'ban_4', 'ban_5'],
-                               value_name='champion')
-    ban_counts = bans_melted['champion'].value_counts().reset_index()
-    ban_counts.columns = ['champion', 'ban_count']
+    # 양 팀 밴 10개 (champion_id 인덱스로 집계)
+    ban_counts = ctx.aggregates('ban').rename(columns={'games': 'ban_count'})[['champion_id', 'ban_count']]
 
     # 밴률 계산
-    ban_counts['champion'] = ban_counts['champion'].astype(str)
     ban_counts['ban_rate'] = (ban_counts['ban_count'] / total_matches) * 100
 
     # =======================================================
     # 2. 포지션별 티어 산정
     # =======================================================
     print(f"\n[2/2] 포지션별 티어 분석 시작")
+    # 전 포지션을 한 번에 계산 (정규화/백분위는 포지션 그룹 안에서)
+    stats = ctx.aggregates('pick').rename(columns={'games': 'pick_count', 'wins': 'win_count'})
+    stats = stats[['position', 'champion_id', 'pick_count', 'win_count']]
+
+    # 승률/픽률 계산
+    stats['win_rate'] = (stats['win_count'] / stats['pick_count']) * 100
+    stats['pick_rate'] = (stats['pick_count'] / total_matches) * 100
+
+    # 밴률 병합
+    stats = pd.merge(stats, ban_counts[['champion_id', 'ban_rate']], on='champion_id', how='left')
+    stats['ban_rate'] = stats['ban_rate'].fillna(0)
+
+    # 점수 모델은 모두 같은 패스에서 계산하고, 티어는 TIER_SCORE 기준
+    for name, model in SCORE_MODELS.items():
+        stats[name] = model(stats)
+    stats = assign_tiers(stats, TIER_SCORE, minor_threshold=total_matches * 0.005)  # 0.5% 미만은 연구용
+
+    stats = attach_names(stats, 'champion_id', 'champion', ctx.dim_maps['champion'])
+    output_cols = ['champion', 'tier', 'win_rate', 'pick_rate', 'ban_rate', 'pick_count', 'op_score'] + \
+        [name for name in SCORE_MODELS if name != 'op_score']
 
     for pos in POSITIONS:
         file_pos_name = "SUPPORT" if pos == "UTILITY" else pos
         print(f"{file_pos_name}", end=" ")
 
-        # 데이터 조회
-        sql_pick = f"""
-            SELECT champion, COUNT(*) as pick_count, SUM(win) as win_count
-            FROM match_data 
-            WHERE position = '{pos}'
-            GROUP BY champion
-        """
-        stats = pd.read_sql(sql_pick, engine)
-
-        if stats.empty:
+        pos_stats = stats[stats['position'] == pos]
+        if pos_stats.empty:
             print("데이터 없음 (Pass)")
             continue
 
-        stats['champion'] = stats['champion'].astype(str)
-
-        # 승률/픽률 계산
-        stats['win_rate'] = (stats['win_count'] / stats['pick_count']) * 100
-        stats['pick_rate'] = (stats['pick_count'] / total_matches) * 100
-
-        # 밴률 병합
-        stats = pd.merge(stats, ban_counts[['champion', 'ban_rate']], on='champion', how='left')
-        stats['ban_rate'] = stats['ban_rate'].fillna(0)
-
-        # -------------------------------------------------------
-        # OP Score 및 티어 계산
-        # -------------------------------------------------------
-
-        # 정규화
-        win_min, win_max = stats['win_rate'].min(), stats['win_rate'].max()
-        stats['win_norm'] = 0 if win_max == win_min else (stats['win_rate'] - win_min) / (win_max - win_min)
-
-        stats['pick_ban'] = stats['pick_rate'] + stats['ban_rate']
-        pb_min, pb_max = stats['pick_ban'].min(), stats['pick_ban'].max()
-        stats['pb_norm'] = 0 if pb_max == pb_min else (stats['pick_ban'] - pb_min) / (pb_max - pb_min)
-
-        # OP Score (승률 7 : 픽밴 3)
-        stats['op_score'] = (stats['win_norm'] * 7.0) + (stats['pb_norm'] * 3.0)
-
-        # 백분위수 기반 티어 분류
-        stats['percentile'] = stats['op_score'].rank(pct=True)
-        minor_threshold = total_matches * 0.005  # 0.5% 미만은 연구용
-
-        conditions = [
-            (stats['pick_count'] < minor_threshold),
-            (stats['percentile'] >= 0.96),
-            (stats['percentile'] >= 0.85),
-            (stats['percentile'] >= 0.65),
-            (stats['percentile'] >= 0.40),
-            (stats['percentile'] >= 0.15)
-        ]
-        choices = ['연구용', 'OP', '1티어', '2티어', '3티어', '4티어']
-
-        stats['tier'] = np.select(conditions, choices, default='5티어')
-
-        # -------------------------------------------------------
-
         # 정렬 및 포맷팅
-        stats = stats.sort_values(by='op_score', ascending=False)
-        for col in ['win_rate', 'pick_rate', 'ban_rate', 'op_score']:
-            stats[col] = stats[col].round(2)
+        pos_stats = pos_stats.sort_values(by=TIER_SCORE, ascending=False)
+        pos_stats = pos_stats.round({col: 2 for col in ['win_rate', 'pick_rate', 'ban_rate'] + list(SCORE_MODELS)})
 
         # 저장
-        output_cols = ['champion', 'tier', 'win_rate', 'pick_rate', 'ban_rate', 'pick_count', 'op_score']
-
-        major_df = stats[stats['tier'] != '연구용'][output_cols]
-        minor_df = stats[stats['tier'] == '연구용'][output_cols]
+        major_df = pos_stats[pos_stats['tier'] != '연구용'][output_cols]
+        minor_df = pos_stats[pos_stats['tier'] == '연구용'][output_cols]
 
         major_df.to_csv(os.path.join(EXPORT_FOLDER, 'Major', f"{file_pos_name}_TierList.csv"), index=False,
                         encoding='utf-8-sig')
@@ -147,4 +152,4 @@ def analyze_tiers():
 
 
 if __name__ == "__main__":
-    analyze_tiers()
\ No newline at end of file
+    run_module(__name__)
\ No newline at end of file
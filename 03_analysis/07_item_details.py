@@ -1,86 +1,63 @@
-import pandas as pd
-from sqlalchemy import create_engine
 import os
-import json
+import sys
 
 # =======================================================
 # 설정
 # =======================================================
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-CONFIG_FILE = os.path.join(BASE_DIR, 'default_info', 'db_config.txt')
 EXPORT_FOLDER = os.path.join(BASE_DIR, 'item_reports')
 
-if not os.path.exists(CONFIG_FILE):
-    print("설정 파일이 없습니다.")
-    exit()
-
-with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-    config = json.load(f)
-
-DB_URL = f"mysql+pymysql://{config['user']}:{config['password']}@{config['host']}/{config['db_name']}?charset=utf8mb4"
-engine = create_engine(DB_URL)
+sys.path.append(os.path.dirname(BASE_DIR))
+from common.reports import report, run_module
+from common.dims import name_of, attach_names
+from common.purchases import PURCHASES_TABLE
 
 POSITIONS = ['TOP', 'JUNGLE', 'MIDDLE', 'BOTTOM', 'UTILITY']
 
 if not os.path.exists(EXPORT_FOLDER):
     os.makedirs(EXPORT_FOLDER)
 
-print(f"아이템 분석\n")
-
-# =======================================================
-# 데이터 추출 및 분석
-# =======================================================
-for pos in POSITIONS:
-    file_pos_name = "SUPPORT" if pos == "UTILITY" else pos
-    print(f"[포지션: {file_pos_name}] 데이터 정밀 분석", end=" ")
-
-    sql = f"""
-        WITH RealPurchases AS (
-            SELECT 
-                m.champion,
-                t.itemId,
-                m.win,
-                t.timestamp
-            FROM timeline_items t
-            JOIN match_data m ON t.match_id = m.match_id AND t.participantId = m.participant_id
-            WHERE m.position = '{pos}'
-              AND t.type = 'ITEM_PURCHASED'
-              AND NOT EXISTS (
-                  SELECT 1 FROM timeline_items undo
-                  WHERE undo.match_id = t.match_id
-                    AND undo.participantId = t.participantId
-                    AND undo.itemId = t.itemId
-                    AND undo.type = 'ITEM_UNDO'
-                    AND undo.timestamp >= t.timestamp
-                    AND undo.timestamp <= t.timestamp + 10000 
-              )
-        )
-        SELECT 
-            champion,
-            itemId as item_id, 
-            COUNT(*) as pick_count,
-            ROUND(AVG(win) * 100, 2) as win_rate,
-            ROUND(AVG(timestamp) / 60000, 1) as avg_purchase_time_min 
-        FROM RealPurchases
-        WHERE itemId != 0 
-        GROUP BY champion, itemId
-        HAVING pick_count >= 10 
-        ORDER BY champion ASC, pick_count DESC;
-    """
-
-    try:
-        df = pd.read_sql(sql, con=engine)
 
+@report('07.item_details', inputs=[PURCHASES_TABLE, 'match_data', 'dim_champion', 'dim_item'],
+        outputs=[f"item_reports/{'SUPPORT' if pos == 'UTILITY' else pos}_ItemDetail.csv" for pos in POSITIONS])
+def analyze_item_details(ctx):
+    print(f"아이템 분석\n")
+    dim_maps = ctx.dim_maps
+
+    # =======================================================
+    # 데이터 추출 및 분석
+    # =======================================================
+    # ITEM_UNDO 로 취소된 구매는 적재 단계(item_purchases)에서 이미 제외됨
+    purchases = ctx.table(PURCHASES_TABLE)
+    purchases = ctx.with_participants(purchases[purchases['itemId'] != 0], ['position', 'champion_id', 'win'])
+    stats = purchases.groupby(['position', 'champion_id', 'itemId'], observed=True).agg(
+        pick_count=('win', 'count'), win_rate=('win', 'mean'), avg_purchase_time_min=('timestamp', 'mean')
+    ).reset_index()
+    stats = stats[stats['pick_count'] >= 10].rename(columns={'itemId': 'item_id'})
+    stats['win_rate'] = (stats['win_rate'] * 100).round(2)
+    stats['avg_purchase_time_min'] = (stats['avg_purchase_time_min'] / 60000).round(1)
+
+    for pos in POSITIONS:
+        file_pos_name = "SUPPORT" if pos == "UTILITY" else pos
+        print(f"[포지션: {file_pos_name}] 데이터 정밀 분석", end=" ")
+
+        df = stats[stats['position'] == pos].drop(columns=['position'])
         if df.empty:
             print("데이터 없음 (Skip)")
             continue
+
+        # 이름은 출력 직전에 차원 테이블로 변환
+        df = attach_names(df, 'champion_id', 'champion', dim_maps['champion'])
+        df.insert(2, 'item_name', name_of(df['item_id'], dim_maps['item']))
+        df = df.sort_values(['champion', 'pick_count'], ascending=[True, False])
         filename = f"{file_pos_name}_ItemDetail.csv"
         df.to_csv(os.path.join(EXPORT_FOLDER, filename), index=False, encoding='utf-8-sig')
         print("완료")
 
-    except Exception as e:
-        print(f"\n쿼리 실행 중 에러: {e}")
+    print("\n" + "=" * 50)
+    print("분석 완료")
+    print("=" * 50)
+
 
-print("\n" + "=" * 50)
-print("분석 완료")
-print("=" * 50)
\ No newline at end of file
+if __name__ == "__main__":
+    run_module(__name__)
@@ -1,356 +1,334 @@
 import pandas as pd
-from sqlalchemy import create_engine
+import numpy as np
 import os
-import json
-import time
+import sys
 
 # =======================================================
 # 설정
 # =======================================================
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 EXPORT_FOLDER = os.path.join(BASE_DIR, 'advanced_reports')
-CONFIG_FILE = os.path.join(BASE_DIR, 'default_info', 'db_config.txt')
 
-if not os.path.exists(CONFIG_FILE):
-    print("설정 파일이 없습니다.")
-    exit()
-
-with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-    config = json.load(f)
-
-DB_URL = f"mysql+pymysql://{config['user']}:{config['password']}@{config['host']}/{config['db_name']}?charset=utf8mb4"
-engine = create_engine(DB_URL)
+sys.path.append(os.path.dirname(BASE_DIR))
+from common.reports import report, run_module
+from common.aggregates import AGG_TABLE
+from common.matchups import build_matchups, matchups_frame
+from common.cooccurrence import build_cooccurrence, pairs_frame
+from common.dims import flagged_ids, attach_names, name_of
+from common.significance import add_confidence
 
 if not os.path.exists(EXPORT_FOLDER):
     os.makedirs(EXPORT_FOLDER)
 
-start_time_total = time.time()
+
+def win_stats(df, keys):
+    # (keys) 별 게임 수/승리 수/승률
+    stats = df.groupby(keys, observed=True).agg(
+        total_games=('win', 'count'),
+        win_count=('win', 'sum')
+    ).reset_index()
+    stats['win_rate'] = (stats['win_count'] / stats['total_games']) * 100
+    stats['win_rate'] = stats['win_rate'].round(2)
+    return stats
+
+
+def agg_win_stats(ctx, dimension, value_col):
+    # 누적 집계(agg_champion_stats)에서 바로 (position, champion_id, value) 별 승률
+    stats = ctx.aggregates(dimension).rename(columns={'value': value_col, 'games': 'total_games', 'wins': 'win_count'})
+    stats['win_rate'] = (stats['win_count'] / stats['total_games']) * 100
+    stats['win_rate'] = stats['win_rate'].round(2)
+    return stats
+
 
 # =======================================================
 # 1. 상대 전적
 # =======================================================
-print("1. 챔피언 상성 분석")
-try:
-    sql_counter = """
-    SELECT 
-        t1.position,
-        t1.champion as me,
-        t2.champion as enemy,
-        COUNT(*) as total_games,
-        SUM(t1.win) as win_count
-    FROM match_data t1
-    JOIN match_data t2 
-        ON t1.match_id = t2.match_id 
-        AND t1.position = t2.position
-        AND t1.champion != t2.champion
-    GROUP BY t1.position, t1.champion, t2.champion
-    HAVING total_games >= 10
-    """
-    df_counter = pd.read_sql(sql_counter, engine)
-    df_counter['win_rate'] = (df_counter['win_count'] / df_counter['total_games']) * 100
-    df_counter['win_rate'] = df_counter['win_rate'].round(2)
-
-    df_counter.to_csv(os.path.join(EXPORT_FOLDER, "champion_counters.csv"), index=False, encoding='utf-8-sig')
-    print("완료")
-except Exception as e:
-    print(f"실패: {e}")
+@report('08.counters', inputs=['match_data', 'dim_champion'], outputs=['advanced_reports/champion_counters.csv'])
+def analyze_counters(ctx):
+    print("1. 챔피언 상성 분석")
+    try:
+        # 같은 라인의 블루/레드 맞상대를 포지션별 챔피언 x 챔피언 행렬로 누적
+        players = ctx.table('match_data')[['match_id', 'position', 'team', 'champion_id', 'win']]
+        df_counter = matchups_frame(build_matchups(players), min_games=10)
+        df_counter['win_rate'] = (df_counter['win_count'] / df_counter['total_games'] * 100).round(2)
+        df_counter = add_confidence(df_counter, ['position', 'me'], 'total_games', 'win_count')
+        df_counter = attach_names(df_counter, 'me', 'me', ctx.dim_maps['champion'])
+        df_counter = attach_names(df_counter, 'enemy', 'enemy', ctx.dim_maps['champion'])
+
+        df_counter.to_csv(os.path.join(EXPORT_FOLDER, "champion_counters.csv"), index=False, encoding='utf-8-sig')
+        print("완료")
+    except Exception as e:
+        print(f"실패: {e}")
+
 
 # =======================================================
 # 2. 시간대별 승률
 # =======================================================
-print("2. 시간대별 승률 분석")
-try:
-    sql_time = """
-    SELECT 
-        position,
-        champion,
-        CASE 
-            WHEN gameDuration < 1200 THEN '0-20분' -- 초반
-            WHEN gameDuration < 1500 THEN '20-25분'
-            WHEN gameDuration < 1800 THEN '25-30분' -- 중반
-            WHEN gameDuration < 2100 THEN '30-35분'
-            WHEN gameDuration < 2400 THEN '35-40분' -- 후반
-            ELSE '40분+' -- 극후반
-        END as game_time,
-        COUNT(*) as total_games,
-        SUM(win) as win_count
-    FROM match_data
-    GROUP BY position, champion, game_time
-    HAVING total_games >= 5
-    """
-    df_time = pd.read_sql(sql_time, engine)
-    df_time['win_rate'] = (df_time['win_count'] / df_time['total_games']) * 100
-    df_time['win_rate'] = df_time['win_rate'].round(2)
-
-    df_time.to_csv(os.path.join(EXPORT_FOLDER, "champion_time_stats.csv"), index=False, encoding='utf-8-sig')
-    print("완료")
-except Exception as e:
-    print(f"실패: {e}")
+@report('08.game_time', inputs=[AGG_TABLE, 'dim_champion'], outputs=['advanced_reports/champion_time_stats.csv'])
+def analyze_game_time(ctx):
+    print("2. 시간대별 승률 분석")
+    try:
+        # 초반(~20분) / 중반(20~30분) / 후반(30~40분) / 극후반(40분+)
+        df_time = agg_win_stats(ctx, 'game_time', 'game_time')
+        df_time = df_time[df_time['total_games'] >= 5]
+        df_time = add_confidence(df_time, ['position', 'champion_id'], 'total_games', 'win_count')
+        df_time = attach_names(df_time, 'champion_id', 'champion', ctx.dim_maps['champion'])
+
+        df_time.to_csv(os.path.join(EXPORT_FOLDER, "champion_time_stats.csv"), index=False, encoding='utf-8-sig')
+        print("완료")
+    except Exception as e:
+        print(f"실패: {e}")
+
 
 # =======================================================
 # 3. 3코어 아이템 빌드
 # =======================================================
-print("3. 3코어 아이템 빌드 분석")
-
-BOOTS_LIST = [
-    '장화', '약간 신비한 신발', '광전사의 군화', '마법사의 신발', '명석함의 아이오니아 장화',
-    '신속의 장화', '판금 장화', '헤르메스의 발걸음', '공생형 밑창', '영혼의 발걸음',
-    '영원한 전진', '건메탈 군화', '주문투척자의 신발', '핏빛 명석함', '신속행진', '무장 진격', '사슬끈 분쇄자'
-]
-EXCLUDE_ITEMS = [
-    'None', 'Unknown', None, '',
-    '도란의 검', '도란의 반지', '도란의 방패', '수확의 낫', '암흑의 인장', '여신의 눈물', '부패 물약',
-    '세계 지도집', '룬 나침반', '세계의 결실', '청가오리', '피의 노래', '꿈 생성기', '자자크의 세계가시', '태양의 썰매',
-    '새끼 화염발톱', '새끼 이끼쿵쿵', '새끼 바람돌이',
-    '체력 물약', '충전형 물약', '제어 와드', '비스킷',
-    '강철의 영약', '마법의 영약', '분노의 영약', '민첩의 영약',
-    '와드 토템', '예언자의 렌즈', '망원형 개조'
-]
-
-sql_items = "SELECT position, champion, item0, item1, item2, item3, item4, item5, win FROM match_data"
-df_items = pd.read_sql(sql_items, engine)
-
-
-def get_core_build(row):
-    items = [row[f'item{i}'] for i in range(6)]
-    core_items = []
-    for item in items:
-        if item is None: continue
-        item_str = str(item).strip()
-        if item_str == 'None' or item_str == '': continue
-        if item_str not in EXCLUDE_ITEMS and item_str not in BOOTS_LIST:
-            core_items.append(item_str)
-
-    if len(core_items) < 3: return None
-    return " ➜ ".join(core_items[:3])
-
-
-df_items['build_path'] = df_items.apply(get_core_build, axis=1)
-df_builds = df_items.dropna(subset=['build_path'])
-
-df_build_stats = df_builds.groupby(['position', 'champion', 'build_path']).agg(
-    total_games=('win', 'count'),
-    win_count=('win', 'sum')
-).reset_index()
-
-df_build_stats['win_rate'] = (df_build_stats['win_count'] / df_build_stats['total_games']) * 100
-df_build_stats['win_rate'] = df_build_stats['win_rate'].round(2)
-df_build_stats = df_build_stats[df_build_stats['total_games'] >= 5]
-
-df_build_stats.to_csv(os.path.join(EXPORT_FOLDER, "champion_builds.csv"), index=False, encoding='utf-8-sig')
-print("완료")
+@report('08.core_builds', inputs=[AGG_TABLE, 'dim_champion', 'dim_item'],
+        outputs=['advanced_reports/champion_builds.csv'])
+def analyze_core_builds(ctx):
+    print("3. 3코어 아이템 빌드 분석")
+    item_names = ctx.dim_maps['item']
+
+    # 최종 인벤토리 슬롯 순서 기준 첫 코어 3개 ('a,b,c', 집계 시 dim_item.is_core 로 판별)
+    df_build_stats = agg_win_stats(ctx, 'build', 'build_path')
+    build_ids = df_build_stats['build_path'].str.split(',', expand=True)
+    if not build_ids.empty:
+        names = [name_of(build_ids[i].astype(int), item_names) for i in build_ids.columns]
+        df_build_stats['build_path'] = names[0].str.cat(names[1:], sep=" ➜ ")
+    df_build_stats = df_build_stats[df_build_stats['total_games'] >= 5]
+    df_build_stats = add_confidence(df_build_stats, ['position', 'champion_id'], 'total_games', 'win_count')
+    df_build_stats = attach_names(df_build_stats, 'champion_id', 'champion', ctx.dim_maps['champion'])
+
+    df_build_stats.to_csv(os.path.join(EXPORT_FOLDER, "champion_builds.csv"), index=False, encoding='utf-8-sig')
+    print("완료")
+
 
 # =======================================================
 # 4. 🏁 시작 아이템 분석
 # =======================================================
-print("4. 시작 아이템 분석")
+@report('08.starter_items', inputs=[AGG_TABLE, 'dim_champion', 'dim_item'],
+        outputs=['advanced_reports/champion_starters.csv'])
+def analyze_starter_items(ctx):
+    print("4. 시작 아이템 분석")
+    df_starter_stats = agg_win_stats(ctx, 'item', 'item_id').astype({'item_id': int})
+    df_starter_stats = df_starter_stats[df_starter_stats['item_id'].isin(flagged_ids(ctx.item_flags, 'is_starter'))]
 
-STARTER_TARGETS = [
-    '도란의 검', '도란의 반지', '도란의 방패', '수확의 낫', '암흑의 인장', '여신의 눈물', '부패 물약',
-    '세계 지도집', '룬 나침반', '세계의 결실', '새끼 화염발톱', '새끼 이끼쿵쿵', '새끼 바람돌이',
-    '롱소드', '증폭의 고서', '사파이어 수정', '천갑옷', '마법무효화의 망토', '장화'
-]
+    if not df_starter_stats.empty:
+        df_starter_stats = df_starter_stats[df_starter_stats['total_games'] >= 5]
+        df_starter_stats = add_confidence(df_starter_stats, ['position', 'champion_id'], 'total_games', 'win_count')
+        df_starter_stats = attach_names(df_starter_stats, 'champion_id', 'champion', ctx.dim_maps['champion'])
+        df_starter_stats = attach_names(df_starter_stats, 'item_id', 'item_name', ctx.dim_maps['item'])
 
-df_melted = df_items.melt(id_vars=['position', 'champion', 'win'], value_vars=[f'item{i}' for i in range(6)],
-                          value_name='item_name')
-df_starters = df_melted[df_melted['item_name'].isin(STARTER_TARGETS)]
-
-if not df_starters.empty:
-    df_starter_stats = df_starters.groupby(['position', 'champion', 'item_name']).agg(
-        total_games=('win', 'count'),
-        win_count=('win', 'sum')
-    ).reset_index()
-    df_starter_stats['win_rate'] = (df_starter_stats['win_count'] / df_starter_stats['total_games']) * 100
-    df_starter_stats['win_rate'] = df_starter_stats['win_rate'].round(2)
-    df_starter_stats = df_starter_stats[df_starter_stats['total_games'] >= 5]
+        df_starter_stats.to_csv(os.path.join(EXPORT_FOLDER, "champion_starters.csv"), index=False,
+                                encoding='utf-8-sig')
+        print("완료")
 
-    df_starter_stats.to_csv(os.path.join(EXPORT_FOLDER, "champion_starters.csv"), index=False, encoding='utf-8-sig')
-    print("완료")
 
 # =======================================================
 # 5. 장신구 분석
 # =======================================================
-print("📊 5. 장신구 분석")
-sql_trinket = "SELECT position, champion, item6 as item_name, count(*) as total_games, sum(win) as win_count FROM match_data GROUP BY position, champion, item6"
-df_trinket = pd.read_sql(sql_trinket, engine)
-TRINKET_LIST = ['와드 토템', '예언자의 렌즈', '망원형 개조', '투명 와드']
-df_trinket = df_trinket[df_trinket['item_name'].isin(TRINKET_LIST)]
-if not df_trinket.empty:
-    df_trinket['win_rate'] = (df_trinket['win_count'] / df_trinket['total_games']) * 100
-    df_trinket['win_rate'] = df_trinket['win_rate'].round(2)
-    df_trinket.to_csv(os.path.join(EXPORT_FOLDER, "champion_trinkets.csv"), index=False, encoding='utf-8-sig')
-    print("완료")
+@report('08.trinket_items', inputs=[AGG_TABLE, 'dim_champion', 'dim_item'],
+        outputs=['advanced_reports/champion_trinkets.csv'])
+def analyze_trinket_items(ctx):
+    print("📊 5. 장신구 분석")
+    df_trinket = agg_win_stats(ctx, 'trinket', 'item_id').astype({'item_id': int})
+    df_trinket = df_trinket[df_trinket['item_id'].isin(flagged_ids(ctx.item_flags, 'is_trinket'))]
+    if not df_trinket.empty:
+        df_trinket = add_confidence(df_trinket, ['position', 'champion_id'], 'total_games', 'win_count')
+        df_trinket = attach_names(df_trinket, 'champion_id', 'champion', ctx.dim_maps['champion'])
+        df_trinket = attach_names(df_trinket, 'item_id', 'item_name', ctx.dim_maps['item'])
+        df_trinket.to_csv(os.path.join(EXPORT_FOLDER, "champion_trinkets.csv"), index=False, encoding='utf-8-sig')
+        print("완료")
+
 
 # =======================================================
 # 6. 🔮 룬 분석
 # =======================================================
-print("6. 룬 세팅 분석")
-sql_runes = "SELECT position, champion, rune_key, rune_main, rune_sub, win FROM match_data"
-df_runes = pd.read_sql(sql_runes, engine).dropna()
-df_runes[['rune_key', 'rune_main', 'rune_sub']] = df_runes[['rune_key', 'rune_main', 'rune_sub']].astype(str)
-
-df_rune_stats = df_runes.groupby(['position', 'champion', 'rune_key', 'rune_main', 'rune_sub']).agg(
-    total_games=('win', 'count'),
-    win_count=('win', 'sum')
-).reset_index()
-df_rune_stats['win_rate'] = (df_rune_stats['win_count'] / df_rune_stats['total_games']) * 100
-df_rune_stats['win_rate'] = df_rune_stats['win_rate'].round(2)
-df_rune_stats = df_rune_stats[df_rune_stats['total_games'] >= 5]
-
-df_rune_stats.to_csv(os.path.join(EXPORT_FOLDER, "champion_runes.csv"), index=False, encoding='utf-8-sig')
-print("완료")
+@report('08.runes', inputs=[AGG_TABLE, 'dim_champion', 'dim_rune'], outputs=['advanced_reports/champion_runes.csv'])
+def analyze_runes(ctx):
+    print("6. 룬 세팅 분석")
+    rune_cols = ['rune_key', 'rune_main', 'rune_sub']
+    df_rune_stats = agg_win_stats(ctx, 'rune', 'runes')
+    df_rune_stats = df_rune_stats[df_rune_stats['total_games'] >= 5]
+    runes = df_rune_stats.pop('runes').str.split('/', expand=True).astype(int)
+    for i, col in enumerate(rune_cols):
+        df_rune_stats.insert(2 + i, col, runes[i])
+
+    df_rune_stats = add_confidence(df_rune_stats, ['position', 'champion_id'], 'total_games', 'win_count')
+    df_rune_stats = attach_names(df_rune_stats, 'champion_id', 'champion', ctx.dim_maps['champion'])
+    for col in rune_cols:
+        df_rune_stats = attach_names(df_rune_stats, col, col, ctx.dim_maps['rune'])
+
+    df_rune_stats.to_csv(os.path.join(EXPORT_FOLDER, "champion_runes.csv"), index=False, encoding='utf-8-sig')
+    print("완료")
+
 
 # =======================================================
 # 7. 진영별 승률
 # =======================================================
-print("7. 진영별 승률 분석")
-sql_sides = "SELECT position, champion, team, win FROM match_data"
-df_sides = pd.read_sql(sql_sides, engine)
-df_side_stats = df_sides.groupby(['position', 'champion', 'team']).agg(
-    total_games=('win', 'count'),
-    win_count=('win', 'sum')
-).reset_index()
-df_side_stats['win_rate'] = (df_side_stats['win_count'] / df_side_stats['total_games']) * 100
-df_side_stats['win_rate'] = df_side_stats['win_rate'].round(2)
-df_side_stats.to_csv(os.path.join(EXPORT_FOLDER, "champion_sides.csv"), index=False, encoding='utf-8-sig')
-print("완료")
+@report('08.sides', inputs=[AGG_TABLE, 'dim_champion'], outputs=['advanced_reports/champion_sides.csv'])
+def analyze_sides(ctx):
+    print("7. 진영별 승률 분석")
+    df_side_stats = agg_win_stats(ctx, 'side', 'team')
+    df_side_stats = add_confidence(df_side_stats, ['position', 'champion_id'], 'total_games', 'win_count')
+    df_side_stats = attach_names(df_side_stats, 'champion_id', 'champion', ctx.dim_maps['champion'])
+    df_side_stats.to_csv(os.path.join(EXPORT_FOLDER, "champion_sides.csv"), index=False, encoding='utf-8-sig')
+    print("완료")
+
 
 # =======================================================
 # 8. 챔피언 상세 스탯
 # =======================================================
-print("8. 챔피언 전투/운영 스탯(KDA, DPM 등) 분석")
-sql_stats = """
-SELECT 
-    position, champion,
-    AVG(kills) as avg_kills, AVG(deaths) as avg_deaths, AVG(assists) as avg_assists,
-    AVG(kda) as avg_kda, AVG(total_damage) as avg_damage, AVG(damage_taken) as avg_tanking,
-    AVG(vision_score) as avg_vision, AVG(gold_earned) as avg_gold, AVG(cs_total) as avg_cs,
-    AVG(gameDuration) as avg_time, AVG(solo_kills) as avg_solokills 
-FROM match_data
-GROUP BY position, champion
-"""
-df_stats = pd.read_sql(sql_stats, engine)
-df_stats['DPM'] = df_stats['avg_damage'] / (df_stats['avg_time'] / 60)
-df_stats['GPM'] = df_stats['avg_gold'] / (df_stats['avg_time'] / 60)
-df_stats['VSPM'] = df_stats['avg_vision'] / (df_stats['avg_time'] / 60)
-df_stats['DTM'] = df_stats['avg_tanking'] / (df_stats['avg_time'] / 60)
-
-cols_to_round = ['avg_kills', 'avg_deaths', 'avg_assists', 'avg_kda', 'DPM', 'GPM', 'VSPM', 'DTM', 'avg_solokills',
-                 'avg_time']
-df_stats[cols_to_round] = df_stats[cols_to_round].round(2)
-df_stats.to_csv(os.path.join(EXPORT_FOLDER, "champion_stats.csv"), index=False, encoding='utf-8-sig')
-print("완료")
+def champion_stats(ctx):
+    df_stats = ctx.table('match_data').groupby(['position', 'champion_id'], observed=True).agg(
+        avg_kills=('kills', 'mean'), avg_deaths=('deaths', 'mean'), avg_assists=('assists', 'mean'),
+        avg_kda=('kda', 'mean'), avg_damage=('total_damage', 'mean'), avg_tanking=('damage_taken', 'mean'),
+        avg_vision=('vision_score', 'mean'), avg_gold=('gold_earned', 'mean'), avg_cs=('cs_total', 'mean'),
+        avg_time=('gameDuration', 'mean'), avg_solokills=('solo_kills', 'mean')
+    ).reset_index()
+    df_stats['DPM'] = df_stats['avg_damage'] / (df_stats['avg_time'] / 60)
+    df_stats['GPM'] = df_stats['avg_gold'] / (df_stats['avg_time'] / 60)
+    df_stats['VSPM'] = df_stats['avg_vision'] / (df_stats['avg_time'] / 60)
+    df_stats['DTM'] = df_stats['avg_tanking'] / (df_stats['avg_time'] / 60)
+    return df_stats
+
+
+@report('08.stats', inputs=['match_data', 'dim_champion'], outputs=['advanced_reports/champion_stats.csv'])
+def analyze_stats(ctx):
+    print("8. 챔피언 전투/운영 스탯(KDA, DPM 등) 분석")
+    df_stats = champion_stats(ctx)
+
+    cols_to_round = ['avg_kills', 'avg_deaths', 'avg_assists', 'avg_kda', 'DPM', 'GPM', 'VSPM', 'DTM',
+                     'avg_solokills', 'avg_time']
+    df_stats[cols_to_round] = df_stats[cols_to_round].round(2)
+    attach_names(df_stats, 'champion_id', 'champion', ctx.dim_maps['champion']).to_csv(
+        os.path.join(EXPORT_FOLDER, "champion_stats.csv"), index=False, encoding='utf-8-sig')
+    print("완료")
+
 
 # =======================================================
 # 9. ⚡ 스펠 분석
 # =======================================================
-print("9. 스펠 분석")
-sql_spells = "SELECT position, champion, spell1, spell2, win FROM match_data"
-df_spells = pd.read_sql(sql_spells, engine)
+FLASH = '점멸'
+
+
+def normalize_spells(spell1, spell2):
+    # 점멸은 항상 두 번째(F) 칸, 나머지 조합은 이름순
+    s1, s2 = spell1.to_numpy(dtype=object), spell2.to_numpy(dtype=object)
+    lo, hi = np.where(s1 <= s2, s1, s2), np.where(s1 <= s2, s2, s1)
+    first = np.where(s1 == FLASH, s2, np.where(s2 == FLASH, s1, lo))
+    second = np.where(s1 == FLASH, s1, np.where(s2 == FLASH, s2, hi))
+    return first, second
+
+
+@report('08.spells', inputs=[AGG_TABLE, 'dim_champion', 'dim_spell'],
+        outputs=['advanced_reports/champion_spells.csv'])
+def analyze_spells(ctx):
+    print("9. 스펠 분석")
+    # 집계에는 순서 없는 ID 쌍 ('a,b') 으로 저장되어 있음
+    df_spells = ctx.aggregates('spell')
+
+    if not df_spells.empty:
+        spell_ids = df_spells['value'].str.split(',', expand=True).astype(int)
+        for i, col in enumerate(['spell1', 'spell2']):
+            df_spells[col] = name_of(spell_ids[i], ctx.dim_maps['spell'])
+        df_spells['spell1'], df_spells['spell2'] = normalize_spells(df_spells['spell1'], df_spells['spell2'])
+        df_spell_stats = df_spells.groupby(['position', 'champion_id', 'spell1', 'spell2']).agg(
+            total_games=('games', 'sum'), win_count=('wins', 'sum')
+        ).reset_index()
+        df_spell_stats['win_rate'] = (df_spell_stats['win_count'] / df_spell_stats['total_games']) * 100
+        df_spell_stats['win_rate'] = df_spell_stats['win_rate'].round(2)
+        df_spell_stats = df_spell_stats[df_spell_stats['total_games'] >= 5]
+        df_spell_stats = add_confidence(df_spell_stats, ['position', 'champion_id'], 'total_games', 'win_count')
+        df_spell_stats = attach_names(df_spell_stats, 'champion_id', 'champion', ctx.dim_maps['champion'])
+        df_spell_stats.to_csv(os.path.join(EXPORT_FOLDER, "champion_spells.csv"), index=False, encoding='utf-8-sig')
+        print("완료")
 
 
-def normalize_spells(row):
-    s1, s2 = str(row['spell1']), str(row['spell2'])
-    if s1 == '점멸':
-        return pd.Series([s2, s1])
-    elif s2 == '점멸':
-        return pd.Series([s1, s2])
-    spells = sorted([s1, s2])
-    return pd.Series([spells[0], spells[1]])
-
-
-if not df_spells.empty:
-    df_spells[['spell1', 'spell2']] = df_spells.apply(normalize_spells, axis=1)
-    df_spell_stats = df_spells.groupby(['position', 'champion', 'spell1', 'spell2']).agg(
-        total_games=('win', 'count'), win_count=('win', 'sum')
-    ).reset_index()
-    df_spell_stats['win_rate'] = (df_spell_stats['win_count'] / df_spell_stats['total_games']) * 100
-    df_spell_stats['win_rate'] = df_spell_stats['win_rate'].round(2)
-    df_spell_stats = df_spell_stats[df_spell_stats['total_games'] >= 5]
-    df_spell_stats.to_csv(os.path.join(EXPORT_FOLDER, "champion_spells.csv"), index=False, encoding='utf-8-sig')
-    print("완료")
-
 # =======================================================
 # 10. 라인전 분석
 # =======================================================
-print("10. 라인전 분석")
-# A. 포탑 방패 채굴
-sql_plates = """
-SELECT 
-    m.position,
-    m.champion,
-    COUNT(t.match_id) as total_plates_taken, 
-    COUNT(DISTINCT m.match_id) as plate_games_count 
-FROM match_data m
-JOIN timeline_objectives t 
-    ON m.match_id = t.match_id 
-    AND t.type = 'TURRET_PLATE_DESTROYED'
-WHERE 
-    (m.team = 'Blue' AND t.teamId = 100) OR 
-    (m.team = 'Red' AND t.teamId = 200)
-    AND (
-        (m.position = 'TOP' AND t.lane = 'TOP_LANE') OR
-        (m.position = 'MIDDLE' AND t.lane = 'MID_LANE') OR
-        (m.position = 'BOTTOM' AND t.lane = 'BOT_LANE') OR
-        (m.position = 'UTILITY' AND t.lane = 'BOT_LANE')
-    )
-GROUP BY m.position, m.champion
-"""
-try:
-    df_plates = pd.read_sql(sql_plates, engine)
-    df_plates['avg_plates'] = (df_plates['total_plates_taken'] / df_plates['plate_games_count']).round(2)
-except Exception as e:
-    print(f"   (방패 분석 Skip: {e})")
-    df_plates = pd.DataFrame()
-
-# B. 라인전 공격성 지표
-sql_early_kills = """
-SELECT 
-    m.position,
-    m.champion,
-    COUNT(k.match_id) as early_kills_count,
-    COUNT(DISTINCT m.match_id) as kill_games_count
-FROM match_data m
-JOIN timeline_kills k 
-    ON m.match_id = k.match_id
-WHERE k.killerId = m.participant_id  
-  AND k.timestamp <= 840000        
-GROUP BY m.position, m.champion
-"""
-try:
-    df_early = pd.read_sql(sql_early_kills, engine)
-    df_early['avg_early_kills'] = (df_early['early_kills_count'] / df_early['kill_games_count']).round(2)
-except Exception as e:
-    print(f"   (초반 킬 분석 Skip: {e})")
-    df_early = pd.DataFrame()
-
-# C. 데이터 병합
-try:
-    df_laning = df_stats[['position', 'champion', 'avg_cs', 'avg_gold']].copy()
-
-    if not df_plates.empty:
-        df_laning = pd.merge(df_laning, df_plates[['position', 'champion', 'avg_plates']], on=['position', 'champion'],
-                             how='left')
-    else:
-        df_laning['avg_plates'] = 0
-
-    if not df_early.empty:
-        df_laning = pd.merge(df_laning, df_early[['position', 'champion', 'avg_early_kills']],
-                             on=['position', 'champion'], how='left')
-    else:
-        df_laning['avg_early_kills'] = 0
-
-    df_laning = df_laning.fillna(0)
-
-    df_laning.to_csv(os.path.join(EXPORT_FOLDER, "champion_laning.csv"), index=False, encoding='utf-8-sig')
-    print(f"라인전 지표 저장 완료 ({len(df_laning)} rows)")
-
-except Exception as e:
-    print(f"라인전 데이터 병합 실패: {e}")
+@report('08.laning', inputs=['match_data', 'participant_timeline_summary', 'dim_champion'],
+        outputs=['advanced_reports/champion_laning.csv'])
+def analyze_laning(ctx):
+    print("10. 라인전 분석")
+    # A. 포탑 방패 채굴 / B. 라인전 공격성 지표 (14분 이내 킬)
+    # 참가자 단위 타임라인 요약에서 바로 집계 (평균은 해당 이벤트가 있었던 게임 기준)
+    try:
+        summary = ctx.table('participant_timeline_summary')
+        summary = summary[['match_id', 'participant_id', 'plates_taken', 'early_kills']]
+        summary = ctx.with_participants(summary, ['position', 'champion_id'], on='participant_id')
+        summary['plate_game'] = summary['plates_taken'] > 0
+        summary['kill_game'] = summary['early_kills'] > 0
+        df_summary = summary.groupby(['position', 'champion_id'], observed=True).agg(
+            total_plates_taken=('plates_taken', 'sum'),
+            plate_games_count=('plate_game', 'sum'),
+            early_kills_count=('early_kills', 'sum'),
+            kill_games_count=('kill_game', 'sum')
+        ).reset_index()
+
+        df_plates = df_summary[df_summary['plate_games_count'] > 0].copy()
+        df_plates['avg_plates'] = (df_plates['total_plates_taken'] / df_plates['plate_games_count']).round(2)
+
+        df_early = df_summary[df_summary['kill_games_count'] > 0].copy()
+        df_early['avg_early_kills'] = (df_early['early_kills_count'] / df_early['kill_games_count']).round(2)
+    except Exception as e:
+        print(f"   (라인전 요약 Skip: {e})")
+        df_plates = pd.DataFrame()
+        df_early = pd.DataFrame()
+
+    # C. 데이터 병합
+    try:
+        df_laning = champion_stats(ctx)[['position', 'champion_id', 'avg_cs', 'avg_gold']]
+
+        if not df_plates.empty:
+            df_laning = pd.merge(df_laning, df_plates[['position', 'champion_id', 'avg_plates']],
+                                 on=['position', 'champion_id'], how='left')
+        else:
+            df_laning['avg_plates'] = 0
+
+        if not df_early.empty:
+            df_laning = pd.merge(df_laning, df_early[['position', 'champion_id', 'avg_early_kills']],
+                                 on=['position', 'champion_id'], how='left')
+        else:
+            df_laning['avg_early_kills'] = 0
+
+        df_laning = df_laning.fillna(0)
+        df_laning = attach_names(df_laning, 'champion_id', 'champion', ctx.dim_maps['champion'])
+
+        df_laning.to_csv(os.path.join(EXPORT_FOLDER, "champion_laning.csv"), index=False, encoding='utf-8-sig')
+        print(f"라인전 지표 저장 완료 ({len(df_laning)} rows)")
+
+    except Exception as e:
+        print(f"라인전 데이터 병합 실패: {e}")
+
 
 # =======================================================
-# 🏁 종료
+# 11. 팀원 시너지 / 다른 라인 상대 전적
 # =======================================================
-end_time_total = time.time()
-elapsed = int(end_time_total - start_time_total)
-print(f"\n 분석 완료 (총 소요시간: {elapsed}초)")
\ No newline at end of file
+@report('08.synergy', inputs=['match_data', 'dim_champion'],
+        outputs=['advanced_reports/champion_synergy.csv', 'advanced_reports/champion_cross_counters.csv'])
+def analyze_synergy(ctx):
+    print("11. 팀원 시너지 / 라인 간 상성 분석")
+    # 매치의 10명을 (챔피언, 포지션) 인덱스로 한 번에 누적한 희소 행렬에서 행 단위로 펼침
+    players = ctx.table('match_data')[['match_id', 'position', 'team', 'champion_id', 'win']]
+    co = build_cooccurrence(players)
+    champ_map = ctx.dim_maps['champion']
+
+    outputs = [('team', 'champion_synergy.csv', 'partner'), ('enemy', 'champion_cross_counters.csv', 'enemy')]
+    for relation, filename, partner in outputs:
+        df = pairs_frame(co, relation, min_games=10)
+        if relation == 'enemy':
+            # 같은 라인 맞상대는 champion_counters.csv
+            df = df[df['position'] != df['partner_position']]
+        df['win_rate'] = (df['win_count'] / df['total_games'] * 100).round(2)
+        df = add_confidence(df, ['position', 'champion_id', 'partner_position'], 'total_games', 'win_count')
+        df = df.rename(columns={'partner_position': f"{partner}_position"})
+        df = attach_names(df, 'champion_id', 'champion', champ_map)
+        df = attach_names(df, 'partner_id', partner, champ_map)
+        df.to_csv(os.path.join(EXPORT_FOLDER, filename), index=False, encoding='utf-8-sig')
+    print("완료")
+
+
+if __name__ == "__main__":
+    run_module(__name__)
@@ -1,41 +1,28 @@
 import pandas as pd
-from sqlalchemy import create_engine
-import json
 import os
+import sys
 
 # =======================================================
 # 설정
 # =======================================================
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-CONFIG_FILE = os.path.join(BASE_DIR, 'default_info', 'db_config.txt')
 OUTPUT_FOLDER = os.path.join(BASE_DIR, 'advanced_reports')
 
+sys.path.append(os.path.dirname(BASE_DIR))
+from common.reports import report, run_module
+from common.dims import attach_names
+
 if not os.path.exists(OUTPUT_FOLDER):
     os.makedirs(OUTPUT_FOLDER)
 
-with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-    config = json.load(f)
-DB_URL = f"mysql+pymysql://{config['user']}:{config['password']}@{config['host']}/{config['db_name']}?charset=utf8mb4"
-engine = create_engine(DB_URL)
-
 
-def analyze_macro_stats():
+@report('09.macro', inputs=['match_data', 'participant_timeline_summary', 'dim_champion'],
+        outputs=['advanced_reports/champion_macro.csv'])
+def analyze_macro_stats(ctx):
     print("오브젝트 및 방패 채굴 기여도 분석")
 
-    query_basic = """
-    SELECT 
-        match_id,
-        position, 
-        champion, 
-        win,
-        team_dragon, 
-        team_baron, 
-        team_horde, 
-        vision_score, 
-        control_wards
-    FROM match_data
-    """
-    df = pd.read_sql(query_basic, engine)
+    df = ctx.table('match_data')[['match_id', 'participant_id', 'position', 'champion_id', 'win', 'team_dragon',
+                                  'team_baron', 'team_horde', 'vision_score', 'control_wards']]
 
     if df.empty:
         print("데이터가 없습니다.")
@@ -44,39 +31,20 @@ def analyze_macro_stats():
     # 2. 포탑 방패 데이터 가져오기
     print("포탑 방패 데이터 연동")
 
-    query_plates = """
-    SELECT 
-        m.match_id,
-        m.position,
-        m.champion,
-        COUNT(t.match_id) as turret_plates
-    FROM match_data m
-    JOIN timeline_objectives t 
-        ON m.match_id = t.match_id 
-        AND t.type = 'TURRET_PLATE_DESTROYED'
-    WHERE 
-        ((m.team = 'Blue' AND t.teamId = 100) OR (m.team = 'Red' AND t.teamId = 200))
-        AND (
-            (m.position = 'TOP' AND t.lane = 'TOP_LANE') OR
-            (m.position = 'MIDDLE' AND t.lane = 'MID_LANE') OR
-            (m.position = 'BOTTOM' AND t.lane = 'BOT_LANE') OR
-            (m.position = 'UTILITY' AND t.lane = 'BOT_LANE')
-        )
-    GROUP BY m.match_id, m.position, m.champion
-    """
-
+    # 자기 팀 + 자기 라인 방패 수는 적재 단계의 참가자 요약 테이블에 있음
     try:
-        df_plates = pd.read_sql(query_plates, engine)
-        df = pd.merge(df, df_plates, on=['match_id', 'position', 'champion'], how='left')
+        df_plates = ctx.table('participant_timeline_summary')[['match_id', 'participant_id', 'plates_taken']]
+        df_plates = df_plates.rename(columns={'plates_taken': 'turret_plates'})
+        df = pd.merge(df, df_plates, on=['match_id', 'participant_id'], how='left')
         df['turret_plates'] = df['turret_plates'].fillna(0)
         print(f"방패 데이터 병합 완료")
 
     except Exception as e:
         print(f"방패 데이터 연동 실패: {e}")
-        df['turret_plates'] = 0
+        df = df.assign(turret_plates=0)
 
     # 3. 챔피언별 평균 계산
-    champ_stats = df.groupby(['position', 'champion']).agg(
+    champ_stats = df.groupby(['position', 'champion_id'], observed=True).agg(
         avg_dragon=('team_dragon', 'mean'),
         avg_baron=('team_baron', 'mean'),
         avg_horde=('team_horde', 'mean'),
@@ -88,7 +56,7 @@ def analyze_macro_stats():
     ).reset_index()
 
     # 4. 포지션별 평균 계산
-    pos_stats = df.groupby('position').agg(
+    pos_stats = df.groupby('position', observed=True).agg(
         pos_dragon=('team_dragon', 'mean'),
         pos_baron=('team_baron', 'mean'),
         pos_horde=('team_horde', 'mean'),
@@ -108,12 +76,14 @@ def analyze_macro_stats():
     merged['diff_vision'] = (merged['avg_vision'] - merged['pos_vision']).round(2)
     merged['diff_plates'] = (merged['avg_plates'] - merged['pos_plates']).round(2)
 
-    final_df = merged[merged['game_count'] >= 5]
+    final_df = merged[merged['game_count'] >= 5].copy()
+    final_df = attach_names(final_df, 'champion_id', 'champion', ctx.dim_maps['champion'])
 
     save_path = os.path.join(OUTPUT_FOLDER, "champion_macro.csv")
     final_df.to_csv(save_path, index=False, encoding='utf-8-sig')
 
     print(f"저장 완료: {save_path}")
 
+
 if __name__ == "__main__":
-    analyze_macro_stats()
\ No newline at end of file
+    run_module(__name__)
\ No newline at end of file
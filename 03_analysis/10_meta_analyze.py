@@ -1,48 +1,35 @@
-import pandas as pd
-from sqlalchemy import create_engine
-import json
+import numpy as np
 import os
+import sys
 
 # =======================================================
 # ⚙️ 설정
 # =======================================================
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-CONFIG_FILE = os.path.join(BASE_DIR, 'default_info', 'db_config.txt')
 OUTPUT_FOLDER = os.path.join(BASE_DIR, 'advanced_reports')
 
+sys.path.append(os.path.dirname(BASE_DIR))
+from common.reports import report, run_module
+
 if not os.path.exists(OUTPUT_FOLDER):
     os.makedirs(OUTPUT_FOLDER)
 
-if not os.path.exists(CONFIG_FILE):
-    print(f"'{CONFIG_FILE}' 파일이 없습니다.")
-    exit()
-
-with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-    config = json.load(f)
 
-DB_URL = f"mysql+pymysql://{config['user']}:{config['password']}@{config['host']}/{config['db_name']}?charset=utf8mb4"
-engine = create_engine(DB_URL)
+def played_matches(ctx):
+    # 10분 이상 게임의 매치 x 팀 행
+    df = ctx.table('match_team')
+    return df.loc[df['gameDuration'] >= 600, ['match_id', 'team', 'team_id', 'win', 'gameDuration', 'dragon_count',
+                                             'baron_count', 'horde_count', 'total_kills']]
 
 
-def analyze_meta_stats():
+@report('10.meta', inputs=['match_team'],
+        outputs=[f'advanced_reports/{name}.csv' for name in ('meta_side_win', 'meta_dragon_count', 'meta_baron_count',
+                                                             'meta_horde_count', 'meta_time_dist')])
+def analyze_meta_stats(ctx):
     print("메타 & 오브젝트 분석")
     print("1. 기본 메타(진영/시간/오브젝트수) 분석")
 
-    query = """
-    SELECT 
-        match_id, 
-        team, 
-        MAX(win) as win, 
-        MAX(gameDuration) as gameDuration,
-        MAX(team_dragon) as dragon_count,
-        MAX(team_baron) as baron_count,
-        MAX(team_horde) as horde_count,
-        SUM(kills) as total_kills
-    FROM match_data
-    WHERE gameDuration >= 600
-    GROUP BY match_id, team
-    """
-    df = pd.read_sql(query, engine)
+    df = played_matches(ctx).drop(columns=['team_id'])
 
     if df.empty:
         print("match_data 데이터가 없습니다.")
@@ -50,10 +37,10 @@ def analyze_meta_stats():
 
     # --- 1-1. 진영별 승률 ---
     # [수정] reset_index() 추가
-    side_stats = df.groupby('team')['win'].mean().reset_index()
+    side_stats = df.groupby('team', observed=True)['win'].mean().reset_index()
     # [수정] str(x) 변환 추가
-    side_stats['team_name'] = side_stats['team'].apply(
-        lambda x: 'Blue' if '100' in str(x) or 'Blue' in str(x) else 'Red')
+    team = side_stats['team'].astype(str)
+    side_stats['team_name'] = np.where(team.str.contains('100') | team.str.contains('Blue'), 'Blue', 'Red')
     side_stats['win_rate'] = (side_stats['win'] * 100).round(2)
     side_stats.to_csv(os.path.join(OUTPUT_FOLDER, "meta_side_win.csv"), index=False)
     print("진영별 승률 저장 완료")
@@ -78,39 +65,34 @@ def analyze_meta_stats():
     time_dist.to_csv(os.path.join(OUTPUT_FOLDER, "meta_time_dist.csv"), index=False)
     print("게임 시간 데이터 저장 완료")
 
-    print("2. 오브젝트 정밀 분석")
 
-    query_timeline = """
-    SELECT 
-        t.match_id,
-        t.type,
-        t.subtype,
-        t.teamId as killer_team_id,
-        t.timestamp,
-        MAX(CASE WHEN m.team = 'Blue' THEN m.win ELSE 0 END) as blue_win,
-        MAX(CASE WHEN m.team = 'Red' THEN m.win ELSE 0 END) as red_win
-    FROM timeline_objectives t
-    JOIN match_data m ON t.match_id = m.match_id
-    WHERE t.type = 'ELITE_MONSTER_KILL'
-    GROUP BY t.match_id, t.type, t.subtype, t.teamId, t.timestamp
-    ORDER BY t.match_id, t.timestamp ASC
-    """
+@report('10.objectives', inputs=['timeline_objectives', 'match_team'],
+        outputs=['advanced_reports/dragon_type_stats.csv', 'advanced_reports/dragon_soul_stats.csv',
+                 'advanced_reports/void_grub_stats.csv'])
+def analyze_objectives(ctx):
+    print("2. 오브젝트 정밀 분석")
 
+    # 처치 팀의 match_team 행과 바로 조인하여 승패를 가져옴
+    # (처치 팀이 100/200 이 아닌 처형/중립 처치는 승리 0 으로 분모에 포함)
     try:
-        df_objs = pd.read_sql(query_timeline, engine)
+        objectives = ctx.table('timeline_objectives')
+        df_objs = objectives.loc[objectives['type'] == 'ELITE_MONSTER_KILL',
+                                 ['match_id', 'type', 'subtype', 'teamId', 'timestamp', 'event_seq']]
+        df_objs = df_objs.rename(columns={'teamId': 'killer_team_id'}).merge(
+            ctx.table('match_team')[['match_id', 'team_id', 'win']].rename(
+                columns={'team_id': 'killer_team_id', 'win': 'is_killer_winner'}),
+            on=['match_id', 'killer_team_id'], how='left')
+        df_objs['is_killer_winner'] = df_objs['is_killer_winner'].fillna(0).astype(int)
+        df_objs = df_objs.sort_values(['match_id', 'timestamp', 'event_seq'])
 
         if df_objs.empty:
             print("상세 오브젝트 데이터가 없습니다.")
         else:
-            df_objs['is_killer_winner'] = df_objs.apply(lambda x:
-                                                        1 if (x['killer_team_id'] == 100 and x['blue_win'] == 1) or
-                                                             (x['killer_team_id'] == 200 and x['red_win'] == 1) else 0,
-                                                        axis=1)
 
             # --- 2-1. 드래곤 종류별 승률 ---
             dragons = df_objs[df_objs['subtype'].str.contains('DRAGON', na=False)].copy()
             if not dragons.empty:
-                type_stats = dragons.groupby('subtype').agg(
+                type_stats = dragons.groupby('subtype', observed=True).agg(
                     kill_count=('match_id', 'count'), win_count=('is_killer_winner', 'sum')
                 ).reset_index()
                 type_stats['win_rate'] = (type_stats['win_count'] / type_stats['kill_count'] * 100).round(2)
@@ -126,11 +108,11 @@ def analyze_meta_stats():
                 print("드래곤 종류별 승률 저장 완료")
 
                 elemental = dragons[~dragons['subtype'].str.contains("ELDER")].copy()
-                elemental['rank'] = elemental.groupby(['match_id', 'killer_team_id']).cumcount() + 1
+                elemental['rank'] = elemental.groupby(['match_id', 'killer_team_id'], observed=True).cumcount() + 1
                 souls = elemental[elemental['rank'] == 4]
 
                 if not souls.empty:
-                    soul_stats = souls.groupby('subtype').agg(
+                    soul_stats = souls.groupby('subtype', observed=True).agg(
                         count=('match_id', 'count'), win=('is_killer_winner', 'sum')
                     ).reset_index()
                     soul_stats['win_rate'] = (soul_stats['win'] / soul_stats['count'] * 100).round(2)
@@ -142,7 +124,7 @@ def analyze_meta_stats():
             # --- 2-2. 공허 유충 & 바론 상세 ---
             grubs = df_objs[df_objs['subtype'].str.contains('HORDE|ATAKHAN|GRUB', case=False, na=False)].copy()
             if not grubs.empty:
-                grub_counts = grubs.groupby(['match_id', 'killer_team_id']).agg(
+                grub_counts = grubs.groupby(['match_id', 'killer_team_id'], observed=True).agg(
                     count=('subtype', 'count'), win=('is_killer_winner', 'max')
                 ).reset_index()
                 grub_stats = grub_counts.groupby('count').agg(
@@ -155,20 +137,18 @@ def analyze_meta_stats():
     except Exception as e:
         print(f"오브젝트 분석 오류: {e}")
 
+
+@report('10.plate_impact', inputs=['timeline_objectives', 'match_team'],
+        outputs=['advanced_reports/meta_plate_impact.csv'])
+def analyze_plate_impact(ctx):
     print("3. 포탑 방패 분석")
 
-    query_plates = """
-    SELECT 
-        m.match_id,
-        m.gameDuration,
-        COUNT(t.match_id) as total_plates
-    FROM match_data m
-    JOIN timeline_objectives t ON m.match_id = t.match_id
-    WHERE t.type = 'TURRET_PLATE_DESTROYED'
-    GROUP BY m.match_id, m.gameDuration
-    """
     try:
-        df_plates = pd.read_sql(query_plates, engine)
+        objectives = ctx.table('timeline_objectives')
+        df_plates = objectives[objectives['type'] == 'TURRET_PLATE_DESTROYED'].groupby(
+            'match_id', observed=True).size().rename('total_plates').reset_index()
+        df_plates = df_plates.merge(played_matches(ctx)[['match_id', 'gameDuration']].drop_duplicates('match_id'),
+                                    on='match_id')
         if not df_plates.empty:
             df_plates['duration_min'] = df_plates['gameDuration'] / 60
             plate_impact = df_plates.groupby('total_plates')['duration_min'].mean().reset_index()
@@ -180,8 +160,6 @@ def analyze_meta_stats():
     except Exception as e:
         print(f"포탑 방패 분석 오류: {e}")
 
-    print("\n모든 메타 데이터 분석 완료")
-
 
 if __name__ == "__main__":
-    analyze_meta_stats()
\ No newline at end of file
+    run_module(__name__)
\ No newline at end of file
@@ -1,73 +1,55 @@
 import pandas as pd
-from sqlalchemy import create_engine
-import json
+import numpy as np
 import os
-import requests
+import sys
 from collections import Counter
 
 # =======================================================
 # 설정
 # =======================================================
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-CONFIG_FILE = os.path.join(BASE_DIR, 'default_info', 'db_config.txt')
 OUTPUT_FOLDER = os.path.join(BASE_DIR, 'advanced_reports')
 
+sys.path.append(os.path.dirname(BASE_DIR))
+from common.reports import report, run_module
+from common.dims import flagged_ids, attach_names, name_of
+from common.schema import CORE_ITEM_SLOTS
+from common.timeline_summary import WARD_COLUMNS
+from common.purchases import PURCHASES_TABLE, EVENT_ORDER
+from common.sequences import Sequences, sequence_labels, PARTICIPANT_KEYS, MASTERY_SLOTS
+from common.significance import add_confidence
+from common.build_trie import BuildTrie, TRIE_DEPTH
+
 if not os.path.exists(OUTPUT_FOLDER):
     os.makedirs(OUTPUT_FOLDER)
 
-with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-    config = json.load(f)
-DB_URL = f"mysql+pymysql://{config['user']}:{config['password']}@{config['host']}/{config['db_name']}?charset=utf8mb4"
-engine = create_engine(DB_URL)
-
-print("아이템 정보(DataDragon) 다운로드 중")
-try:
-    ver_url = "https://ddragon.leagueoflegends.com/api/versions.json"
-    latest_ver = requests.get(ver_url).json()[0]
-    item_url = f"https://ddragon.leagueoflegends.com/cdn/{latest_ver}/data/ko_KR/item.json"
-    item_data = requests.get(item_url).json()['data']
-    ITEM_MAP = {int(k): v['name'] for k, v in item_data.items()}
-    print("아이템 데이터 준비 완료")
-except:
-    print("아이템 정보 가져오기 실패.")
-    ITEM_MAP = {}
-    item_data = {}
 
+def purchases(ctx):
+    # ITEM_UNDO 로 취소된 구매를 뺀 실제 구매 (07 과 같은 item_purchases)
+    return ctx.table(PURCHASES_TABLE)
 
-def get_item_name(item_id):
-    return ITEM_MAP.get(item_id, str(item_id))
 
-
-EXCLUDE_ITEMS_BUILD = [
-    1001, 3005, 3006, 3009, 3020, 3047, 3111, 3117, 3158,
-    3340, 3363, 3364,
-    2003, 2010, 2031, 2033, 2055, 2140, 2139
-]
+def labeled_sequences(ctx, seq, **labels):
+    # 참가자 키 + 라벨 컬럼에 참가자 속성을 붙임
+    df = seq.keys.assign(**{name: label.to_numpy() for name, label in labels.items()})
+    return ctx.with_participants(df, ['position', 'champion_id', 'win'])
 
 
 # =======================================================
 # 1. 시작 아이템
 # =======================================================
-def analyze_starters():
+@report('11.starters', inputs=[PURCHASES_TABLE, 'match_data', 'dim_champion', 'dim_item'],
+        outputs=['advanced_reports/real_starters.csv'])
+def analyze_starters(ctx):
     print("📊 1. 시작 아이템 분석")
-    query = """
-    SELECT 
-        m.position, m.champion, m.match_id, m.win,
-        GROUP_CONCAT(t.itemId ORDER BY t.timestamp SEPARATOR ',') as raw_items
-    FROM timeline_items t
-    JOIN match_data m ON t.match_id = m.match_id AND t.participantId = m.participant_id
-    WHERE t.timestamp < 120000 
-      AND t.itemId NOT IN (3340, 3363, 3364)
-      AND t.type = 'ITEM_PURCHASED'
-    GROUP BY m.match_id, m.participant_id, m.position, m.champion, m.win
-    """
-    df = pd.read_sql(query, engine)
-
-    def get_simple_starter(item_str):
-        if not item_str: return None
-        items = [int(x) for x in item_str.split(',')]
-        starter_items = items[:2]
-        names = [get_item_name(i) for i in starter_items]
+    item_map = ctx.dim_maps['item']
+    df = purchases(ctx)
+    df = df[(df['timestamp'] < 120000) & ~df['itemId'].isin(flagged_ids(ctx.item_flags, 'is_trinket'))]
+    seq = Sequences(df, 'itemId')
+
+    def get_simple_starter(items):
+        # 앞 2개 (0 = 빈 칸), 같은 아이템은 "2 이름"
+        names = [item_map.get(i, str(i)) for i in items if i != 0]
         counts = Counter(names)
         parts = []
         for name in sorted(counts.keys()):
@@ -78,45 +60,51 @@ def analyze_starters():
                 parts.append(name)
         return " + ".join(parts)
 
-    df['item_set'] = df['raw_items'].apply(get_simple_starter)
-    df_agg = df.groupby(['position', 'champion', 'item_set']).agg(
+    df = labeled_sequences(ctx, seq, item_set=sequence_labels(seq.head(2), get_simple_starter))
+    df_agg = df.groupby(['position', 'champion_id', 'item_set'], observed=True).agg(
         pick_count=('match_id', 'count'), win_count=('win', 'sum')
     ).reset_index()
     df_agg['win_rate'] = (df_agg['win_count'] / df_agg['pick_count']) * 100
 
     df_agg = df_agg[df_agg['pick_count'] >= 1]
     df_agg = df_agg.rename(columns={'item_set': 'item_name'})
+    df_agg = add_confidence(df_agg, ['position', 'champion_id'], 'pick_count', 'win_count')
+
+    df_agg = attach_names(df_agg, 'champion_id', 'champion', ctx.dim_maps['champion'])
 
     df_agg.to_csv(os.path.join(OUTPUT_FOLDER, "real_starters.csv"), index=False)
     print("저장 완료")
 
 
-# =======================================================
-# 2. 서포터 퀘스트 아이템 분석
-# =======================================================
-def analyze_support_quest():
-    print("2. 서포터 퀘스트 아이템 분석")
-    SUPPORT_QUEST_IDS = [3869, 3870, 3871, 3876, 3877]
-    query = f"""
-    SELECT m.position, m.champion, m.match_id, m.participant_id, m.win, t.itemId
-    FROM timeline_items t
-    JOIN match_data m ON t.match_id = m.match_id AND t.participantId = m.participant_id
-    WHERE t.itemId IN ({','.join(map(str, SUPPORT_QUEST_IDS))})
-      AND t.type = 'ITEM_PURCHASED'
-    ORDER BY t.timestamp
-    """
-    df = pd.read_sql(query, engine)
-    if df.empty: return
-
-    df_final = df.drop_duplicates(subset=['match_id', 'participant_id'], keep='last').copy()
-    df_final['item_name'] = df_final['itemId'].apply(get_item_name)
-
-    df_agg = df_final.groupby(['position', 'champion', 'item_name']).agg(
+def last_purchase_stats(ctx, item_ids):
+    # 후보 아이템 중 참가자별 마지막 구매 기준 집계
+    df = purchases(ctx)
+    df = df[df['itemId'].isin(item_ids)].sort_values(EVENT_ORDER)
+    df_final = df.drop_duplicates(subset=PARTICIPANT_KEYS, keep='last')
+    df_final = ctx.with_participants(df_final[PARTICIPANT_KEYS + ['itemId']], ['position', 'champion_id', 'win'])
+
+    df_agg = df_final.groupby(['position', 'champion_id', 'itemId'], observed=True).agg(
         pick_count=('match_id', 'count'), win_count=('win', 'sum')
     ).reset_index()
     df_agg['win_rate'] = (df_agg['win_count'] / df_agg['pick_count']) * 100
 
     df_agg = df_agg[df_agg['pick_count'] >= 1]
+    df_agg = add_confidence(df_agg, ['position', 'champion_id'], 'pick_count', 'win_count')
+    df_agg = attach_names(df_agg, 'champion_id', 'champion', ctx.dim_maps['champion'])
+    df_agg = attach_names(df_agg, 'itemId', 'item_name', ctx.dim_maps['item'])
+    return df_agg
+
+
+# =======================================================
+# 2. 서포터 퀘스트 아이템 분석
+# =======================================================
+@report('11.support_quest', inputs=[PURCHASES_TABLE, 'match_data', 'dim_champion', 'dim_item'],
+        outputs=['advanced_reports/real_support_quest.csv'])
+def analyze_support_quest(ctx):
+    print("2. 서포터 퀘스트 아이템 분석")
+    SUPPORT_QUEST_IDS = [3869, 3870, 3871, 3876, 3877]
+    df_agg = last_purchase_stats(ctx, SUPPORT_QUEST_IDS)
+    if df_agg.empty: return
 
     df_agg.to_csv(os.path.join(OUTPUT_FOLDER, "real_support_quest.csv"), index=False)
     print("   💾 저장 완료")
@@ -125,56 +113,42 @@ def analyze_support_quest():
 # =======================================================
 # 3. 스킬 트리
 # =======================================================
-def analyze_skills():
+@report('11.skills', inputs=['timeline_skills', 'match_data', 'dim_champion'],
+        outputs=['advanced_reports/real_skills.csv'])
+def analyze_skills(ctx):
     print("3. 스킬 트리 분석")
-    query = """
-    SELECT m.position, m.champion, m.match_id, m.win, 
-    GROUP_CONCAT(t.skillSlot ORDER BY t.timestamp SEPARATOR ',') as skill_order
-    FROM timeline_skills t
-    JOIN match_data m ON t.match_id = m.match_id AND t.participantId = m.participant_id
-    WHERE t.skillSlot IN (1, 2, 3, 4)
-    GROUP BY m.position, m.champion, m.match_id, m.win
-    """
-    df_raw = pd.read_sql(query, engine)
-    slot_map = {'1': 'Q', '2': 'W', '3': 'E', '4': 'R'}
-
-    def get_master_order(order_str):
-        if not order_str: return None
-        slots = order_str.split(',')
-        counts = {'Q': 0, 'W': 0, 'E': 0, 'R': 0}
-        mastered = []
-        for s in slots:
-            key = slot_map.get(s, s)
-            if key in counts:
-                counts[key] += 1
-                if key in ['Q', 'W', 'E'] and counts[key] == 5 and key not in mastered:
-                    mastered.append(key)
-        if len(mastered) < 3:
-            remain = sorted(['Q', 'W', 'E'], key=lambda x: counts.get(x, 0), reverse=True)
-            for r in remain:
-                if r not in mastered: mastered.append(r)
-        return " > ".join(mastered)
-
-    def format_skills(order_str):
-        if not order_str: return None
-        slots = order_str.split(',')[:18]
-        return ','.join([slot_map.get(s, s) for s in slots])
-
-    def get_merge_key(skill_path_str):
-        if not skill_path_str: return ""
-        return ",".join(skill_path_str.split(',')[:15])
-
-    df_raw['skill_path'] = df_raw['skill_order'].apply(format_skills)
-    df_raw['master_order'] = df_raw['skill_order'].apply(get_master_order)
-    df_raw['merge_key'] = df_raw['skill_path'].apply(get_merge_key)
-
-    df_agg = df_raw.groupby(['position', 'champion', 'master_order', 'merge_key']).agg(
-        pick_count=('match_id', 'count'), win_count=('win', 'sum'),
-        skill_path=('skill_path', lambda x: max(x, key=len))
-    ).reset_index()
+    skills = ctx.table('timeline_skills')
+    skills = skills[skills['skillSlot'].isin([1, 2, 3, 4])]
+    seq = Sequences(skills, 'skillSlot')
+    slot_map = {1: 'Q', 2: 'W', 3: 'E', 4: 'R'}
+
+    def format_skills(slots):
+        return ','.join([slot_map[s] for s in slots if s != 0])
+
+    def format_master_order(order):
+        # order: MASTERY_SLOTS 안의 인덱스 (0=Q, 1=W, 2=E)
+        return " > ".join(slot_map[MASTERY_SLOTS[i]] for i in order)
+
+    # 스킬 트리는 앞 18레벨, 같은 빌드로 묶는 키는 앞 15레벨
+    df_raw = labeled_sequences(
+        ctx, seq,
+        skill_path=sequence_labels(seq.head(18), format_skills),
+        master_order=sequence_labels(seq.mastery_order(), format_master_order),
+        merge_key=sequence_labels(seq.head(15), format_skills),
+        path_len=pd.Series(np.minimum(seq.lengths, 18)),
+    )
+
+    # 같은 키 안에서 가장 긴 스킬 트리를 대표로 (길이가 같으면 먼저 나온 것)
+    group_keys = ['position', 'champion_id', 'master_order', 'merge_key']
+    grouped = df_raw.groupby(group_keys, observed=True)
+    df_agg = grouped.agg(pick_count=('match_id', 'count'), win_count=('win', 'sum')).reset_index()
+    df_agg['skill_path'] = df_raw.loc[grouped['path_len'].idxmax(), 'skill_path'].to_numpy()
     df_agg['win_rate'] = (df_agg['win_count'] / df_agg['pick_count']) * 100
 
     df_agg = df_agg[df_agg['pick_count'] >= 1]
+    df_agg = add_confidence(df_agg, ['position', 'champion_id'], 'pick_count', 'win_count')
+
+    df_agg = attach_names(df_agg, 'champion_id', 'champion', ctx.dim_maps['champion'])
 
     df_agg.to_csv(os.path.join(OUTPUT_FOLDER, "real_skills.csv"), index=False)
     print("저장 완료")
@@ -183,46 +157,30 @@ def analyze_skills():
 # =======================================================
 # 4. 3코어 빌드
 # =======================================================
-def analyze_builds():
+@report('11.builds', inputs=[PURCHASES_TABLE, 'match_data', 'dim_champion', 'dim_item'],
+        outputs=['advanced_reports/real_builds.csv'])
+def analyze_builds(ctx):
     print("4. 3코어 빌드 분석")
-    query = """
-    SELECT m.position, m.champion, m.match_id, m.win,
-    GROUP_CONCAT(t.itemId ORDER BY t.timestamp SEPARATOR ',') as full_items
-    FROM timeline_items t
-    JOIN match_data m ON t.match_id = m.match_id AND t.participantId = m.participant_id
-    WHERE t.type = 'ITEM_PURCHASED'
-    GROUP BY m.match_id, m.participant_id, m.position, m.champion, m.win
-    """
-    df = pd.read_sql(query, engine)
-
-    def is_completed_item(item_id):
-        sid = str(item_id)
-        if sid not in item_data: return False
-        info = item_data[sid]
-        depth = info.get('depth', 1)
-        gold = info.get('gold', {}).get('total', 0)
-        if item_id in EXCLUDE_ITEMS_BUILD: return False
-        if depth >= 3 or gold >= 2200: return True
-        return False
-
-    def parse_build_str(item_str):
-        if not item_str: return None
-        items = [int(x) for x in item_str.split(',')]
-        core = []
-        for item in items:
-            if is_completed_item(item):
-                core.append(get_item_name(item))
-                if len(core) == 3: break
-        if len(core) < 3: return None
-        return " > ".join(core)
-
-    df['build_path'] = df['full_items'].apply(parse_build_str)
-    df_agg = df.groupby(['position', 'champion', 'build_path']).agg(
+    core_ids = flagged_ids(ctx.item_flags, 'is_core')
+    item_map = ctx.dim_maps['item']
+    df = purchases(ctx)
+    seq = Sequences(df[df['itemId'].isin(core_ids)], 'itemId')
+
+    def parse_build(items):
+        return " > ".join(item_map.get(item, str(item)) for item in items)
+
+    # 구매 순서대로 첫 코어 아이템 3개 (3개 미만인 참가자는 제외)
+    complete = seq.lengths >= 3
+    df = labeled_sequences(ctx, seq, build_path=sequence_labels(seq.head(3), parse_build).where(complete))
+    df_agg = df.groupby(['position', 'champion_id', 'build_path'], observed=True).agg(
         pick_count=('match_id', 'count'), win_count=('win', 'sum')
     ).reset_index()
     df_agg['win_rate'] = (df_agg['win_count'] / df_agg['pick_count']) * 100
 
     df_agg = df_agg[df_agg['pick_count'] >= 1]
+    df_agg = add_confidence(df_agg, ['position', 'champion_id'], 'pick_count', 'win_count')
+
+    df_agg = attach_names(df_agg, 'champion_id', 'champion', ctx.dim_maps['champion'])
 
     df_agg.to_csv(os.path.join(OUTPUT_FOLDER, "real_builds.csv"), index=False)
     print("저장 완료")
@@ -231,44 +189,32 @@ def analyze_builds():
 # =======================================================
 # 5. 장신구
 # =======================================================
-def analyze_trinkets():
+@report('11.trinkets', inputs=['participant_timeline_summary', 'match_data', 'dim_champion', 'dim_item'],
+        outputs=['advanced_reports/real_trinkets.csv'])
+def analyze_trinkets(ctx):
     print("5. 장신구 전략 분석")
-    TRINKET_IDS = [3340, 3363, 3364]
-    query = f"""
-    SELECT m.position, m.champion, m.match_id, m.participant_id, m.win, t.itemId, t.timestamp
-    FROM timeline_items t
-    JOIN match_data m ON t.match_id = m.match_id AND t.participantId = m.participant_id
-    WHERE t.itemId IN ({','.join(map(str, TRINKET_IDS))})
-      AND t.type = 'ITEM_PURCHASED'
-    ORDER BY m.match_id, m.participant_id, t.timestamp
-    """
-    df = pd.read_sql(query, engine)
-
-    def get_trinket_strategy(group):
-        if group.empty: return None
-        items = group['itemId'].tolist()
-        times = group['timestamp'].tolist()
-        start, final = items[0], items[-1]
-        start_name, final_name = get_item_name(start), get_item_name(final)
-
-        if start == final:
-            strategy = f"{start_name} (유지)";
-            swap_time = 0
-        else:
-            strategy = f"{start_name} ➡ {final_name}";
-            swap_time = 0
-            for t, item in zip(times, items):
-                if item != start: swap_time = t; break
-        return pd.Series([strategy, swap_time], index=['strategy', 'swap_time'])
-
-    strategies = df.groupby(['match_id', 'participant_id', 'position', 'champion', 'win'])[
-        ['itemId', 'timestamp']].apply(get_trinket_strategy).reset_index()
-    df_agg = strategies.groupby(['position', 'champion', 'strategy']).agg(
+    item_map = ctx.dim_maps['item']
+    # 시작/최종 장신구와 교체 시각은 적재 단계의 참가자 요약 테이블에 있음
+    summary = ctx.table('participant_timeline_summary')
+    summary = summary.loc[summary['trinket_start'].notna(),
+                          ['match_id', 'participant_id', 'trinket_start', 'trinket_final', 'trinket_swap_time']]
+    strategies = ctx.with_participants(summary, ['position', 'champion_id', 'win'], on='participant_id')
+
+    start_name = name_of(strategies['trinket_start'].astype(int), item_map)
+    final_name = name_of(strategies['trinket_final'].astype(int), item_map)
+    kept = strategies['trinket_start'] == strategies['trinket_final']
+    strategies['strategy'] = np.where(kept, start_name + " (유지)", start_name + " ➡ " + final_name)
+    strategies['swap_time'] = np.where(kept, 0, strategies['trinket_swap_time'])
+
+    df_agg = strategies.groupby(['position', 'champion_id', 'strategy'], observed=True).agg(
         pick_count=('match_id', 'count'), win_count=('win', 'sum'), avg_swap_time=('swap_time', 'mean')
     ).reset_index()
     df_agg['win_rate'] = (df_agg['win_count'] / df_agg['pick_count']) * 100
 
     df_agg = df_agg[df_agg['pick_count'] >= 1]
+    df_agg = add_confidence(df_agg, ['position', 'champion_id'], 'pick_count', 'win_count')
+
+    df_agg = attach_names(df_agg, 'champion_id', 'champion', ctx.dim_maps['champion'])
 
     df_agg.to_csv(os.path.join(OUTPUT_FOLDER, "real_trinkets.csv"), index=False)
     print("저장 완료")
@@ -277,22 +223,26 @@ def analyze_trinkets():
 # =======================================================
 # 6. 아이템 상세
 # =======================================================
-def analyze_all_items():
+@report('11.items', inputs=[PURCHASES_TABLE, 'match_data', 'dim_champion', 'dim_item'],
+        outputs=['advanced_reports/real_items.csv'])
+def analyze_all_items(ctx):
     print("6. 아이템 상세 분석")
-    query = """
-    SELECT DISTINCT m.position, m.champion, m.match_id, m.participant_id, m.win, t.itemId
-    FROM timeline_items t 
-    JOIN match_data m ON t.match_id = m.match_id AND t.participantId = m.participant_id
-    WHERE t.type = 'ITEM_PURCHASED'
-    """
-    df = pd.read_sql(query, engine)
-    df['item_name'] = df['itemId'].apply(get_item_name)
-    df_agg = df.groupby(['position', 'champion', 'item_name']).agg(
+    # 참가자당 아이템별 1회 (같은 아이템 재구매는 한 번으로)
+    df = purchases(ctx).drop_duplicates(subset=PARTICIPANT_KEYS + ['itemId'])
+    df = ctx.with_participants(df[PARTICIPANT_KEYS + ['itemId']], ['position', 'champion_id', 'win'])
+    df_agg = df.groupby(['position', 'champion_id', 'itemId'], observed=True).agg(
         pick_count=('match_id', 'count'), win_count=('win', 'sum')
     ).reset_index()
     df_agg['win_rate'] = (df_agg['win_count'] / df_agg['pick_count']) * 100
 
     df_agg = df_agg[df_agg['pick_count'] >= 1]
+    # 대시보드의 코어/신발 필터용 분류 플래그
+    df_agg = df_agg.join(ctx.item_flags[['is_core', 'is_boot']], on='itemId')
+    df_agg[['is_core', 'is_boot']] = df_agg[['is_core', 'is_boot']].fillna(0).astype(int)
+    # 대시보드는 코어 아이템끼리만 비교하므로 순위/검정도 코어 여부로 나눠서
+    df_agg = add_confidence(df_agg, ['position', 'champion_id', 'is_core'], 'pick_count', 'win_count')
+    df_agg = attach_names(df_agg, 'champion_id', 'champion', ctx.dim_maps['champion'])
+    df_agg = attach_names(df_agg, 'itemId', 'item_name', ctx.dim_maps['item'])
 
     df_agg.to_csv(os.path.join(OUTPUT_FOLDER, "real_items.csv"), index=False)
     print("저장 완료")
@@ -301,31 +251,12 @@ def analyze_all_items():
 # =======================================================
 # 7. 신발
 # =======================================================
-def analyze_shoes():
+@report('11.shoes', inputs=[PURCHASES_TABLE, 'match_data', 'dim_champion', 'dim_item'],
+        outputs=['advanced_reports/real_shoes.csv'])
+def analyze_shoes(ctx):
     print("7. 신발 분석")
-    boot_ids = []
-    for itemId, data in item_data.items():
-        if 'tags' in data and 'Boots' in data['tags']: boot_ids.append(int(itemId))
-    manual_boots = [1001, 2422, 3006, 3009, 3020, 3047, 3111, 3117, 3158]
-    boot_ids = list(set(boot_ids + manual_boots))
-
-    query = f"""
-    SELECT m.position, m.champion, m.match_id, m.participant_id, m.win, t.itemId
-    FROM timeline_items t JOIN match_data m ON t.match_id = m.match_id AND t.participantId = m.participant_id
-    WHERE t.itemId IN ({','.join(map(str, boot_ids))}) 
-      AND t.type = 'ITEM_PURCHASED'
-    ORDER BY t.timestamp
-    """
-    df = pd.read_sql(query, engine)
-    if df.empty: return
-    df_final = df.drop_duplicates(subset=['match_id', 'participant_id'], keep='last').copy()
-    df_final['item_name'] = df_final['itemId'].apply(get_item_name)
-    df_agg = df_final.groupby(['position', 'champion', 'item_name']).agg(
-        pick_count=('match_id', 'count'), win_count=('win', 'sum')
-    ).reset_index()
-    df_agg['win_rate'] = (df_agg['win_count'] / df_agg['pick_count']) * 100
-
-    df_agg = df_agg[df_agg['pick_count'] >= 1]
+    df_agg = last_purchase_stats(ctx, flagged_ids(ctx.item_flags, 'is_boot'))
+    if df_agg.empty: return
 
     df_agg.to_csv(os.path.join(OUTPUT_FOLDER, "real_shoes.csv"), index=False)
     print("저장 완료")
@@ -334,43 +265,41 @@ def analyze_shoes():
 # =======================================================
 # 8. 시야 장악 흐름
 # =======================================================
-def analyze_vision_timeline():
+@report('11.vision', inputs=['participant_timeline_summary', 'match_data', 'dim_champion'],
+        outputs=['advanced_reports/timeline_vision.csv'])
+def analyze_vision_timeline(ctx):
     print("8. 시간대별 시야 장악 흐름 분석")
 
-    query_wards = """
-    SELECT 
-        m.position,
-        m.champion,
-        FLOOR(w.timestamp / 300000) * 5 as time_min,
-        w.type, 
-        COUNT(*) as total_action_count,
-        COUNT(DISTINCT m.match_id) as games 
-    FROM timeline_wards w
-    JOIN match_data m 
-        ON w.match_id = m.match_id 
-        AND (
-            (w.creatorId = m.participant_id AND w.type='WARD_PLACED') OR 
-            (w.killerId = m.participant_id AND w.type='WARD_KILL')
-        )
-    WHERE w.timestamp <= 2400000
-    GROUP BY m.position, m.champion, time_min, w.type
-    """
+    # 참가자별 5분 구간 와드 설치/제거 수 (적재 단계 요약), 행동이 있었던 게임 기준 평균
     try:
-        df = pd.read_sql(query_wards, engine)
+        df = ctx.table('participant_timeline_summary')[['match_id', 'participant_id'] + WARD_COLUMNS]
+        df = ctx.with_participants(df, ['position', 'champion_id'], on='participant_id')
+        df = df.melt(id_vars=['position', 'champion_id'], value_vars=WARD_COLUMNS, value_name='action_count')
+        df = df[df['action_count'] > 0]
         if df.empty:
             print("와드 데이터 없음")
+        parts = df['variable'].str.split('_', expand=True)
+        df['type'] = parts[1].map({'placed': 'WARD_PLACED', 'killed': 'WARD_KILL'})
+        df['time_min'] = parts[2].astype(int)
+
+        df = df.groupby(['position', 'champion_id', 'time_min', 'type'], observed=True).agg(
+            total_action_count=('action_count', 'sum'), games=('action_count', 'count')
+        ).reset_index()
         df['avg_count'] = df['total_action_count'] / df['games']
         pivot = df.pivot_table(
-            index=['position', 'champion', 'time_min'],
+            index=['position', 'champion_id', 'time_min'],
             columns='type',
             values='avg_count',
-            fill_value=0
+            fill_value=0,
+            observed=True
         ).reset_index()
 
         if 'WARD_PLACED' not in pivot.columns: pivot['WARD_PLACED'] = 0
         if 'WARD_KILL' not in pivot.columns: pivot['WARD_KILL'] = 0
 
         pivot.rename(columns={'WARD_PLACED': 'placed', 'WARD_KILL': 'killed'}, inplace=True)
+        pivot.columns.name = None
+        pivot = attach_names(pivot, 'champion_id', 'champion', ctx.dim_maps['champion'])
 
         pivot.to_csv(os.path.join(OUTPUT_FOLDER, "timeline_vision.csv"), index=False)
         print("저장 완료")
@@ -382,45 +311,35 @@ def analyze_vision_timeline():
 # =======================================================
 # 9. 코어 아이템 완성 타이밍
 # =======================================================
-def analyze_item_spikes():
+@report('11.item_spikes', inputs=['participant_timeline_summary', 'match_data', 'dim_champion', 'dim_item'],
+        outputs=['advanced_reports/timeline_item_spikes.csv'])
+def analyze_item_spikes(ctx):
     print("9. 코어 아이템 단계별 완성 시간 분석")
-    query = """
-    SELECT 
-        m.match_id,
-        m.participant_id, 
-        m.champion,
-        m.win,
-        t.itemId,
-        t.timestamp
-    FROM timeline_items t
-    JOIN match_data m ON t.match_id = m.match_id AND t.participantId = m.participant_id
-    WHERE t.type = 'ITEM_PURCHASED' 
-      AND t.timestamp > 180000 -- 3분 이후
-      AND t.itemId NOT IN (3340, 3363, 3364) -- 장신구 제외
-    ORDER BY m.match_id, m.participant_id, t.timestamp
-    """
+    # 3분 이후 첫 코어 아이템(dim_item.is_core) 3개의 구매 시각 (적재 단계 요약)
+    core_cols = [f'core{n}_{kind}' for n in range(1, CORE_ITEM_SLOTS + 1) for kind in ('item', 'time')]
     try:
-        df = pd.read_sql(query, engine)
+        df = ctx.table('participant_timeline_summary')
+        df = df.loc[df['core1_item'].notna(), ['match_id', 'participant_id'] + core_cols]
+        df = ctx.with_participants(df, ['champion_id', 'win'], on='participant_id')
         if df.empty: return
-        def is_core(item_id):
-            sid = str(item_id)
-            if sid in item_data:
-                return item_data[sid].get('gold', {}).get('total', 0) >= 2200
-            return False
 
-        df_core = df[df['itemId'].apply(is_core)].copy()
+        ranks = []
+        for n in range(1, CORE_ITEM_SLOTS + 1):
+            rank = df[['match_id', 'participant_id', 'champion_id', 'win', f'core{n}_item', f'core{n}_time']].set_axis(
+                ['match_id', 'participant_id', 'champion_id', 'win', 'itemId', 'timestamp'], axis=1)
+            ranks.append(rank.assign(core_rank=n))
+        df_core = pd.concat(ranks, ignore_index=True).dropna(subset=['itemId'])
+        df_core = df_core.astype({'itemId': int}).sort_values(['match_id', 'participant_id', 'core_rank'])
 
         if df_core.empty:
             print("코어 아이템 데이터가 없습니다.")
             return
-        df_core['core_rank'] = df_core.groupby(['match_id', 'participant_id']).cumcount() + 1
-        df_core = df_core[df_core['core_rank'] <= 3].copy()
-        df_core['prev_time'] = df_core.groupby(['match_id', 'participant_id'])['timestamp'].shift(1)
+        df_core['prev_time'] = df_core.groupby(['match_id', 'participant_id'], observed=True)['timestamp'].shift(1)
         df_core['delta_time'] = df_core['timestamp'] - df_core['prev_time'].fillna(0)
         df_core['delta_min'] = df_core['delta_time'] / 60000
-        df_core['item_name'] = df_core['itemId'].apply(get_item_name)
+        df_core['item_name'] = name_of(df_core['itemId'], ctx.dim_maps['item'])
 
-        result = df_core.groupby(['champion', 'itemId', 'item_name', 'core_rank']).agg(
+        result = df_core.groupby(['champion_id', 'itemId', 'item_name', 'core_rank'], observed=True).agg(
             avg_min=('delta_min', 'mean'),
             win_rate=('win', 'mean'),
             count=('match_id', 'count')
@@ -428,6 +347,7 @@ def analyze_item_spikes():
 
         result['avg_min'] = result['avg_min'].round(1)
         result['win_rate'] = (result['win_rate'] * 100).round(2)
+        result = attach_names(result, 'champion_id', 'champion', ctx.dim_maps['champion'])
 
         result.sort_values(['champion', 'core_rank', 'count'], ascending=[True, True, False], inplace=True)
 
@@ -438,15 +358,29 @@ def analyze_item_spikes():
         print(f"아이템 타이밍 분석 실패: {e}")
 
 
+# =======================================================
+# 10. 코어 빌드 경로 트라이 (대시보드의 다음 코어 추천)
+# =======================================================
+@report('11.build_trie', inputs=[PURCHASES_TABLE, 'match_data', 'dim_champion', 'dim_item'],
+        outputs=['advanced_reports/build_trie.npz'])
+def analyze_build_trie(ctx):
+    print("10. 코어 빌드 경로 트라이 생성")
+    core_ids = flagged_ids(ctx.item_flags, 'is_core')
+    df = purchases(ctx)
+    seq = Sequences(df[df['itemId'].isin(core_ids)], 'itemId')
+    paths = seq.head(TRIE_DEPTH)
+
+    # 참가자 속성 조인 후에도 시퀀스 행을 찾을 수 있게 그룹 번호를 같이 넘김
+    df = labeled_sequences(ctx, seq, group=pd.Series(np.arange(len(seq))))
+    group = df['group'].to_numpy()
+    trie = BuildTrie.build(
+        df['position'].astype(str).to_numpy(),
+        name_of(df['champion_id'], ctx.dim_maps['champion']).astype(str).to_numpy(),
+        paths[group], seq.lengths[group], df['win'].to_numpy(), ctx.dim_maps['item'],
+    )
+    trie.save(os.path.join(OUTPUT_FOLDER, "build_trie.npz"))
+    print(f"저장 완료 (노드 {len(trie):,}개)")
+
+
 if __name__ == "__main__":
-    analyze_starters()
-    analyze_skills()
-    analyze_builds()
-    analyze_trinkets()
-    analyze_all_items()
-    analyze_shoes()
-    analyze_support_quest()
-    analyze_vision_timeline()
-    analyze_item_spikes()
-
-    print("\n모든 분석 완료")
\ No newline at end of file
+    run_module(__name__)
@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+import argparse
+import importlib
+
+# =======================================================
+# 06~11 리포트 일괄 실행 (DAG)
+# 하나의 AnalysisContext 를 공유하므로 테이블마다 한 번만 읽고,
+# 서로 독립인 리포트는 프로세스 풀에서 동시에 실행합니다.
+#
+#   python run_reports.py                      # 전체 갱신
+#   python run_reports.py --only 08 11.builds  # 스크립트 번호 / 리포트 이름 (glob 가능)
+#   python run_reports.py --since item_purchases  # 해당 테이블(또는 리포트)에 의존하는 리포트만
+#   python run_reports.py --list               # 리포트 목록과 입력/출력
+# =======================================================
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+sys.path.append(os.path.dirname(BASE_DIR))
+from common.context import AnalysisContext
+from common.reports import REPORTS, build_dag, select_reports, execution_order, preload, run_reports
+
+REPORT_SCRIPTS = [
+    '06_tier_by_position',
+    '07_item_details',
+    '08_advanced',
+    '09_champion_macro',
+    '10_meta_analyze',
+    '11_timeline_analyze',
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="분석 리포트 DAG 실행기")
+    parser.add_argument('--only', nargs='+', help="실행할 리포트 (예: 08, 11.builds, '08.*')")
+    parser.add_argument('--since', nargs='+', help="이 테이블/리포트 이후(의존하는) 리포트만 실행")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help="동시 실행 프로세스 수")
+    parser.add_argument('--list', action='store_true', help="선택된 리포트와 입력/출력만 출력")
+    return parser.parse_args()
+
+
+def run_all():
+    args = parse_args()
+    for script in REPORT_SCRIPTS:
+        importlib.import_module(script)
+
+    names = select_reports(REPORTS, only=args.only, since=args.since)
+    if not names:
+        print("선택된 리포트가 없습니다.")
+        return
+
+    if args.list:
+        dag = build_dag(REPORTS)
+        for name in execution_order(dag, names):
+            r = REPORTS[name]
+            after = f" (after: {', '.join(sorted(dag[name]))})" if dag[name] else ""
+            print(f"{name}{after}\n  in : {', '.join(r.inputs)}\n  out: {', '.join(r.outputs)}")
+        return
+
+    start_time = time.time()
+    ctx = AnalysisContext()
+    tables = preload(ctx, REPORTS, names)
+    print(f"데이터 로드 완료: {', '.join(tables)} ({time.time() - start_time:.1f}초)")
+
+    jobs = max(1, min(args.jobs, len(names)))
+    print(f"리포트 {len(names)}개 실행 (프로세스 {jobs}개)\n")
+    failed = run_reports(ctx, names, BASE_DIR, jobs=jobs)
+
+    print(f"\n전체 리포트 완료 (소요 시간: {time.time() - start_time:.1f}초)")
+    if failed:
+        print(f"실패: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_all()
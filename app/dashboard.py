@@ -2,8 +2,10 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import os
-import requests
-from scipy.stats import chi2_contingency
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.build_trie import BuildTrie, TRIE_DEPTH
 
 # =======================================================
 # 설정 & 세션 상태 초기화
@@ -84,38 +86,22 @@ TIER_FOLDER = 'reports/tier_reports'
 ITEM_FOLDER = 'reports/item_reports'
 ADVANCED_FOLDER = 'reports/advanced_reports'
 
-BOOTS_LIST = [
-    '장화', '약간 신비한 신발', '광전사의 군화', '마법사의 신발', '명석함의 아이오니아 장화',
-    '신속의 장화', '판금 장화', '헤르메스의 발걸음', '공생형 밑창', '영혼의 발걸음',
-    '영원한 전진', '건메탈 군화', '주문투척자의 신발', '핏빛 명석함', '신속행진', '무장 진격', '사슬끈 분쇄자'
-]
-
 
 # =======================================================
 # 통계 검정 로직
 # =======================================================
-def check_significance(df, name_col='item_name', count_col='pick_count', alpha=0.05):
-    valid_df = df[df[count_col] >= 10].copy()
-    if len(valid_df) < 2: return None
-
-    valid_df = valid_df.sort_values(by='win_rate', ascending=False)
-    best = valid_df.iloc[0]
-    second = valid_df.iloc[1]
-
-    best_cnt = best[count_col]
-    best_win = int(best_cnt * (best['win_rate'] / 100))
-    best_lose = best_cnt - best_win
-
-    sec_cnt = second[count_col]
-    sec_win = int(sec_cnt * (second['win_rate'] / 100))
-    sec_lose = sec_cnt - sec_win
-
-    obs = [[best_win, best_lose], [sec_win, sec_lose]]
-    try:
-        chi2, p_value, dof, expected = chi2_contingency(obs)
-    except:
-        return None
-
+def check_significance(df, name_col='item_name', alpha=0.05):
+    # 분석 단계에서 정확한 승/판 수로 미리 계산한 순위(win_rank)와 p-value(p_vs_best)만 읽음
+    if 'win_rank' not in df.columns or 'p_vs_best' not in df.columns: return None
+    ranked = df[df['win_rank'].notna()].sort_values(by='win_rank')
+    if len(ranked) < 2: return None
+
+    best = ranked.iloc[0]
+    second = ranked.iloc[1]
+    # 표시 중인 최고 행이 그룹 1위가 아니면(필터로 빠짐) 저장된 p-value 로 비교할 수 없음
+    if best['win_rank'] != 1 or pd.isna(second['p_vs_best']): return None
+
+    p_value = second['p_vs_best']
     return {
         "best_name": best[name_col],
         "sec_name": second[name_col],
@@ -203,6 +189,13 @@ def load_real_stats(position, champion):
     return results
 
 
+@st.cache_resource
+def load_build_trie():
+    path = os.path.join(ADVANCED_FOLDER, "build_trie.npz")
+    if os.path.exists(path): return BuildTrie.load(path)
+    return None
+
+
 @st.cache_data
 def load_macro_data():
     path = os.path.join(ADVANCED_FOLDER, "champion_macro.csv")
@@ -210,24 +203,6 @@ def load_macro_data():
     return None
 
 
-@st.cache_data
-def get_completed_item_names():
-    try:
-        ver_url = "https://ddragon.leagueoflegends.com/api/versions.json"
-        latest_ver = requests.get(ver_url).json()[0]
-        item_url = f"https://ddragon.leagueoflegends.com/cdn/{latest_ver}/data/ko_KR/item.json"
-        data = requests.get(item_url).json()['data']
-        completed = set()
-        for k, v in data.items():
-            depth = v.get('depth', 1)
-            gold = v.get('gold', {}).get('total', 0)
-            if depth >= 3 or gold >= 2200:
-                completed.add(v['name'])
-        return completed
-    except:
-        return set()
-
-
 # =======================================================
 # 스타일링 함수
 # =======================================================
@@ -470,7 +445,7 @@ elif selected_menu == "챔피언 통합 분석":
 
                 stats_df = rune_data.copy()
                 stats_df['name_display'] = stats_df['rune_main'] + " + " + stats_df['rune_sub']
-                res = check_significance(stats_df, name_col='name_display', count_col='total_games')
+                res = check_significance(stats_df, name_col='name_display')
                 display_stat_insight(res, context="룬 세팅")
             else:
                 st.info("데이터 없음")
@@ -492,7 +467,7 @@ elif selected_menu == "챔피언 통합 분석":
 
                 stats_df = spell_data.copy()
                 stats_df['name_display'] = stats_df['spell1'] + " + " + stats_df['spell2']
-                res = check_significance(stats_df, name_col='name_display', count_col='total_games')
+                res = check_significance(stats_df, name_col='name_display')
                 display_stat_insight(res, context="스펠 조합")
             else:
                 st.info("데이터 없음")
@@ -567,6 +542,32 @@ elif selected_menu == "챔피언 통합 분석":
         else:
             st.warning("데이터 부족")
 
+        st.markdown("###### 다음 코어 추천")
+        trie = load_build_trie()
+        if trie is not None and trie.find(db_pos, target_champ) >= 0:
+            # 앞 코어를 고를 때마다 트라이에서 한 단계씩 내려가며 다음 선택지를 조회
+            path = []
+            for i, col in enumerate(st.columns(TRIE_DEPTH - 1)):
+                options = trie.next_items(db_pos, target_champ, path)
+                if options.empty: break
+                choice = col.selectbox(f"{i + 1}코어", ["선택 안 함"] + options['item_name'].tolist(),
+                                       key=f"build_trie_{i}")
+                if choice == "선택 안 함": break
+                path.append(int(options.loc[options['item_name'] == choice, 'item_id'].iloc[0]))
+
+            n_df = trie.next_items(db_pos, target_champ, path).head(5)
+            if not n_df.empty:
+                n_df_show = n_df[['item_name', 'win_rate', 'pick_rate', 'picks']].rename(
+                    columns={'item_name': f"{len(path) + 1}코어", 'win_rate': '승률 (%)', 'pick_rate': '선택률 (%)',
+                             'picks': '게임 수'})
+                styler = n_df_show.style.apply(highlight_win_row, axis=1).format(
+                    "{:.1f}", subset=['승률 (%)', '선택률 (%)']).hide(axis='index')
+                display_html_table(n_df_show, styler)
+            else:
+                st.info("이 경로 다음의 코어 데이터가 부족합니다.")
+        else:
+            st.info("데이터 없음")
+
     # --- Tab 2: 아이템 상세 ---
     elif current_sub_tab == "아이템 상세":
         st.subheader("아이템별 상세 분석 & 파워 스파이크")
@@ -621,9 +622,10 @@ elif selected_menu == "챔피언 통합 분석":
         st.divider()
 
         if has_items:
-            show_data = real_stats['item_detail'].copy()[
-                (~real_stats['item_detail']['item_name'].isin(BOOTS_LIST)) & (
-                    real_stats['item_detail']['item_name'].isin(get_completed_item_names()))]
+            show_data = real_stats['item_detail'].copy()
+            # 코어 아이템 여부는 분석 단계의 dim_item 플래그 사용 (플래그 없는 예전 리포트는 전체 표시)
+            if 'is_core' in show_data.columns:
+                show_data = show_data[show_data['is_core'] == 1]
 
             c1, c2 = st.columns([1, 1])
             with c1:
@@ -765,6 +767,27 @@ elif selected_menu == "챔피언 통합 분석":
         else:
             st.info("데이터 부족")
 
+        # 다른 라인 팀원 시너지 / 다른 라인 상대 (08.synergy)
+        c1, c2 = st.columns(2)
+        for col, filename, partner, title in [(c1, "champion_synergy.csv", 'partner', "#### 시너지 좋은 팀원"),
+                                              (c2, "champion_cross_counters.csv", 'enemy', "#### 까다로운 다른 라인 상대")]:
+            with col:
+                st.markdown(title)
+                path = os.path.join(ADVANCED_FOLDER, filename)
+                pair_df = pd.read_csv(path) if os.path.exists(path) else pd.DataFrame()
+                if not pair_df.empty:
+                    pair_df = pair_df[(pair_df['position'] == db_pos) & (pair_df['champion'] == target_champ)]
+                if pair_df.empty:
+                    st.info("데이터 부족")
+                    continue
+                pair_df = pair_df.sort_values(by='win_rate', ascending=(partner == 'enemy')).head(5)
+                pair_df = pair_df[[partner, f"{partner}_position", 'win_rate', 'total_games']].rename(
+                    columns={partner: '챔피언', f"{partner}_position": '포지션', 'win_rate': '내 승률 (%)',
+                             'total_games': '전적'}).reset_index(drop=True)
+                styler = pair_df.style.apply(highlight_win_row, axis=1).format("{:.1f}", subset=['내 승률 (%)']).hide(
+                    axis='index')
+                display_html_table(pair_df, styler)
+
     # --- Tab 6: 시간 & 진영 ---
     elif current_sub_tab == "시간 & 진영":
         st.subheader("시간대 및 진영 분석")
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+from common.db import read_sql, prepare_tables, commit_frames, table_exists
+from common.ddragon import patch_of
+
+# =======================================================
+# 누적 집계 저장소 (agg_champion_stats)
+# (patch, position, champion_id, dimension, value) 별 게임 수/승리 수를 더하기만 하는 형태로 보관합니다.
+# 04 단계에서 아직 반영되지 않은 매치만 델타로 계산해 더하고, 리포트는 원본 행 대신 이 집계에서 파생됩니다.
+# =======================================================
+AGG_TABLE = 'agg_champion_stats'
+FOLDED_TABLE = 'agg_folded_matches'
+AGG_KEYS = ['patch', 'position', 'champion_id', 'dimension', 'value']
+
+# 포지션/챔피언 구분이 없는 행 (밴, 매치 수)
+ALL_POSITIONS = 'ALL'
+
+GAME_TIME_BINS = [-np.inf, 1200, 1500, 1800, 2100, 2400, np.inf]
+GAME_TIME_LABELS = ['0-20분', '20-25분', '25-30분', '30-35분', '35-40분', '40분+']
+ITEM_SLOTS = [f'item{i}' for i in range(6)]
+BUILD_SIZE = 3
+
+
+def core_build_values(items, core_ids):
+    # 인벤토리 슬롯 순서대로 첫 코어 아이템 3개 ('a,b,c'), 3개 미만이면 None
+    ids = items.fillna(0).to_numpy(dtype=np.int64)
+    is_core = np.isin(ids, list(core_ids))
+    order = np.argsort(~is_core, axis=1, kind='stable')[:, :BUILD_SIZE]
+    first = pd.DataFrame(np.take_along_axis(ids, order, axis=1), index=items.index).astype(str)
+    builds = first[0].str.cat([first[i] for i in range(1, BUILD_SIZE)], sep=',')
+    return builds.where(is_core.sum(axis=1) >= BUILD_SIZE)
+
+
+def participant_facts(players, core_ids):
+    # 참가자 행 -> (dimension, value) 행 목록
+    base = players[['patch', 'position', 'champion_id', 'win']]
+    facts = [
+        base.assign(dimension='pick', value=''),
+        base.assign(dimension='side', value=players['team']),
+        base.assign(dimension='game_time', value=pd.cut(players['gameDuration'], bins=GAME_TIME_BINS,
+                                                        labels=GAME_TIME_LABELS, right=False).astype(str)),
+        base.assign(dimension='trinket', value=players['item6']),
+        base.assign(dimension='build', value=core_build_values(players[ITEM_SLOTS], core_ids)),
+    ]
+
+    runes = players[['rune_key', 'rune_main', 'rune_sub']].dropna().astype(int).astype(str)
+    facts.append(base.loc[runes.index].assign(
+        dimension='rune', value=runes['rune_key'] + '/' + runes['rune_main'] + '/' + runes['rune_sub']))
+
+    # 스펠 조합은 순서 없이 저장 (표시 순서는 리포트에서 이름 기준으로 정함)
+    spells = players[['spell1', 'spell2']].dropna().astype(int)
+    facts.append(base.loc[spells.index].assign(
+        dimension='spell', value=spells.min(axis=1).astype(str) + ',' + spells.max(axis=1).astype(str)))
+
+    # 인벤토리 슬롯별 아이템 (같은 아이템 2개면 2회)
+    for slot in ITEM_SLOTS:
+        facts.append(base.assign(dimension='item', value=players[slot]))
+
+    facts = pd.concat(facts, ignore_index=True).dropna(subset=['value'])
+    facts['value'] = facts['value'].astype(str).str.replace(r'\.0$', '', regex=True)
+    facts = facts[~(facts['dimension'].isin(['item', 'trinket']) & (facts['value'] == '0'))]  # 빈 슬롯
+    return facts.groupby(AGG_KEYS, as_index=False).agg(games=('win', 'count'), wins=('win', 'sum'))
+
+
+def build_deltas(players, match_team, bans, core_ids):
+    patches = players.drop_duplicates('match_id').set_index('match_id')['patch']
+    deltas = [participant_facts(players, core_ids)]
+
+    blue = match_team[match_team['team_id'] == 100]
+    matches = blue.assign(patch=blue['match_id'].map(patches)).groupby('patch').size().rename('games').reset_index()
+    deltas.append(matches.assign(position=ALL_POSITIONS, champion_id=0, dimension='matches', value='', wins=0))
+
+    bans = bans.assign(patch=bans['match_id'].map(patches))
+    ban_counts = bans.groupby(['patch', 'champion_id']).size().rename('games').reset_index()
+    deltas.append(ban_counts.assign(position=ALL_POSITIONS, dimension='ban', value='', wins=0))
+
+    return pd.concat(deltas, ignore_index=True)[AGG_KEYS + ['games', 'wins']]
+
+
+def fold_new_matches(engine, df, match_team, bans, core_ids, rebuild=False):
+    # 반환값: 새로 반영한 매치 수
+    if rebuild or not table_exists(engine, FOLDED_TABLE):
+        prepare_tables(engine, [AGG_TABLE, FOLDED_TABLE])
+        existing, folded = None, set()
+    else:
+        existing = read_sql(f"SELECT * FROM {AGG_TABLE}", engine)
+        folded = set(read_sql(f"SELECT match_id FROM {FOLDED_TABLE}", engine)['match_id'])
+
+    players = df[~df['match_id'].isin(folded)]
+    if players.empty:
+        return 0
+    players = players.assign(patch=players['game_version'].map(patch_of))
+    new_ids = set(players['match_id'])
+
+    delta = build_deltas(players, match_team[match_team['match_id'].isin(new_ids)],
+                         bans[bans['match_id'].isin(new_ids)], core_ids)
+    merged = pd.concat([existing, delta], ignore_index=True) if existing is not None else delta
+    merged = merged.groupby(AGG_KEYS, as_index=False)[['games', 'wins']].sum()
+
+    # 집계 테이블 크기는 키 수에만 비례하므로 통째로 다시 씀 (매치 목록은 추가만)
+    # 두 테이블을 한 번에 반영해야 중간에 죽어도 매치가 빠지거나 두 번 더해지지 않음
+    commit_frames(engine, replace={AGG_TABLE: merged},
+                  append={FOLDED_TABLE: players.drop_duplicates('match_id')[['match_id', 'patch']]}, chunksize=1000)
+    return len(new_ids)
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+# =======================================================
+# 코어 빌드 경로 트라이
+# (포지션, 챔피언) 마다 루트 하나, 그 아래로 구매 순서대로 코어 아이템 노드가 이어지며
+# 노드마다 그 경로를 지나간 참가자 수(picks) / 승리 수(wins)를 저장합니다.
+# 노드는 깊이 -> 부모 -> 아이템 ID 순으로 배열에 놓이므로 한 노드의 자식은 연속 구간
+# [child_start, child_start + child_count) 이고, 경로 조회는 깊이마다 이진 탐색 한 번입니다.
+# =======================================================
+TRIE_DEPTH = 3  # 3코어까지
+TRIE_MIN_PICKS = 3  # 이보다 적게 지나간 가지는 저장하지 않음
+NODE_ARRAYS = ['item', 'picks', 'wins', 'child_start', 'child_count']
+
+
+class BuildTrie:
+    def __init__(self, arrays):
+        # arrays: NODE_ARRAYS + root_position / root_champion (루트 노드 0..R-1) + item_ids / item_names (이름 사전)
+        for name, values in arrays.items():
+            setattr(self, name, values)
+        self._roots = {(pos, champ): i for i, (pos, champ) in enumerate(zip(self.root_position, self.root_champion))}
+        self._names = dict(zip(self.item_ids.tolist(), self.item_names.tolist()))
+
+    @classmethod
+    def build(cls, positions, champions, paths, lengths, wins, item_map, depth=TRIE_DEPTH, min_picks=TRIE_MIN_PICKS):
+        # 참가자별 입력: positions / champions (루트 키), paths (참가자 x depth 이상, 구매 순 아이템 ID),
+        # lengths (paths 중 유효한 칸 수), wins (0/1)
+        wins = np.asarray(wins, dtype=np.int64)
+        lengths = np.asarray(lengths)
+        root_keys = pd.MultiIndex.from_arrays([positions, champions])
+        node_of, roots = root_keys.factorize(sort=True)
+        n_roots = len(roots)
+
+        parent = [np.full(n_roots, -1, dtype=np.int64)]
+        item = [np.full(n_roots, -1, dtype=np.int64)]
+        picks = [np.bincount(node_of, minlength=n_roots)]
+        won = [np.bincount(node_of, weights=wins, minlength=n_roots).astype(np.int64)]
+        next_id = n_roots
+
+        # 깊이마다 (부모 노드, 아이템) 쌍을 정렬/중복 제거해 새 노드 번호를 매김
+        for d in range(depth):
+            active = (node_of >= 0) & (lengths > d)
+            pairs = np.stack([node_of[active], paths[active, d]], axis=1)
+            if not len(pairs): break
+            unique_pairs, inverse, counts = np.unique(pairs, axis=0, return_inverse=True, return_counts=True)
+            inverse = inverse.ravel()
+            keep = counts >= min_picks
+
+            new_id = np.full(len(unique_pairs), -1, dtype=np.int64)
+            new_id[keep] = next_id + np.arange(keep.sum())
+            next_id += keep.sum()
+
+            parent.append(unique_pairs[keep, 0])
+            item.append(unique_pairs[keep, 1])
+            picks.append(counts[keep])
+            won.append(np.bincount(inverse, weights=wins[active], minlength=len(unique_pairs))[keep].astype(np.int64))
+
+            # 잘린 가지를 지나던 참가자는 더 내려가지 않음
+            node_of = np.full(len(node_of), -1, dtype=np.int64)
+            node_of[active] = new_id[inverse]
+
+        parent = np.concatenate(parent)
+        # 부모 번호가 오름차순이므로 자식 구간 시작 = 부모 번호의 첫 위치
+        nodes = np.arange(len(parent))
+        used = np.unique(np.concatenate(item[1:])) if len(item) > 1 else np.array([], dtype=np.int64)
+        return cls({
+            'item': np.concatenate(item).astype(np.int32),
+            'picks': np.concatenate(picks).astype(np.int32),
+            'wins': np.concatenate(won).astype(np.int32),
+            'child_start': np.searchsorted(parent, nodes).astype(np.int32),
+            'child_count': np.bincount(parent[parent >= 0], minlength=len(parent)).astype(np.int32),
+            'root_position': np.array(roots.get_level_values(0), dtype=str),
+            'root_champion': np.array(roots.get_level_values(1), dtype=str),
+            'item_ids': used.astype(np.int32),
+            'item_names': np.array([item_map.get(i, str(i)) for i in used.tolist()], dtype=str),
+        })
+
+    def save(self, path):
+        np.savez_compressed(path, **{name: getattr(self, name) for name in
+                                     NODE_ARRAYS + ['root_position', 'root_champion', 'item_ids', 'item_names']})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls({name: data[name] for name in data.files})
+
+    def __len__(self):
+        return len(self.item)
+
+    def find(self, position, champion, path=()):
+        # (포지션, 챔피언) 루트에서 아이템 ID 경로를 따라 내려간 노드 번호 (없으면 -1)
+        node = self._roots.get((position, champion), -1)
+        for item_id in path:
+            if node < 0: break
+            start, count = self.child_start[node], self.child_count[node]
+            children = self.item[start:start + count]
+            i = np.searchsorted(children, item_id)
+            node = start + i if i < count and children[i] == item_id else -1
+        return node
+
+    def next_items(self, position, champion, path=(), min_picks=1):
+        # 경로 다음에 산 코어 아이템별 picks / win_rate (picks 내림차순)
+        columns = ['item_id', 'item_name', 'picks', 'wins', 'win_rate', 'pick_rate']
+        node = self.find(position, champion, path)
+        if node < 0:
+            return pd.DataFrame(columns=columns)
+        start = self.child_start[node]
+        idx = np.arange(start, start + self.child_count[node])
+        idx = idx[self.picks[idx] >= min_picks]
+        df = pd.DataFrame({
+            'item_id': self.item[idx],
+            'item_name': [self._names.get(i, str(i)) for i in self.item[idx].tolist()],
+            'picks': self.picks[idx],
+            'wins': self.wins[idx],
+        })
+        df['win_rate'] = (df['wins'] / df['picks'] * 100).round(2)
+        df['pick_rate'] = (df['picks'] / self.picks[node] * 100).round(2)
+        return df.sort_values(['picks', 'win_rate'], ascending=False, ignore_index=True)[columns]
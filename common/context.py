@@ -0,0 +1,131 @@
+import os
+from functools import cached_property
+
+import pandas as pd
+from sqlalchemy import Integer, String
+
+from common.db import get_engine, read_sql, iter_frames
+from common.aggregates import AGG_TABLE
+from common.dims import load_dim_maps, load_item_flags
+from common.purchases import PURCHASES_TABLE
+from common.query_cache import cached_frame
+from common.schema import metadata
+
+# =======================================================
+# 분석 컨텍스트
+# 06~11 리포트가 공유하는 메모리 데이터셋. 테이블마다 처음 접근할 때 한 번만 읽고
+# (필요한 컬럼만), 문자열은 category / 정수는 값 범위에 맞는 int8~int32 로 줄여 보관합니다.
+# =======================================================
+# 큰 테이블은 이 행 수씩 받아 (iter_frames: 타입 버퍼 / 서버 측 커서) 바로 축소한 뒤 합침
+READ_CHUNK_ROWS = 200000
+
+# 리포트에서 쓰는 컬럼만 읽음 (None = 스키마 전체)
+TABLE_COLUMNS = {
+    'match_data': [c.name for c in metadata.tables['match_data'].columns if c.name != 'puuid'],
+    'match_team': None,
+    'match_bans': None,
+    'participant_timeline_summary': None,
+    PURCHASES_TABLE: None,
+    'timeline_skills': ['match_id', 'participantId', 'timestamp', 'event_seq', 'skillSlot'],
+    'timeline_objectives': ['match_id', 'timestamp', 'event_seq', 'type', 'subtype', 'teamId'],
+    AGG_TABLE: None,
+}
+
+
+def compact_frame(df, table_name):
+    # 스키마 타입 기준으로 축소 (NULL 이 있는 정수 컬럼은 그대로 둠)
+    columns = metadata.tables[table_name].columns
+    for col in df.columns:
+        if col == 'match_id' or col not in columns: continue
+        col_type = columns[col].type
+        if isinstance(col_type, String):
+            df[col] = df[col].astype('category')
+        elif isinstance(col_type, Integer) and df[col].notna().all():
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
+
+
+def concat_compact(chunks):
+    # 청크마다 다른 category 를 합집합(정렬)으로 맞춰서 합침 (object 로 풀리지 않게)
+    if len(chunks) == 1:
+        return chunks[0]
+    for col in chunks[0].columns:
+        if not isinstance(chunks[0][col].dtype, pd.CategoricalDtype): continue
+        categories = sorted(set().union(*(c[col].cat.categories for c in chunks)))
+        for c in chunks:
+            c[col] = c[col].cat.set_categories(categories)
+    return pd.concat(chunks, ignore_index=True)
+
+
+class AnalysisContext:
+    def __init__(self, engine=None):
+        self.engine = engine if engine is not None else get_engine()
+        self._frames = {}
+
+    def table(self, table_name):
+        if table_name not in self._frames:
+            self._frames[table_name] = self._load(table_name)
+        return self._frames[table_name]
+
+    def _load(self, table_name):
+        columns = TABLE_COLUMNS[table_name]
+        cols = '*' if columns is None else ', '.join(columns)
+        sql = f"SELECT {cols} FROM {table_name}"
+        # 축소까지 끝난 프레임을 캐시 (match_data 기준으로 행을 거르므로 match_data 세대도 키에 포함)
+        return cached_frame(sql, self.engine, {table_name, 'match_data'}, lambda: self._read(sql, table_name))
+
+    def _read(self, sql, table_name):
+        # 원본(object) 컬럼은 한 청크 분량만 메모리에 올라감
+        chunks = [self._compact_chunk(chunk, table_name) for chunk in iter_frames(sql, self.engine, READ_CHUNK_ROWS)]
+        df = concat_compact(chunks) if chunks else self._compact_chunk(read_sql(sql, self.engine), table_name)
+
+        if table_name == 'match_data':
+            df['match_id'] = df['match_id'].astype(pd.CategoricalDtype(sorted(df['match_id'].unique())))
+        return df
+
+    def _compact_chunk(self, df, table_name):
+        df = compact_frame(df, table_name)
+        # match_id 는 모든 프레임이 같은 category 타입을 공유 (조인이 코드 비교로 처리됨)
+        # match_data 에 없는 매치(10분 미만 등)의 행은 어느 리포트도 쓰지 않으므로 제외
+        if 'match_id' not in df.columns or table_name == 'match_data':
+            return df
+        df['match_id'] = df['match_id'].astype(self.match_id_dtype)
+        return df[df['match_id'].notna()].reset_index(drop=True)
+
+    @cached_property
+    def match_id_dtype(self):
+        return self.table('match_data')['match_id'].dtype
+
+    @cached_property
+    def dim_maps(self):
+        return load_dim_maps(self.engine)
+
+    @cached_property
+    def item_flags(self):
+        return load_item_flags(self.engine)
+
+    @cached_property
+    def report_patches(self):
+        # 집계 기반 리포트의 대상 패치: 기본은 전체 (원본 테이블을 읽는 리포트와 같은 범위)
+        # LOL_REPORT_PATCH='15.1,15.2' 로 지정하면 집계 기반 리포트만 해당 패치로 좁힘
+        patches = set(self.table(AGG_TABLE)['patch'].astype(str))
+        selected = os.environ.get('LOL_REPORT_PATCH', '')
+        if not selected or selected.lower() == 'all':
+            return patches
+        return {p.strip() for p in selected.split(',')}
+
+    def aggregates(self, dimension):
+        # 누적 집계에서 (position, champion_id, value) 별 games / wins (대상 패치 합산)
+        agg = self.table(AGG_TABLE)
+        agg = agg[(agg['dimension'] == dimension) & agg['patch'].isin(self.report_patches)]
+        agg = agg.groupby(['position', 'champion_id', 'value'], observed=True)[['games', 'wins']].sum().reset_index()
+        agg['position'] = agg['position'].astype(str)
+        agg['value'] = agg['value'].astype(str)
+        return agg
+
+    def with_participants(self, df, columns, on='participantId'):
+        # 타임라인/요약 행에 참가자 속성(포지션/챔피언/승패 등)을 붙임 (JOIN match_data 와 같은 내부 조인)
+        participants = self.table('match_data')[['match_id', 'participant_id'] + columns]
+        if on != 'participant_id':
+            participants = participants.rename(columns={'participant_id': on})
+        return df.merge(participants, on=['match_id', on])
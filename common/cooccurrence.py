@@ -0,0 +1,118 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# =======================================================
+# 챔피언 동시 등장(같은 팀 / 상대 팀) 엔진
+# 참가자마다 (챔피언, 포지션) 을 인덱스 하나로 인코딩하고, 매치를 (match, team) 순으로 정렬해
+# 매치 x 슬롯(최대 10) 배열로 펼친 뒤 슬롯 쌍 전체를 한 번에 (나, 상대) 좌표로 만들어 희소 행렬에 누적합니다.
+# 행 i 를 잘라내면 (챔피언, 포지션) i 의 모든 팀원 시너지 / 상대 전적이 바로 나옵니다.
+# =======================================================
+MATCH_SLOTS = 10
+
+# 행/열 인덱스 = champion_ids 안의 위치 * len(positions) + positions 안의 위치
+# team_games[i, j] / team_wins[i, j]: i 가 j 와 같은 팀이었던 게임 수 / 승리 수
+# enemy_games[i, j] / enemy_wins[i, j]: i 가 j 를 상대로 한 게임 수 / 승리 수
+CoOccurrence = namedtuple('CoOccurrence',
+                          ['champion_ids', 'positions', 'team_games', 'team_wins', 'enemy_games', 'enemy_wins'])
+
+
+def match_slots(players):
+    # 매치 x MATCH_SLOTS 배열 (참가자 행 위치, 없으면 -1), (match, team) 순
+    match = players['match_id'].cat.codes.to_numpy(dtype=np.int64)
+    team = players['team'].cat.codes.to_numpy(dtype=np.int64)
+    order = np.lexsort((team, match))
+    match = match[order]
+
+    starts = np.flatnonzero(np.r_[True, match[1:] != match[:-1]]) if len(order) else np.array([], dtype=np.int64)
+    group = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(order)]))
+    rank = np.arange(len(order)) - starts[group]
+
+    slots = np.full((len(starts), MATCH_SLOTS), -1, dtype=np.int64)
+    mask = rank < MATCH_SLOTS
+    slots[group[mask], rank[mask]] = order[mask]
+    return slots
+
+
+def build_cooccurrence(players):
+    # players: match_id / team / position / champion_id / win (position 이 없는 행은 제외)
+    players = players[players['position'].notna()].reset_index(drop=True)
+    champion_ids, champ = np.unique(players['champion_id'].to_numpy(dtype=np.int64), return_inverse=True)
+    positions = np.asarray(players['position'].cat.categories)
+    index = champ.ravel() * len(positions) + players['position'].cat.codes.to_numpy(dtype=np.int64)
+    team = players['team'].cat.codes.to_numpy(dtype=np.int64)
+    win = players['win'].to_numpy(dtype=np.int64)
+    n = len(champion_ids) * len(positions)
+
+    # 슬롯 쌍 (a < b) 을 양방향으로 펼침
+    slots = match_slots(players)
+    a, b = np.triu_indices(MATCH_SLOTS, 1)
+    me = np.r_[slots[:, a].ravel(), slots[:, b].ravel()]
+    other = np.r_[slots[:, b].ravel(), slots[:, a].ravel()]
+    valid = (me >= 0) & (other >= 0)
+    me, other = me[valid], other[valid]
+    same_team = team[me] == team[other]
+
+    def counts(mask, values):
+        return sparse.csr_matrix((values[mask], (index[me[mask]], index[other[mask]])), shape=(n, n))
+
+    ones = np.ones(len(me), dtype=np.int64)
+    return CoOccurrence(
+        champion_ids, positions,
+        counts(same_team, ones), counts(same_team, win[me]),
+        counts(~same_team, ones), counts(~same_team, win[me]),
+    )
+
+
+def decode(co, idx):
+    # 인덱스 -> (champion_id, position) 배열
+    return co.champion_ids[idx // len(co.positions)], co.positions[idx % len(co.positions)]
+
+
+def key_index(co, champion_id, position):
+    # (champion_id, position) -> 인덱스 (없으면 -1)
+    champ = np.searchsorted(co.champion_ids, champion_id)
+    pos = np.flatnonzero(co.positions == position)
+    if champ >= len(co.champion_ids) or co.champion_ids[champ] != champion_id or not len(pos):
+        return -1
+    return champ * len(co.positions) + pos[0]
+
+
+def pairs_frame(co, relation, min_games=1):
+    # relation: 'team' / 'enemy' -> (position, champion_id, partner_position, partner_id, total_games, win_count)
+    games = getattr(co, f"{relation}_games")
+    wins = getattr(co, f"{relation}_wins")
+    rows = np.repeat(np.arange(games.shape[0]), np.diff(games.indptr))
+    keep = games.data >= min_games
+    rows, cols = rows[keep], games.indices[keep]
+    # 빈 좌표로 인덱싱하면 scipy 가 희소 행렬을 돌려주므로 따로 처리
+    win_count = np.asarray(wins[rows, cols]).ravel() if len(rows) else np.array([], dtype=np.int64)
+    champion_id, position = decode(co, rows)
+    partner_id, partner_position = decode(co, cols)
+    df = pd.DataFrame({
+        'position': position,
+        'champion_id': champion_id,
+        'partner_position': partner_position,
+        'partner_id': partner_id,
+        'total_games': games.data[keep],
+        'win_count': win_count.astype(np.int64),
+    })
+    return df.sort_values(['position', 'champion_id', 'partner_position', 'partner_id'], ignore_index=True)
+
+
+def partners(co, champion_id, position, relation='team'):
+    # (챔피언, 포지션) 의 팀원/상대별 게임 수/승리 수 (희소 행렬 행 하나만 잘라 읽음)
+    i = key_index(co, champion_id, position)
+    if i < 0:
+        return pd.DataFrame(columns=['partner_position', 'partner_id', 'total_games', 'win_count'])
+    games = getattr(co, f"{relation}_games")[i]
+    wins = getattr(co, f"{relation}_wins")[i].toarray().ravel()
+    partner_id, partner_position = decode(co, games.indices)
+    return pd.DataFrame({
+        'partner_position': partner_position,
+        'partner_id': partner_id,
+        'total_games': games.data,
+        'win_count': wins[games.indices],
+    })
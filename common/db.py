@@ -0,0 +1,346 @@
+import os
+import re
+import glob
+import json
+import uuid
+import shutil
+import sqlite3
+import threading
+from functools import lru_cache
+
+import pandas as pd
+from sqlalchemy import create_engine, event, inspect
+
+from common.schema import metadata, reset_tables
+
+# =======================================================
+# 저장소 백엔드
+# db_config.txt 의 "backend" 값(또는 LOL_DB_BACKEND 환경 변수)으로 선택합니다.
+#   - mysql  : 기존 MySQL 서버 (기본값)
+#   - duckdb : 임베디드 컬럼형 엔진, 테이블은 raw_data/lake/<table>/*.parquet 를 그대로 조회
+#   - sqlite : 임베디드 파일 DB
+# =======================================================
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_FILE = os.path.join(ROOT_DIR, 'default_info', 'db_config.txt')
+DEFAULT_LAKE_DIR = os.path.join(ROOT_DIR, 'raw_data', 'lake')
+DEFAULT_SQLITE_FILE = os.path.join(ROOT_DIR, 'raw_data', 'lol_analytics.sqlite')
+GENERATIONS_TABLE = 'table_generations'
+
+_generation_lock = threading.Lock()
+_generations_ready = set()
+
+
+@lru_cache(maxsize=None)
+def load_db_config():
+    config = {}
+    if os.path.exists(CONFIG_FILE):
+        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+
+    backend = os.environ.get('LOL_DB_BACKEND', config.get('backend', 'mysql')).lower()
+    if backend == 'mysql' and not config:
+        print(f"'{CONFIG_FILE}' 파일이 없습니다.")
+        exit()
+
+    config['backend'] = backend
+    config.setdefault('lake_dir', DEFAULT_LAKE_DIR)
+    return config
+
+
+def get_engine(**engine_kwargs):
+    # engine_kwargs (커넥션 풀 설정 등)는 MySQL 에만 적용
+    config = load_db_config()
+    backend = config['backend']
+
+    if backend == 'mysql':
+        db_url = f"mysql+pymysql://{config['user']}:{config['password']}@{config['host']}/{config['db_name']}?charset=utf8mb4"
+        return create_engine(db_url, **engine_kwargs)
+
+    if backend == 'sqlite':
+        return create_engine(f"sqlite:///{config.get('path', DEFAULT_SQLITE_FILE)}")
+
+    if backend == 'duckdb':
+        engine = create_engine(f"duckdb:///{config.get('path', ':memory:')}")
+        lake_dir = config['lake_dir']
+
+        @event.listens_for(engine, 'connect')
+        def register_lake_views(dbapi_conn, _):
+            # 적재된 Parquet 파일을 복사 없이 테이블 이름의 뷰로 노출
+            if not os.path.isdir(lake_dir): return
+            for table_name in sorted(os.listdir(lake_dir)):
+                pattern = os.path.join(lake_dir, table_name, '*.parquet')
+                if glob.glob(pattern):
+                    dbapi_conn.execute(f"CREATE OR REPLACE VIEW {table_name} AS "
+                                       f"SELECT * FROM read_parquet('{pattern}', union_by_name=true)")
+
+        finish_lake_commits(engine)
+        return engine
+
+    raise ValueError(f"지원하지 않는 backend: {backend}")
+
+
+# =======================================================
+# 적재
+# =======================================================
+def prepare_tables(engine, table_names):
+    # 적재 전 테이블 초기화 (서버형 DB 는 DDL, DuckDB 는 Parquet 디렉터리)
+    if engine.dialect.name == 'duckdb':
+        lake_dir = load_db_config()['lake_dir']
+        for table_name in table_names:
+            shutil.rmtree(os.path.join(lake_dir, table_name), ignore_errors=True)
+            os.makedirs(os.path.join(lake_dir, table_name))
+    else:
+        reset_tables(engine, table_names)
+    bump_generations(engine, table_names)
+
+
+def table_exists(engine, table_name):
+    # DuckDB 는 Parquet 파트 파일이 하나라도 있어야 뷰가 생성됨
+    if engine.dialect.name == 'duckdb':
+        return bool(glob.glob(os.path.join(load_db_config()['lake_dir'], table_name, '*.parquet')))
+    return inspect(engine).has_table(table_name)
+
+
+def _copy_to_parquet(df, path):
+    import duckdb
+    con = duckdb.connect()
+    try:
+        con.register('frame', df)
+        con.execute(f"COPY frame TO '{path}' (FORMAT PARQUET)")
+    finally:
+        con.close()
+
+
+def write_frame(df, table_name, engine, bump=True, **to_sql_kwargs):
+    # 호출마다 독립된 커넥션/파일에 쓰므로 여러 스레드에서 동시에 호출 가능
+    # bump: 이 호출로 적재가 끝나면 같은 트랜잭션에서 세대 번호를 올림
+    #       (여러 청크로 나눠 쓰는 적재는 False 로 쓰고 마지막에 bump_generations 를 한 번 호출)
+    if engine.dialect.name == 'duckdb':
+        _copy_to_parquet(df, os.path.join(load_db_config()['lake_dir'], table_name, f"part-{uuid.uuid4().hex}.parquet"))
+        if bump:
+            bump_generations(engine, [table_name])
+    else:
+        if bump:
+            ensure_generations_table(engine)
+        with engine.begin() as conn:
+            df.to_sql(name=table_name, con=conn, if_exists='append', index=False, **to_sql_kwargs)
+            if bump:
+                bump_generations(engine, [table_name], conn)
+
+
+def commit_frames(engine, replace=None, append=None, **to_sql_kwargs):
+    # 여러 테이블을 한 번에 반영 (중간에 죽어도 전부 반영되거나 전혀 반영되지 않음)
+    # replace: 테이블 이름 -> 기존 행을 전부 대체할 DataFrame, append: 테이블 이름 -> 추가할 DataFrame
+    replace, append = replace or {}, append or {}
+    table_names = list(replace) + list(append)
+    if engine.dialect.name == 'duckdb':
+        _commit_lake_frames(engine, replace, append)
+        return
+
+    ensure_generations_table(engine)
+    with engine.begin() as conn:
+        for table_name, df in replace.items():
+            conn.execute(metadata.tables[table_name].delete())
+            df.to_sql(name=table_name, con=conn, if_exists='append', index=False, **to_sql_kwargs)
+        for table_name, df in append.items():
+            df.to_sql(name=table_name, con=conn, if_exists='append', index=False, **to_sql_kwargs)
+        bump_generations(engine, table_names, conn)
+
+
+# =======================================================
+# 레이크 다중 테이블 반영 (DuckDB)
+# 새 파트 파일을 _staging/<id>/<table>/ 에 먼저 쓰고, 지울 기존 파일 목록을 담은 manifest.json 을
+# 원자적으로 교체해 넣는 순간을 반영 시점으로 삼습니다. 그 뒤 파일 이동/삭제 도중 죽더라도
+# 다음에 엔진을 만들 때 manifest 가 남아 있는 반영을 끝까지 다시 수행합니다.
+# =======================================================
+LAKE_STAGING_DIR = '_staging'
+
+
+def _commit_lake_frames(engine, replace, append):
+    lake_dir = load_db_config()['lake_dir']
+    txn_dir = os.path.join(lake_dir, LAKE_STAGING_DIR, uuid.uuid4().hex)
+    drop = []
+    for table_name, df in list(replace.items()) + list(append.items()):
+        os.makedirs(os.path.join(txn_dir, table_name), exist_ok=True)
+        _copy_to_parquet(df, os.path.join(txn_dir, table_name, f"part-{uuid.uuid4().hex}.parquet"))
+    for table_name in replace:
+        drop += [os.path.join(table_name, os.path.basename(path))
+                 for path in glob.glob(os.path.join(lake_dir, table_name, '*.parquet'))]
+
+    manifest = os.path.join(txn_dir, 'manifest.json')
+    with open(f"{manifest}.tmp", 'w', encoding='utf-8') as f:
+        json.dump({'tables': list(replace) + list(append), 'drop': drop}, f)
+    os.replace(f"{manifest}.tmp", manifest)
+    _apply_lake_commit(engine, lake_dir, txn_dir)
+
+
+def _apply_lake_commit(engine, lake_dir, txn_dir):
+    # 여러 번 실행해도 결과가 같도록 이미 옮겨졌거나 지워진 파일은 건너뜀
+    try:
+        with open(os.path.join(txn_dir, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return
+    for table_name in manifest['tables']:
+        staged_dir = os.path.join(txn_dir, table_name)
+        os.makedirs(os.path.join(lake_dir, table_name), exist_ok=True)
+        for name in os.listdir(staged_dir) if os.path.isdir(staged_dir) else []:
+            try: os.replace(os.path.join(staged_dir, name), os.path.join(lake_dir, table_name, name))
+            except FileNotFoundError: pass
+    for rel_path in manifest['drop']:
+        try: os.remove(os.path.join(lake_dir, rel_path))
+        except FileNotFoundError: pass
+    bump_generations(engine, manifest['tables'])
+    shutil.rmtree(txn_dir, ignore_errors=True)
+
+
+def finish_lake_commits(engine):
+    # manifest 까지 기록된 반영만 마저 수행 (manifest 가 없는 디렉터리는 다른 프로세스가 쓰는 중일 수 있어 그대로 둠)
+    lake_dir = load_db_config()['lake_dir']
+    for manifest in sorted(glob.glob(os.path.join(lake_dir, LAKE_STAGING_DIR, '*', 'manifest.json'))):
+        _apply_lake_commit(engine, lake_dir, os.path.dirname(manifest))
+
+
+# =======================================================
+# 적재 세대 번호 (분석 조회 캐시 키)
+# DB 안(table_generations 테이블, DuckDB 는 레이크의 같은 이름 Parquet)에 저장하므로
+# 다른 머신/체크아웃에서 같은 DB 에 적재해도 캐시가 무효화됩니다.
+# =======================================================
+def _lake_generations_file():
+    return os.path.join(load_db_config()['lake_dir'], GENERATIONS_TABLE, 'generations.parquet')
+
+
+def read_generations(engine):
+    # 테이블 이름 -> 세대 번호 (아직 적재 기록이 없으면 빈 dict)
+    if engine.dialect.name == 'duckdb':
+        # 엔진 커넥션은 연결 시 레이크 전체를 뷰로 등록하므로 (적재 중인 파트 파일 포함) 별도 커넥션으로 읽음
+        import duckdb
+        path = _lake_generations_file()
+        if not os.path.exists(path): return {}
+        con = duckdb.connect()
+        try:
+            df = con.execute(f"SELECT table_name, generation FROM read_parquet('{path}')").df()
+        finally:
+            con.close()
+    else:
+        if not inspect(engine).has_table(GENERATIONS_TABLE): return {}
+        df = pd.read_sql(f"SELECT table_name, generation FROM {GENERATIONS_TABLE}", engine)
+    return dict(zip(df['table_name'], df['generation'].astype(int)))
+
+
+def ensure_generations_table(engine):
+    # 세대 번호 테이블 생성 (확인 후 생성이므로 프로세스 안에서는 잠금으로 한 번만 실행)
+    # 05 처럼 여러 스레드가 동시에 적재하는 경우 스레드를 띄우기 전에 호출
+    if engine.dialect.name == 'duckdb': return
+    key = engine.url.render_as_string(hide_password=True)
+    with _generation_lock:
+        if key not in _generations_ready:
+            metadata.tables[GENERATIONS_TABLE].create(engine, checkfirst=True)
+            _generations_ready.add(key)
+
+
+def bump_generations(engine, table_names, conn=None):
+    # 적재한 테이블의 세대 번호 +1 (conn 을 넘기면 그 적재 트랜잭션 안에서)
+    if engine.dialect.name == 'duckdb':
+        # 레이크 파일은 트랜잭션이 없으므로 잠금 후 임시 파일 교체
+        with _generation_lock:
+            generations = read_generations(engine)
+            for table_name in table_names:
+                generations[table_name] = generations.get(table_name, 0) + 1
+            path = _lake_generations_file()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            _copy_to_parquet(pd.DataFrame({'table_name': list(generations),
+                                           'generation': list(generations.values())}), tmp_path)
+            os.replace(tmp_path, path)
+        return
+
+    if conn is None:
+        ensure_generations_table(engine)
+        with engine.begin() as conn:
+            return bump_generations(engine, table_names, conn)
+    table = metadata.tables[GENERATIONS_TABLE]
+    for table_name in table_names:
+        updated = conn.execute(table.update().where(table.c.table_name == table_name)
+                               .values(generation=table.c.generation + 1)).rowcount
+        if not updated:
+            conn.execute(table.insert().values(table_name=table_name, generation=1))
+
+
+# =======================================================
+# 조회 (MySQL 문법 -> 백엔드 문법 변환)
+# =======================================================
+GROUP_CONCAT_ORDERED = re.compile(
+    r"GROUP_CONCAT\(\s*(?P<expr>.+?)\s+ORDER\s+BY\s+(?P<order>.+?)\s+SEPARATOR\s+(?P<sep>'[^']*')\s*\)",
+    re.IGNORECASE | re.DOTALL)
+GROUP_CONCAT_PLAIN = re.compile(r"GROUP_CONCAT\(\s*(?P<expr>[^()]+?)\s*\)", re.IGNORECASE)
+
+
+def adapt_sql(sql, dialect_name):
+    if dialect_name == 'duckdb':
+        sql = GROUP_CONCAT_ORDERED.sub(r"string_agg(CAST(\g<expr> AS VARCHAR), \g<sep> ORDER BY \g<order>)", sql)
+        sql = GROUP_CONCAT_PLAIN.sub(r"string_agg(CAST(\g<expr> AS VARCHAR), ',')", sql)
+    elif dialect_name == 'sqlite':
+        # 집계 함수 내 ORDER BY 는 SQLite 3.44 이상에서만 지원
+        if sqlite3.sqlite_version_info >= (3, 44):
+            sql = GROUP_CONCAT_ORDERED.sub(r"group_concat(\g<expr>, \g<sep> ORDER BY \g<order>)", sql)
+        else:
+            sql = GROUP_CONCAT_ORDERED.sub(r"group_concat(\g<expr>, \g<sep>)", sql)
+    return sql
+
+
+def read_sql(sql, engine, **kwargs):
+    return pd.read_sql(adapt_sql(sql, engine.dialect.name), engine, **kwargs)
+
+
+def _iter_duckdb(sql, engine, chunksize):
+    # DuckDB 결과를 벡터(2048행) 단위로 바로 NumPy 컬럼에 받음 (행마다 파이썬 튜플을 만들지 않음)
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.driver_connection.cursor()
+        cursor.execute(sql)
+        vectors = max(1, chunksize // 2048)
+        while True:
+            chunk = cursor.fetch_df_chunk(vectors)
+            if chunk.empty: break
+            yield chunk
+    finally:
+        raw.close()
+
+
+def _connectorx_streams():
+    # connectorx(선택 설치)가 배치 스트리밍(arrow_stream + batch_size, 0.4 이상)을 지원하는지
+    try:
+        import inspect
+        import connectorx as cx
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return 'batch_size' in inspect.signature(cx.read_sql).parameters
+
+
+def _iter_connectorx(sql, engine, chunksize):
+    # MySQL: connectorx 가 바이너리 프로토콜 결과를 chunksize 행의 Arrow 배치로 넘김
+    # (전체 결과를 한 번에 만들지 않으므로 메모리는 배치 크기에만 비례)
+    import connectorx as cx
+    url = engine.url.set(drivername='mysql', query={}).render_as_string(hide_password=False)
+    reader = cx.read_sql(url, sql, return_type='arrow_stream', batch_size=chunksize)
+    for batch in reader:
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def iter_frames(sql, engine, chunksize):
+    # 대용량 조회 경로: 타입 버퍼로 바로 스트리밍하는 드라이버가 있으면 사용하고, 없으면 iter_sql 로 폴백
+    if engine.dialect.name == 'duckdb':
+        return _iter_duckdb(adapt_sql(sql, 'duckdb'), engine, chunksize)
+    if engine.dialect.name == 'mysql' and _connectorx_streams():
+        return _iter_connectorx(sql, engine, chunksize)
+    return iter_sql(sql, engine, chunksize)
+
+
+def iter_sql(sql, engine, chunksize, **kwargs):
+    # 서버 측 커서(MySQL: SSCursor)로 결과를 chunksize 행씩 받아 DataFrame 으로 넘김
+    # 전체 결과를 클라이언트에 버퍼링하지 않으므로 메모리는 청크 크기에만 비례
+    with engine.connect().execution_options(stream_results=True) as conn:
+        yield from pd.read_sql(adapt_sql(sql, engine.dialect.name), conn, chunksize=chunksize, **kwargs)
@@ -0,0 +1,109 @@
+import os
+import json
+import time
+
+# =======================================================
+# DataDragon 정적 데이터 캐시
+# 버전별 파일은 내용이 바뀌지 않으므로 raw_data/ddragon/<version>/<locale>/<file> 에 한 번만 받고,
+# 목록(versions.json)만 하루 단위로 갱신합니다.
+# LOL_DDRAGON_OFFLINE=1 이면 네트워크를 쓰지 않고 캐시만 사용합니다.
+# =======================================================
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(ROOT_DIR, 'raw_data', 'ddragon')
+BASE_URL = "https://ddragon.leagueoflegends.com"
+VERSIONS_MAX_AGE = 24 * 3600
+
+
+def is_offline():
+    return os.environ.get('LOL_DDRAGON_OFFLINE', '').lower() in ('1', 'true', 'yes')
+
+
+def _fetch_json(url):
+    import requests
+    r = requests.get(url, timeout=30)
+    r.raise_for_status()
+    return r.json()
+
+
+def _read_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_json(path, data):
+    # 다른 프로세스가 반쯤 쓴 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _cached_versions():
+    # versions.json 이 없을 때 오프라인 폴백: 캐시 디렉터리에 있는 버전 (최신순)
+    if not os.path.isdir(CACHE_DIR): return []
+    found = [d for d in os.listdir(CACHE_DIR) if os.path.isdir(os.path.join(CACHE_DIR, d))]
+    return sorted(found, key=lambda v: [int(p) if p.isdigit() else 0 for p in v.split('.')], reverse=True)
+
+
+def get_versions():
+    path = os.path.join(CACHE_DIR, 'versions.json')
+    fresh = os.path.exists(path) and time.time() - os.path.getmtime(path) < VERSIONS_MAX_AGE
+    if fresh or is_offline():
+        return _read_json(path) if os.path.exists(path) else _cached_versions()
+
+    try:
+        versions = _fetch_json(f"{BASE_URL}/api/versions.json")
+    except Exception:
+        # 네트워크 실패 시 오래된 목록이라도 사용
+        if os.path.exists(path): return _read_json(path)
+        raise
+    _write_json(path, versions)
+    return versions
+
+
+def latest_version():
+    versions = get_versions()
+    if not versions:
+        raise RuntimeError("DataDragon 버전 목록이 없습니다. (오프라인 캐시 비어 있음)")
+    return versions[0]
+
+
+def patch_of(version):
+    # '15.1.634.1234' / '15.1.1' -> '15.1'
+    return ".".join(str(version).split(".")[:2])
+
+
+def resolve_version(game_version=None):
+    # 매치의 game_version 과 같은 패치의 DataDragon 버전 (없으면 최신)
+    versions = get_versions()
+    if game_version:
+        patch = patch_of(game_version)
+        for version in versions:
+            if patch_of(version) == patch:
+                return version
+    return latest_version()
+
+
+def load_static(file_name, version, locale='ko_KR'):
+    # file_name: 'champion.json', 'item.json', 'summoner.json', 'runesReforged.json'
+    path = os.path.join(CACHE_DIR, version, locale, file_name)
+    if os.path.exists(path):
+        return _read_json(path)
+    if is_offline():
+        raise FileNotFoundError(f"오프라인 모드: 캐시에 없는 파일 ({path})")
+
+    data = _fetch_json(f"{BASE_URL}/cdn/{version}/data/{locale}/{file_name}")
+    _write_json(path, data)
+    return data
+
+
+def load_static_bundle(version):
+    # 차원 테이블 구축에 필요한 파일 묶음
+    return {
+        'champion_kr': load_static('champion.json', version)['data'],
+        'champion_en': load_static('champion.json', version, locale='en_US')['data'],
+        'item': load_static('item.json', version)['data'],
+        'spell': load_static('summoner.json', version)['data'],
+        'rune': load_static('runesReforged.json', version),
+    }
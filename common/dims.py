@@ -0,0 +1,106 @@
+import pandas as pd
+
+from common.db import read_sql
+
+# =======================================================
+# 차원 테이블 (DataDragon ID -> 표시 이름)
+# 팩트 테이블은 정수 ID 만 보관하고, 이름은 리포트/대시보드 단계에서만 붙입니다.
+# =======================================================
+DIM_TABLES = ['dim_champion', 'dim_item', 'dim_rune', 'dim_spell']
+
+# 아이템 분류 기준 (DataDragon depth/gold/tags, 패치마다 적재 시 한 번만 계산)
+ITEM_FLAGS = ['is_boot', 'is_core', 'is_starter', 'is_trinket', 'is_consumable']
+CORE_MIN_GOLD = 2200
+STARTER_MAX_GOLD = 500
+# 소모품 태그지만 시작 아이템으로 사는 충전형 물약 (부패 물약)
+STARTER_CONSUMABLE_IDS = {2033}
+
+
+def build_champion_key_map(champ_kr, champ_en):
+    # championName(영문 키/이름, 대소문자·공백 무시) -> championId
+    key_map = {}
+    for key, val in champ_kr.items():
+        key_map[key.lower()] = int(val['key'])
+    for key, val in champ_en.items():
+        champ_id = int(val['key'])
+        key_map[val['name'].lower()] = champ_id
+        key_map[val['name'].replace(" ", "").lower()] = champ_id
+    return key_map
+
+
+def classify_item(item_id, info):
+    tags = set(info.get('tags', []))
+    depth = info.get('depth', 1)
+    gold = info.get('gold', {}).get('total', 0)
+
+    is_trinket = 'Trinket' in tags
+    is_consumable = 'Consumable' in tags
+    is_boot = 'Boots' in tags
+    # 하위 재료가 없는 저가 아이템 = 시작 아이템 (도란/수확의 낫/정글 펫/기본 재료 등)
+    is_starter = depth == 1 and 0 < gold <= STARTER_MAX_GOLD and not (is_trinket or is_consumable) \
+        or int(item_id) in STARTER_CONSUMABLE_IDS
+    # 완성 아이템 (퀘스트로 승급되는 저가 서포터 아이템은 제외)
+    is_core = (depth >= 3 or gold >= CORE_MIN_GOLD) and gold > STARTER_MAX_GOLD \
+        and not (is_boot or is_trinket or is_consumable)
+
+    return {'is_boot': is_boot, 'is_core': is_core, 'is_starter': is_starter,
+            'is_trinket': is_trinket, 'is_consumable': is_consumable}
+
+
+def build_dim_frames(champ_kr, item_data, spell_data, rune_data_list):
+    dim_champion = pd.DataFrame(
+        [{'champion_id': int(v['key']), 'champion_key': k, 'name': v['name']} for k, v in champ_kr.items()])
+
+    dim_item = pd.DataFrame([{'item_id': int(k), 'name': v['name'], 'gold': v.get('gold', {}).get('total', 0),
+                              **classify_item(k, v)} for k, v in item_data.items()])
+    dim_item = pd.concat([dim_item, pd.DataFrame([{'item_id': 0, 'name': 'None', 'gold': 0}])], ignore_index=True)
+    dim_item[ITEM_FLAGS] = dim_item[ITEM_FLAGS].fillna(False).astype(int)
+
+    dim_spell = pd.DataFrame([{'spell_id': int(v['key']), 'name': v['name']} for v in spell_data.values()])
+
+    runes = [{'rune_id': -1, 'name': 'Unknown', 'style_id': None}]
+    for style in rune_data_list:
+        runes.append({'rune_id': style['id'], 'name': style['name'], 'style_id': style['id']})
+        for slot in style['slots']:
+            for rune in slot['runes']:
+                runes.append({'rune_id': rune['id'], 'name': rune['name'], 'style_id': style['id']})
+    dim_rune = pd.DataFrame(runes)
+
+    return {
+        'dim_champion': dim_champion.drop_duplicates('champion_id'),
+        'dim_item': dim_item.drop_duplicates('item_id'),
+        'dim_rune': dim_rune.drop_duplicates('rune_id'),
+        'dim_spell': dim_spell.drop_duplicates('spell_id'),
+    }
+
+
+def load_dim_maps(engine):
+    # 리포트 출력 직전에 ID -> 이름 변환에 사용
+    return {
+        'champion': dict(read_sql("SELECT champion_id, name FROM dim_champion", engine).values),
+        'item': dict(read_sql("SELECT item_id, name FROM dim_item", engine).values),
+        'rune': dict(read_sql("SELECT rune_id, name FROM dim_rune", engine).values),
+        'spell': dict(read_sql("SELECT spell_id, name FROM dim_spell", engine).values),
+    }
+
+
+def load_item_flags(engine):
+    # item_id 인덱스 + 분류 플래그(0/1) 컬럼
+    cols = ', '.join(ITEM_FLAGS)
+    return read_sql(f"SELECT item_id, {cols} FROM dim_item", engine).set_index('item_id')
+
+
+def flagged_ids(item_flags, flag):
+    return set(item_flags.index[item_flags[flag] == 1])
+
+
+def name_of(ids, dim_map):
+    # 사전에 없는 ID 는 숫자 문자열 그대로 표시
+    return ids.map(dim_map).fillna(ids.astype(str))
+
+
+def attach_names(df, id_col, name_col, dim_map):
+    # ID 컬럼을 같은 위치의 이름 컬럼으로 교체
+    loc = df.columns.get_loc(id_col)
+    df.insert(loc, name_col, name_of(df.pop(id_col), dim_map))
+    return df
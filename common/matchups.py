@@ -0,0 +1,77 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# =======================================================
+# 라인 상대 전적 엔진
+# 참가자를 (match, position, team) 순으로 한 번 정렬하면 같은 라인의 블루/레드가 인접하므로
+# 자기 조인 없이 바로 맞상대 쌍을 만들고, 포지션별 챔피언 x 챔피언 행렬에 누적합니다.
+# =======================================================
+# champion_ids: 행/열 인덱스의 챔피언 ID (오름차순)
+# games[i, j] / wins[i, j]: i 가 j 를 상대로 한 게임 수 / 승리 수 (losses = games - wins)
+Matchups = namedtuple('Matchups', ['champion_ids', 'games', 'wins'])
+
+
+def lane_pairs(players):
+    # (match, position) 당 팀마다 정확히 한 명인 라인만 맞상대 쌍으로 사용 (포지션이 빈 참가자는 제외)
+    # 반환값: players 안에서의 블루/레드 행 위치 (같은 길이의 배열 두 개)
+    empty = np.array([], dtype=np.int64)
+    valid = np.flatnonzero(players['position'].cat.codes.to_numpy() >= 0)
+    if not len(valid):
+        return empty, empty
+    match = players['match_id'].cat.codes.to_numpy(dtype=np.int64)[valid]
+    position = players['position'].cat.codes.to_numpy(dtype=np.int64)[valid]
+    team = players['team'].cat.codes.to_numpy(dtype=np.int64)[valid]
+
+    order = np.lexsort((team, position, match))
+    key = (match * (position.max() + 1) + position)[order]
+    team = team[order]
+
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    sizes = np.diff(np.r_[starts, len(key)])
+    first = starts[(sizes == 2) & (team[starts] != team[np.minimum(starts + 1, len(key) - 1)])]
+    return valid[order[first]], valid[order[first + 1]]
+
+
+def build_matchups(players):
+    # 포지션 -> Matchups (양방향으로 누적하므로 games 는 전치 대칭)
+    first, second = lane_pairs(players)
+    positions = players['position'].to_numpy()[first]
+    champs = players['champion_id'].to_numpy(dtype=np.int64)
+    wins = players['win'].to_numpy(dtype=np.int64)
+
+    matchups = {}
+    for position in pd.unique(positions):
+        mask = positions == position
+        me = np.r_[champs[first[mask]], champs[second[mask]]]
+        enemy = np.r_[champs[second[mask]], champs[first[mask]]]
+        won = np.r_[wins[first[mask]], wins[second[mask]]]
+
+        champion_ids, idx = np.unique(np.r_[me, enemy], return_inverse=True)
+        n = len(champion_ids)
+        cell = idx[:len(me)] * n + idx[len(me):]
+        matchups[position] = Matchups(
+            champion_ids,
+            np.bincount(cell, minlength=n * n).reshape(n, n),
+            np.bincount(cell, weights=won, minlength=n * n).astype(np.int64).reshape(n, n),
+        )
+    return matchups
+
+
+def matchups_frame(matchups, min_games=1):
+    # 행렬 -> (position, me, enemy, total_games, win_count) 행 (포지션/챔피언 ID 오름차순)
+    frames = []
+    for position in sorted(matchups):
+        m = matchups[position]
+        me, enemy = np.nonzero((m.games >= min_games) & (m.champion_ids[:, None] != m.champion_ids[None, :]))
+        frames.append(pd.DataFrame({
+            'position': position,
+            'me': m.champion_ids[me],
+            'enemy': m.champion_ids[enemy],
+            'total_games': m.games[me, enemy],
+            'win_count': m.wins[me, enemy],
+        }))
+    if not frames:
+        return pd.DataFrame(columns=['position', 'me', 'enemy', 'total_games', 'win_count'])
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,46 @@
+import pandas as pd
+
+# =======================================================
+# 실제 구매 스트림 (item_purchases)
+# 05 단계에서 timeline_items 청크의 구매/되돌리기(ITEM_UNDO) 이벤트만 모아 두었다가,
+# 참가자별로 한 번 정렬한 뒤 각 구매 직후의 같은 아이템 UNDO 를 sort-merge 로 찾아 취소된 구매를 제외합니다.
+# 07/11 리포트와 참가자 요약(코어/장신구)은 모두 이 테이블을 기준으로 합니다.
+# =======================================================
+PURCHASES_TABLE = 'item_purchases'
+PURCHASE_COLUMNS = ['match_id', 'participantId', 'timestamp', 'event_seq', 'itemId']
+EVENT_ORDER = ['match_id', 'participantId', 'timestamp', 'event_seq']
+UNDO_WINDOW_MS = 10000  # 구매 후 10초 이내 같은 아이템 UNDO = 취소된 구매
+
+
+def real_purchases(items):
+    # items: timeline_items 행 (type 포함), 반환값: 취소되지 않은 구매 (EVENT_ORDER 순)
+    keys = ['match_id', 'participantId', 'itemId']
+    purchased = items.loc[items['type'] == 'ITEM_PURCHASED', PURCHASE_COLUMNS]
+    undo = items.loc[items['type'] == 'ITEM_UNDO', keys + ['timestamp']]
+    if undo.empty:
+        return purchased.sort_values(EVENT_ORDER, ignore_index=True)
+
+    # 구매마다 그 시각 이후(같은 시각 포함) 가장 가까운 같은 아이템 UNDO 하나만 찾음
+    # (가장 가까운 UNDO 가 창 밖이면 더 먼 UNDO 도 창 밖이므로 NOT EXISTS 와 같은 결과)
+    purchased = purchased.astype({'timestamp': 'int64'}).sort_values('timestamp', kind='stable')
+    undo = undo.astype({'timestamp': 'int64'}).sort_values('timestamp')
+    undo['undo_time'] = undo['timestamp']
+    matched = pd.merge_asof(purchased, undo, on='timestamp', by=keys, direction='forward',
+                            tolerance=UNDO_WINDOW_MS)
+    kept = matched.loc[matched['undo_time'].isna(), PURCHASE_COLUMNS]
+    return kept.sort_values(EVENT_ORDER, ignore_index=True)
+
+
+class PurchaseStream:
+    def __init__(self):
+        # 참가자의 구매와 UNDO 가 청크 경계에 걸칠 수 있으므로 필요한 컬럼만 모아 두었다가 한 번에 처리
+        self.parts = []
+
+    def add(self, chunk):
+        events = chunk[chunk['type'].isin(['ITEM_PURCHASED', 'ITEM_UNDO'])]
+        self.parts.append(events[PURCHASE_COLUMNS + ['type']])
+
+    def build(self):
+        if not self.parts:
+            return pd.DataFrame(columns=PURCHASE_COLUMNS)
+        return real_purchases(pd.concat(self.parts, ignore_index=True))
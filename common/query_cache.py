@@ -0,0 +1,77 @@
+import os
+import json
+import hashlib
+
+import pandas as pd
+
+from common.db import read_generations
+
+# =======================================================
+# 분석 조회 결과 캐시
+# 키 = 정규화한 SQL + DB 식별자 + 참조 테이블의 적재 세대(generation) 번호.
+# 세대 번호는 DB 의 table_generations 에 있고 테이블을 적재할 때마다 올라가므로 (common/db.py),
+# 04/05 를 다시 돌리기 전까지는 같은 조회를 DB 에 보내지 않고 raw_data/query_cache 에서 바로 읽습니다.
+# 결과는 Parquet 로 저장합니다 (pickle 과 달리 읽을 때 코드가 실행되지 않으므로 캐시 디렉터리를 공유해도 안전).
+# pyarrow 가 없거나 LOL_QUERY_CACHE=0 이면 사용하지 않고, 전체 크기가 LOL_QUERY_CACHE_MB 를 넘으면 오래 안 쓴 것부터 지웁니다.
+# =======================================================
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(ROOT_DIR, 'raw_data', 'query_cache')
+DEFAULT_MAX_MB = 2048
+
+
+def is_enabled():
+    return os.environ.get('LOL_QUERY_CACHE', '1').lower() not in ('0', 'false', 'no')
+
+
+def cache_key(sql, engine, table_names):
+    generations = read_generations(engine)
+    payload = json.dumps({
+        'sql': ' '.join(sql.split()),
+        'db': engine.url.render_as_string(hide_password=True),
+        'tables': {t: generations.get(t, 0) for t in sorted(table_names)},
+    }, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _evict(max_bytes):
+    # 마지막 사용 시각(mtime, 적중 시 갱신) 기준 LRU
+    files = [os.path.join(CACHE_DIR, f) for f in os.listdir(CACHE_DIR) if f.endswith('.parquet')]
+    files.sort(key=os.path.getmtime)
+    total = sum(os.path.getsize(f) for f in files)
+    for path in files:
+        if total <= max_bytes: break
+        total -= os.path.getsize(path)
+        os.remove(path)
+
+
+def cached_frame(sql, engine, table_names, load):
+    # table_names: 결과가 의존하는 테이블, load: 캐시에 없을 때 DataFrame 을 만드는 함수
+    # (category 등 dtype 은 Parquet 에 함께 저장되는 pandas 메타데이터로 복원됨)
+    if not is_enabled() or not _has_pyarrow():
+        return load()
+
+    path = os.path.join(CACHE_DIR, f"{cache_key(sql, engine, table_names)}.parquet")
+    if os.path.exists(path):
+        os.utime(path)
+        return pd.read_parquet(path, engine='pyarrow')
+
+    df = load()
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        df.to_parquet(tmp_path, engine='pyarrow')
+    except (ValueError, TypeError):
+        # Parquet 로 표현할 수 없는 컬럼(타입이 섞인 object 등)이 있으면 캐시하지 않음
+        if os.path.exists(tmp_path): os.remove(tmp_path)
+        return df
+    os.replace(tmp_path, path)
+    _evict(int(os.environ.get('LOL_QUERY_CACHE_MB', DEFAULT_MAX_MB)) * 1024 * 1024)
+    return df
@@ -0,0 +1,171 @@
+import io
+import sys
+import fnmatch
+import importlib
+import traceback
+import multiprocessing
+from collections import namedtuple
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from common.context import AnalysisContext, TABLE_COLUMNS
+
+# =======================================================
+# 리포트 레지스트리 & DAG 실행기
+# 각 리포트는 입력(테이블 또는 다른 리포트의 출력 CSV)과 출력 CSV 를 선언하고,
+# 실행기는 입력 -> 출력 관계로 DAG 를 만들어 서로 독립인 리포트를 프로세스 풀에서 동시에 실행합니다.
+# =======================================================
+Report = namedtuple('Report', ['name', 'func', 'inputs', 'outputs', 'module'])
+
+REPORTS = {}
+
+
+def report(name, inputs, outputs):
+    # 출력 경로는 03_analysis 기준 상대 경로
+    def register(func):
+        REPORTS[name] = Report(name, func, tuple(inputs), tuple(outputs), func.__module__)
+        return func
+
+    return register
+
+
+def build_dag(reports):
+    # 리포트 -> 선행 리포트 집합 (입력이 다른 리포트의 출력인 경우)
+    producers = {out: r.name for r in reports.values() for out in r.outputs}
+    return {r.name: {producers[i] for i in r.inputs if i in producers and producers[i] != r.name}
+            for r in reports.values()}
+
+
+def downstream(reports, dag, nodes):
+    # 주어진 노드(테이블 / 리포트 이름 / 출력 경로)에 의존하는 모든 리포트
+    selected = {r.name for r in reports.values()
+                if any(fnmatch.fnmatch(key, pat) for pat in nodes for key in (r.name,) + r.inputs)}
+    changed = True
+    while changed:
+        changed = False
+        for name, deps in dag.items():
+            if name not in selected and deps & selected:
+                selected.add(name)
+                changed = True
+    return selected
+
+
+def select_reports(reports, only=None, since=None):
+    names = set(reports)
+    if only:
+        names &= {n for n in reports if any(fnmatch.fnmatch(n, pat) or n.startswith(f"{pat}.") for pat in only)}
+    if since:
+        names &= downstream(reports, build_dag(reports), since)
+    return names
+
+
+def execution_order(dag, names):
+    # 위상 정렬, 같은 단계에서는 등록 순서 유지 (선택되지 않은 선행 리포트는 이미 출력이 있다고 보고 무시)
+    order, done = [], set()
+    while len(order) < len(names):
+        ready = [n for n in REPORTS if n in names and n not in done and not (dag[n] & names) - done]
+        if not ready:
+            raise ValueError(f"리포트 의존성에 순환이 있습니다: {sorted(names - done)}")
+        order.extend(ready)
+        done.update(ready)
+    return order
+
+
+# =======================================================
+# 실행
+# =======================================================
+_worker_ctx = None
+
+
+def _init_worker(script_dir, modules):
+    # fork: 부모가 미리 읽어 둔 컨텍스트를 그대로 상속 (커넥션 풀만 새로 만듦)
+    # spawn: 리포트 모듈을 다시 import 하고 필요한 테이블을 각자 읽음
+    global _worker_ctx
+    if script_dir not in sys.path:
+        sys.path.append(script_dir)
+    for module in modules:
+        importlib.import_module(module)
+    if _worker_ctx is None:
+        _worker_ctx = AnalysisContext()
+    else:
+        _worker_ctx.engine.dispose(close=False)
+
+
+def _run_report(name):
+    buffer = io.StringIO()
+    try:
+        with redirect_stdout(buffer):
+            REPORTS[name].func(_worker_ctx)
+        return name, True, buffer.getvalue()
+    except Exception:
+        return name, False, buffer.getvalue() + traceback.format_exc()
+
+
+def preload(ctx, reports, names):
+    # 선택된 리포트가 쓰는 테이블을 한 번씩만 읽어 둠
+    tables = sorted({i for n in names for i in reports[n].inputs if i in TABLE_COLUMNS})
+    for table_name in tables:
+        ctx.table(table_name)
+    # cached_property 이므로 접근만으로 적재됨
+    ctx.dim_maps
+    ctx.item_flags
+    return tables
+
+
+def run_reports(ctx, names, script_dir=None, jobs=1):
+    # 반환값: 실패한 리포트 이름 목록 (실패한 리포트에 의존하는 리포트는 건너뜀)
+    global _worker_ctx
+    dag = build_dag(REPORTS)
+    order = execution_order(dag, names)
+    failed = set()
+
+    def blocked(name):
+        return dag[name] & failed
+
+    if jobs <= 1:
+        for name in order:
+            if blocked(name):
+                failed.add(name)
+                continue
+            print(f"▶ {name}")
+            try:
+                REPORTS[name].func(ctx)
+            except Exception:
+                traceback.print_exc()
+                failed.add(name)
+        return sorted(failed)
+
+    _worker_ctx = ctx
+    methods = multiprocessing.get_all_start_methods()
+    mp_context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    modules = sorted({REPORTS[n].module for n in names})
+    pending, running, done = list(order), {}, set()
+
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=mp_context,
+                             initializer=_init_worker, initargs=(script_dir, modules)) as pool:
+        while pending or running:
+            for name in list(pending):
+                if blocked(name):
+                    pending.remove(name)
+                    failed.add(name)
+                    done.add(name)
+                elif not (dag[name] & names) - done:
+                    pending.remove(name)
+                    running[pool.submit(_run_report, name)] = name
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, ok, output = future.result()
+                del running[future]
+                done.add(name)
+                if not ok:
+                    failed.add(name)
+                print(f"{'✅' if ok else '❌'} {name}\n{output}", end='' if output.endswith('\n') else '\n')
+
+    return sorted(failed)
+
+
+def run_module(module_name):
+    # 스크립트 단독 실행: 해당 스크립트에 등록된 리포트만 순서대로 실행
+    names = {n for n, r in REPORTS.items() if r.module == module_name}
+    run_reports(AnalysisContext(), names)
@@ -0,0 +1,262 @@
+from sqlalchemy import MetaData, Table, Column, String, SmallInteger, Integer, Float, Index, PrimaryKeyConstraint
+from sqlalchemy.dialects import mysql
+
+# =======================================================
+# DB 스키마 (DDL)
+# to_sql 자동 생성(TEXT) 대신 고정 폭 타입과 복합 키로 테이블을 먼저 만든 뒤 적재합니다.
+# =======================================================
+metadata = MetaData()
+
+
+def _tinyint():
+    return SmallInteger().with_variant(mysql.TINYINT(unsigned=True), 'mysql')
+
+
+def _mediumint():
+    return Integer().with_variant(mysql.MEDIUMINT(unsigned=True), 'mysql')
+
+
+def _match_id():
+    return String(20)
+
+
+match_data = Table(
+    'match_data', metadata,
+    Column('match_id', _match_id(), nullable=False),
+    Column('participant_id', _tinyint(), nullable=False),
+    Column('puuid', String(78)),
+    Column('game_version', String(32)),
+    Column('gameDuration', SmallInteger),
+    Column('win', _tinyint()),
+    Column('champion_id', SmallInteger),
+    Column('position', String(8)),
+    Column('lane', String(8)),
+    Column('team', String(4)),
+    Column('kills', _tinyint()), Column('deaths', _tinyint()), Column('assists', _tinyint()),
+    Column('kda', Float),
+    Column('solo_kills', _tinyint()),
+    Column('total_damage', Integer),
+    Column('damage_taken', Integer),
+    Column('cs_total', SmallInteger),
+    Column('gold_earned', Integer),
+    Column('vision_score', SmallInteger),
+    Column('control_wards', _tinyint()),
+    *[Column(f'item{i}', _mediumint()) for i in range(7)],
+    Column('rune_main', SmallInteger), Column('rune_key', SmallInteger), Column('rune_sub', SmallInteger),
+    Column('spell1', SmallInteger), Column('spell2', SmallInteger),
+    Column('team_dragon', _tinyint()), Column('team_baron', _tinyint()), Column('team_horde', _tinyint()),
+    PrimaryKeyConstraint('match_id', 'participant_id'),
+    Index('idx_match_data_pos_champ', 'position', 'champion_id'),
+    Index('idx_match_data_champion', 'champion_id'),
+    Index('idx_match_data_duration', 'gameDuration'),
+)
+
+# 매치 x 팀 단위 팩트 (진영/메타 분석용, 04 단계에서 match_data 로부터 한 번만 집계)
+match_team = Table(
+    'match_team', metadata,
+    Column('match_id', _match_id(), nullable=False),
+    Column('team_id', _tinyint(), nullable=False),
+    Column('team', String(4)),
+    Column('game_version', String(32)),
+    Column('gameDuration', SmallInteger),
+    Column('win', _tinyint()),
+    Column('dragon_count', _tinyint()),
+    Column('baron_count', _tinyint()),
+    Column('horde_count', _tinyint()),
+    Column('total_kills', SmallInteger),
+    PrimaryKeyConstraint('match_id', 'team_id'),
+    Index('idx_match_team_duration', 'gameDuration'),
+)
+
+# 밴 (매치당 양 팀 최대 10개, 참가자 행에 복제하지 않음)
+match_bans = Table(
+    'match_bans', metadata,
+    Column('match_id', _match_id(), nullable=False),
+    Column('team_id', _tinyint(), nullable=False),
+    Column('pick_turn', _tinyint(), nullable=False),
+    Column('champion_id', SmallInteger, nullable=False),
+    PrimaryKeyConstraint('match_id', 'team_id', 'pick_turn'),
+    Index('idx_match_bans_champion', 'champion_id'),
+)
+
+# 타임라인 테이블은 같은 프레임 안의 이벤트가 timestamp 를 공유하므로
+# 매치 내 이벤트 순번(event_seq)을 키 마지막에 둡니다.
+timeline_items = Table(
+    'timeline_items', metadata,
+    Column('match_id', _match_id(), nullable=False),
+    Column('participantId', _tinyint(), nullable=False),
+    Column('timestamp', Integer, nullable=False),
+    Column('event_seq', Integer, nullable=False),
+    Column('itemId', _mediumint()),
+    Column('type', String(24)),
+    PrimaryKeyConstraint('match_id', 'participantId', 'timestamp', 'event_seq'),
+    Index('idx_timeline_items_type_item', 'type', 'itemId'),
+)
+
+timeline_skills = Table(
+    'timeline_skills', metadata,
+    Column('match_id', _match_id(), nullable=False),
+    Column('participantId', _tinyint(), nullable=False),
+    Column('timestamp', Integer, nullable=False),
+    Column('event_seq', Integer, nullable=False),
+    Column('skillSlot', _tinyint()),
+    Column('levelUpType', String(16)),
+    PrimaryKeyConstraint('match_id', 'participantId', 'timestamp', 'event_seq'),
+)
+
+timeline_kills = Table(
+    'timeline_kills', metadata,
+    Column('match_id', _match_id(), nullable=False),
+    Column('killerId', _tinyint(), nullable=False),
+    Column('timestamp', Integer, nullable=False),
+    Column('event_seq', Integer, nullable=False),
+    Column('victimId', _tinyint()),
+    Column('x', SmallInteger), Column('y', SmallInteger),
+    PrimaryKeyConstraint('match_id', 'killerId', 'timestamp', 'event_seq'),
+)
+
+timeline_objectives = Table(
+    'timeline_objectives', metadata,
+    Column('match_id', _match_id(), nullable=False),
+    Column('timestamp', Integer, nullable=False),
+    Column('event_seq', Integer, nullable=False),
+    Column('type', String(24)),
+    Column('subtype', String(24)),
+    Column('teamId', SmallInteger),
+    Column('lane', String(12)),
+    PrimaryKeyConstraint('match_id', 'timestamp', 'event_seq'),
+    Index('idx_timeline_objectives_type', 'type', 'subtype'),
+)
+
+timeline_wards = Table(
+    'timeline_wards', metadata,
+    Column('match_id', _match_id(), nullable=False),
+    Column('timestamp', Integer, nullable=False),
+    Column('event_seq', Integer, nullable=False),
+    Column('type', String(16)),
+    Column('wardType', String(24)),
+    Column('creatorId', _tinyint()),
+    Column('killerId', _tinyint()),
+    Column('x', SmallInteger), Column('y', SmallInteger),
+    PrimaryKeyConstraint('match_id', 'timestamp', 'event_seq'),
+    Index('idx_timeline_wards_creator', 'match_id', 'creatorId'),
+    Index('idx_timeline_wards_killer', 'match_id', 'killerId'),
+)
+
+# 되돌리기(ITEM_UNDO)로 취소된 구매를 뺀 실제 구매 (05 단계에서 timeline_items 와 같은 패스로 생성)
+item_purchases = Table(
+    'item_purchases', metadata,
+    Column('match_id', _match_id(), nullable=False),
+    Column('participantId', _tinyint(), nullable=False),
+    Column('timestamp', Integer, nullable=False),
+    Column('event_seq', Integer, nullable=False),
+    Column('itemId', _mediumint()),
+    PrimaryKeyConstraint('match_id', 'participantId', 'timestamp', 'event_seq'),
+    Index('idx_item_purchases_item', 'itemId'),
+)
+
+# 참가자 단위 타임라인 요약 (05 단계에서 타임라인 적재와 같은 패스로 집계)
+WARD_BUCKET_MINUTES = list(range(0, 45, 5))  # 0~40분, 5분 단위
+CORE_ITEM_SLOTS = 3
+
+participant_timeline_summary = Table(
+    'participant_timeline_summary', metadata,
+    Column('match_id', _match_id(), nullable=False),
+    Column('participant_id', _tinyint(), nullable=False),
+    Column('plates_taken', _tinyint()),
+    Column('early_kills', _tinyint()),
+    *[Column(f'wards_placed_{m:02d}', _tinyint()) for m in WARD_BUCKET_MINUTES],
+    *[Column(f'wards_killed_{m:02d}', _tinyint()) for m in WARD_BUCKET_MINUTES],
+    *[col for n in range(1, CORE_ITEM_SLOTS + 1)
+      for col in (Column(f'core{n}_item', _mediumint()), Column(f'core{n}_time', Integer))],
+    Column('trinket_start', _mediumint()),
+    Column('trinket_final', _mediumint()),
+    Column('trinket_swap_time', Integer),
+    PrimaryKeyConstraint('match_id', 'participant_id'),
+)
+
+# 누적 집계 저장소 (04 단계에서 새 매치만 델타로 더함)
+# dimension 별 value 예: pick(''), side('Blue'), game_time('20-25분'), rune('8010/8000/8300'),
+# spell('4,12'), item/trinket(아이템 ID), build('3031,3072,6672'), ban(''), matches('')
+agg_champion_stats = Table(
+    'agg_champion_stats', metadata,
+    Column('patch', String(8), nullable=False),
+    Column('position', String(8), nullable=False),
+    Column('champion_id', SmallInteger, nullable=False),
+    Column('dimension', String(16), nullable=False),
+    Column('value', String(32), nullable=False),
+    Column('games', Integer),
+    Column('wins', Integer),
+    PrimaryKeyConstraint('patch', 'position', 'champion_id', 'dimension', 'value'),
+)
+
+agg_folded_matches = Table(
+    'agg_folded_matches', metadata,
+    Column('match_id', _match_id(), primary_key=True),
+    Column('patch', String(8)),
+)
+
+# 테이블별 적재 세대 번호 (분석 조회 캐시의 무효화 기준, 적재할 때마다 +1)
+table_generations = Table(
+    'table_generations', metadata,
+    Column('table_name', String(64), primary_key=True),
+    Column('generation', Integer, nullable=False),
+)
+
+# 차원 테이블 (DataDragon 기준 ID -> 이름)
+dim_champion = Table(
+    'dim_champion', metadata,
+    Column('champion_id', SmallInteger, primary_key=True, autoincrement=False),
+    Column('champion_key', String(32)),
+    Column('name', String(32)),
+)
+
+dim_item = Table(
+    'dim_item', metadata,
+    Column('item_id', _mediumint(), primary_key=True, autoincrement=False),
+    Column('name', String(64)),
+    Column('gold', SmallInteger),
+    Column('is_boot', _tinyint()),
+    Column('is_core', _tinyint()),
+    Column('is_starter', _tinyint()),
+    Column('is_trinket', _tinyint()),
+    Column('is_consumable', _tinyint()),
+)
+
+dim_rune = Table(
+    'dim_rune', metadata,
+    Column('rune_id', SmallInteger, primary_key=True, autoincrement=False),
+    Column('name', String(32)),
+    Column('style_id', SmallInteger),
+)
+
+dim_spell = Table(
+    'dim_spell', metadata,
+    Column('spell_id', SmallInteger, primary_key=True, autoincrement=False),
+    Column('name', String(32)),
+)
+
+
+# =======================================================
+# 마이그레이션 헬퍼
+# =======================================================
+def reset_tables(engine, table_names):
+    # 전체 재적재 방식이므로 기존 테이블을 지우고 DDL 로 다시 생성
+    tables = [metadata.tables[name] for name in table_names]
+    metadata.drop_all(engine, tables=tables)
+    metadata.create_all(engine, tables=tables)
+
+
+def conform(df, table_name):
+    # 스키마에 정의된 컬럼만 스키마 순서대로 남김
+    cols = [c.name for c in metadata.tables[table_name].columns if c.name in df.columns]
+    return df[cols]
+
+
+def assign_event_seq(df, seq_offsets):
+    # 청크 경계를 넘어 매치별 이벤트 순번을 이어서 부여 (seq_offsets 는 호출 간 유지)
+    offsets = df['match_id'].map(seq_offsets).fillna(0).astype(int)
+    df['event_seq'] = df.groupby('match_id', sort=False, dropna=False).cumcount() + offsets
+    for match_id, cnt in df['match_id'].value_counts(sort=False).items():
+        seq_offsets[match_id] = seq_offsets.get(match_id, 0) + cnt
+    return df
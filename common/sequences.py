@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from common.purchases import EVENT_ORDER
+
+# =======================================================
+# 참가자별 이벤트 시퀀스 엔진
+# 이벤트를 (match, participant, timestamp, event_seq) 순으로 한 번 정렬한 뒤
+# 참가자 그룹의 시작 위치(offset)만으로 앞 N개 / 스킬 마스터 순서를 배열 연산으로 계산합니다.
+# 문자열 라벨은 서로 다른 시퀀스(고유 행)마다 한 번만 만듭니다.
+# =======================================================
+PARTICIPANT_KEYS = ['match_id', 'participantId']
+MASTERY_SLOTS = [1, 2, 3]  # Q, W, E (R 은 마스터 순서에서 제외)
+MASTERY_POINTS = 5
+
+
+class Sequences:
+    def __init__(self, events, value_col):
+        # events: 참가자 키 + EVENT_ORDER 컬럼 + value_col
+        ordered = events.sort_values(EVENT_ORDER, kind='stable')
+        same = np.ones(max(len(ordered) - 1, 0), dtype=bool)
+        for col in PARTICIPANT_KEYS:
+            codes = ordered[col].cat.codes if ordered[col].dtype == 'category' else ordered[col]
+            codes = codes.to_numpy()
+            same &= codes[1:] == codes[:-1]
+
+        self.values = ordered[value_col].to_numpy(dtype=np.int64)
+        self.starts = np.flatnonzero(np.r_[True, ~same]) if len(ordered) else np.array([], dtype=np.int64)
+        self.lengths = np.diff(np.r_[self.starts, len(ordered)])
+        # 행마다 속한 그룹 번호 / 그룹 안에서의 위치
+        self.group = np.repeat(np.arange(len(self.starts)), self.lengths)
+        self.rank = np.arange(len(ordered)) - self.starts[self.group]
+        self.keys = ordered[PARTICIPANT_KEYS].iloc[self.starts].reset_index(drop=True)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def head(self, n, fill=0):
+        # 참가자별 앞 n개 값 (groups x n, 부족한 칸은 fill)
+        matrix = np.full((len(self), n), fill, dtype=np.int64)
+        mask = self.rank < n
+        matrix[self.group[mask], self.rank[mask]] = self.values[mask]
+        return matrix
+
+    def mastery_order(self, slots=MASTERY_SLOTS, points=MASTERY_POINTS):
+        # 참가자별 slots 의 마스터 순서 (groups x len(slots), slots 안의 인덱스)
+        # 먼저 points 에 도달한 순서, 도달하지 못한 스킬은 찍은 횟수 내림차순 (같으면 slots 순서)
+        onehot = (self.values[:, None] == np.asarray(slots)[None, :]).astype(np.int64)
+        counts = np.add.reduceat(onehot, self.starts, axis=0) if len(self) else onehot[:0]
+        running = onehot.cumsum(axis=0)
+        running -= (running - onehot)[self.starts][self.group]
+
+        rows, cols = np.nonzero((onehot == 1) & (running == points))
+        total = len(self.values) + 1
+        sort_key = total + (total - counts)  # 미도달: 횟수 많은 순
+        sort_key[self.group[rows], cols] = self.rank[rows]  # 도달: 도달 시점 순
+        return np.argsort(sort_key, axis=1, kind='stable')
+
+
+def sequence_labels(matrix, format_row):
+    # 고유 행마다 format_row(행) 를 한 번씩만 호출해 라벨 Series 로 펼침
+    if len(matrix) == 0:
+        return pd.Series([], dtype=object)
+    unique_rows, inverse = np.unique(matrix, axis=0, return_inverse=True)
+    labels = np.array([format_row(row) for row in unique_rows], dtype=object)
+    return pd.Series(labels[inverse.ravel()])
@@ -0,0 +1,73 @@
+import numpy as np
+from scipy.stats import chi2
+
+# =======================================================
+# 승률 신뢰구간 / 유의성 (리포트 단계에서 정확한 승/판 수로 미리 계산)
+# 대시보드는 아래 컬럼만 읽으므로 렌더링 시점에 scipy 를 쓰지 않습니다.
+#   win_rate_low / win_rate_high : Wilson 95% 구간 (%)
+#   win_rate_bayes               : 그룹 평균 승률 쪽으로 수축한 승률 (%)
+#   win_rank                     : 그룹 안 승률 순위 (MIN_TEST_GAMES 판 이상인 행만, 1 = 최고)
+#   p_vs_best                    : 그룹 최고 승률 행과의 2x2 카이제곱 p-value (Yates 보정)
+# =======================================================
+MIN_TEST_GAMES = 10
+WILSON_Z = 1.96
+BAYES_PRIOR_GAMES = 50
+
+
+def wilson_interval(wins, games, z=WILSON_Z):
+    # 승률(0~1)의 Wilson 구간 (하한, 상한)
+    p = wins / games
+    center = p + z * z / (2 * games)
+    margin = z * np.sqrt(p * (1 - p) / games + z * z / (4 * games * games))
+    denom = 1 + z * z / games
+    return (center - margin) / denom, (center + margin) / denom
+
+
+def shrunk_rate(wins, games, prior, prior_games=BAYES_PRIOR_GAMES):
+    # prior 승률을 prior_games 판만큼 섞은 승률 (0~1)
+    return (wins + prior_games * prior) / (games + prior_games)
+
+
+def chi2_2x2_pvalue(a, b, c, d):
+    # [[a, b], [c, d]] 표의 카이제곱 검정 p-value (scipy chi2_contingency 기본값과 같은 Yates 보정)
+    # 기대 빈도에 0 이 있으면 NaN
+    a, b, c, d = (np.asarray(x, dtype=float) for x in (a, b, c, d))
+    n = a + b + c + d
+    rows, cols = (a + b, c + d), (a + c, b + d)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected = [r * k / n for r in rows for k in cols]
+        inv_sum = sum(1 / e for e in expected)
+        diff = np.maximum(np.abs(a * d - b * c) / n - 0.5, 0)
+        stat = diff * diff * inv_sum
+    valid = np.all([e > 0 for e in expected], axis=0)
+    return np.where(valid, chi2.sf(np.where(valid, stat, 0), 1), np.nan)
+
+
+def add_confidence(df, group_cols, games_col, wins_col):
+    # group_cols 그룹(보통 포지션 x 챔피언) 안에서의 구간/수축 승률/최고 승률 대비 p-value 컬럼 추가
+    if df.empty:
+        return df.assign(win_rate_low=[], win_rate_high=[], win_rate_bayes=[], win_rank=[], p_vs_best=[])
+    games = df[games_col].to_numpy(dtype=float)
+    wins = df[wins_col].to_numpy(dtype=float)
+
+    low, high = wilson_interval(wins, games)
+    grouped = df.groupby(group_cols, observed=True, sort=False)
+    prior = grouped[wins_col].transform('sum') / grouped[games_col].transform('sum')
+    df['win_rate_low'] = (low * 100).round(2)
+    df['win_rate_high'] = (high * 100).round(2)
+    df['win_rate_bayes'] = (shrunk_rate(wins, games, prior.to_numpy()) * 100).round(2)
+
+    # 검정 대상 행의 그룹 내 순위 (승률, 판 수 내림차순)
+    testable = games >= MIN_TEST_GAMES
+    tested = df.loc[testable, group_cols].assign(_rate=wins[testable] / games[testable], _games=games[testable])
+    tested = tested.sort_values(['_rate', '_games'], ascending=False, kind='stable')
+    df['win_rank'] = (tested.groupby(group_cols, observed=True, sort=False).cumcount() + 1).astype('Int64')
+
+    # 그룹 최고 행의 승/패를 각 행에 붙여 한 번에 검정
+    best = df.loc[df['win_rank'] == 1, group_cols + [games_col, wins_col]]
+    best = df[group_cols].merge(best, on=group_cols, how='left')
+    best_games = best[games_col].to_numpy(dtype=float)
+    best_wins = best[wins_col].to_numpy(dtype=float)
+    p_value = chi2_2x2_pvalue(best_wins, best_games - best_wins, wins, games - wins)
+    df['p_vs_best'] = np.where(df['win_rank'].notna(), p_value, np.nan).round(4)
+    return df
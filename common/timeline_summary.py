@@ -0,0 +1,112 @@
+import pandas as pd
+
+from common.schema import WARD_BUCKET_MINUTES, CORE_ITEM_SLOTS
+
+# =======================================================
+# 참가자 단위 타임라인 요약 (participant_timeline_summary)
+# 05 단계에서 적재 중인 청크를 그대로 받아 필요한 부분만 모은 뒤,
+# 적재가 끝나면 (match_id, participant_id) 당 한 행으로 합칩니다.
+# =======================================================
+SUMMARY_TABLE = 'participant_timeline_summary'
+
+EARLY_GAME_MS = 840000  # 14분 이내 킬 = 라인전 킬
+WARD_BUCKET_MS = 300000
+WARD_WINDOW_MS = WARD_BUCKET_MINUTES[-1] * 60000
+CORE_ITEM_AFTER_MS = 180000  # 시작 아이템 구간(3분) 이후 구매만 코어로 집계
+
+TEAM_IDS = {'Blue': 100, 'Red': 200}
+POSITION_LANES = {'TOP': 'TOP_LANE', 'MIDDLE': 'MID_LANE', 'BOTTOM': 'BOT_LANE', 'UTILITY': 'BOT_LANE'}
+
+WARD_COLUMNS = [f'wards_{kind}_{m:02d}' for kind in ('placed', 'killed') for m in WARD_BUCKET_MINUTES]
+
+
+class TimelineSummary:
+    def __init__(self, core_item_ids, trinket_item_ids):
+        # 아이템 분류는 dim_item 플래그(is_core / is_trinket) 기준
+        self.core_item_ids = list(core_item_ids)
+        self.trinket_item_ids = list(trinket_item_ids)
+        # 테이블마다 읽기 스레드가 하나이므로 키별 리스트에는 한 스레드만 append
+        self.parts = {name: [] for name in
+                      ('timeline_kills', 'timeline_objectives', 'timeline_wards')}
+
+    def add(self, table_name, chunk):
+        if table_name == 'timeline_kills':
+            early = chunk[chunk['timestamp'] <= EARLY_GAME_MS]
+            self.parts[table_name].append(early.groupby(['match_id', 'killerId']).size().rename('cnt').reset_index())
+
+        elif table_name == 'timeline_objectives':
+            plates = chunk[chunk['type'] == 'TURRET_PLATE_DESTROYED']
+            self.parts[table_name].append(
+                plates.groupby(['match_id', 'teamId', 'lane']).size().rename('cnt').reset_index())
+
+        elif table_name == 'timeline_wards':
+            wards = chunk[chunk['timestamp'] <= WARD_WINDOW_MS]
+            placed = wards['type'] == 'WARD_PLACED'
+            wards = pd.DataFrame({
+                'match_id': wards['match_id'],
+                'participant_id': wards['creatorId'].where(placed, wards['killerId']),
+                'kind': placed.map({True: 'placed', False: 'killed'}),
+                'bucket': wards['timestamp'] // WARD_BUCKET_MS * 5,
+            })
+            self.parts[table_name].append(
+                wards.groupby(['match_id', 'participant_id', 'kind', 'bucket']).size().rename('cnt').reset_index())
+
+    def _concat(self, table_name):
+        parts = self.parts[table_name]
+        return pd.concat(parts, ignore_index=True) if parts else None
+
+    def build(self, participants, purchases=None):
+        # participants: match_data 의 (match_id, participant_id, team, position)
+        # purchases: UNDO 로 취소된 구매를 뺀 구매 스트림 (item_purchases, EVENT_ORDER 순)
+        summary = participants[['match_id', 'participant_id']].copy()
+
+        # 포탑 방패: 자기 팀 + 자기 라인 (서포터는 바텀)
+        plates = self._concat('timeline_objectives')
+        if plates is not None:
+            plates = plates.groupby(['match_id', 'teamId', 'lane'], as_index=False)['cnt'].sum()
+            keys = participants.assign(teamId=participants['team'].map(TEAM_IDS),
+                                       lane=participants['position'].map(POSITION_LANES))
+            plates = keys.merge(plates, on=['match_id', 'teamId', 'lane'])
+            summary = summary.merge(plates[['match_id', 'participant_id', 'cnt']].rename(
+                columns={'cnt': 'plates_taken'}), on=['match_id', 'participant_id'], how='left')
+
+        kills = self._concat('timeline_kills')
+        if kills is not None:
+            kills = kills.groupby(['match_id', 'killerId'], as_index=False)['cnt'].sum()
+            kills.columns = ['match_id', 'participant_id', 'early_kills']
+            summary = summary.merge(kills, on=['match_id', 'participant_id'], how='left')
+
+        wards = self._concat('timeline_wards')
+        if wards is not None:
+            wards = wards.groupby(['match_id', 'participant_id', 'kind', 'bucket'])['cnt'].sum()
+            wards = wards.unstack(['kind', 'bucket'])
+            wards.columns = [f'wards_{kind}_{int(m):02d}' for kind, m in wards.columns]
+            wards = wards.reset_index().astype({'participant_id': int})
+            summary = summary.merge(wards, on=['match_id', 'participant_id'], how='left')
+
+        if purchases is not None:
+            summary = summary.merge(self._core_items(purchases), on=['match_id', 'participant_id'], how='left')
+            summary = summary.merge(self._trinkets(purchases), on=['match_id', 'participant_id'], how='left')
+
+        # 이벤트가 없었던 참가자/구간은 0
+        for col in ['plates_taken', 'early_kills'] + WARD_COLUMNS:
+            summary[col] = summary[col].fillna(0).astype(int) if col in summary.columns else 0
+        return summary
+
+    def _core_items(self, items):
+        core = items[items['itemId'].isin(self.core_item_ids) & (items['timestamp'] > CORE_ITEM_AFTER_MS)].copy()
+        core['rank'] = core.groupby(['match_id', 'participantId']).cumcount() + 1
+        core = core[core['rank'] <= CORE_ITEM_SLOTS]
+        core = core.set_index(['match_id', 'participantId', 'rank'])[['itemId', 'timestamp']].unstack('rank')
+        core.columns = [f'core{n}_{"item" if col == "itemId" else "time"}' for col, n in core.columns]
+        return core.rename_axis(['match_id', 'participant_id']).reset_index()
+
+    def _trinkets(self, items):
+        # 시작/최종 장신구와, 시작 장신구가 아닌 장신구를 처음 구매한 시각
+        # 교체 시각 = 시작 장신구가 아닌 행만 남긴 timestamp 의 그룹 최솟값 (구매 스트림은 시간순)
+        trinkets = items[items['itemId'].isin(self.trinket_item_ids)]
+        start = trinkets.groupby(['match_id', 'participantId'])['itemId'].transform('first')
+        trinkets = trinkets.assign(swap_time=trinkets['timestamp'].where(trinkets['itemId'] != start))
+        result = trinkets.groupby(['match_id', 'participantId']).agg(
+            trinket_start=('itemId', 'first'), trinket_final=('itemId', 'last'), trinket_swap_time=('swap_time', 'min'))
+        return result.rename_axis(['match_id', 'participant_id']).reset_index()
@@ -0,0 +1,46 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.matchups import build_matchups, matchups_frame
+
+POSITIONS = ['TOP', 'JUNGLE', 'MIDDLE', 'BOTTOM', 'UTILITY']
+
+
+def make_players(rows):
+    df = pd.DataFrame(rows, columns=['match_id', 'position', 'team', 'champion_id', 'win'])
+    for col in ['match_id', 'position', 'team']:
+        df[col] = df[col].astype('category')
+    return df
+
+
+def full_match(match_id, blue_champs, red_champs, blue_win=1):
+    rows = [(match_id, pos, 'blue', champ, blue_win) for pos, champ in zip(POSITIONS, blue_champs)]
+    rows += [(match_id, pos, 'red', champ, 1 - blue_win) for pos, champ in zip(POSITIONS, red_champs)]
+    return rows
+
+
+def test_nan_position_is_not_paired_across_matches():
+    # m1 의 레드 서포터가 빠져 있고, 다음 매치 m2 에 포지션이 빈 레드 참가자(99)가 있음
+    rows = full_match('m1', [1, 2, 3, 4, 5], [11, 12, 13, 14, 15])
+    rows = [r for r in rows if not (r[1] == 'UTILITY' and r[2] == 'red')]
+    rows += full_match('m2', [21, 22, 23, 24, 25], [31, 32, 33, 34, 35])
+    rows.append(('m2', np.nan, 'red', 99, 0))
+    df = matchups_frame(build_matchups(make_players(rows)))
+
+    assert 99 not in set(df['me']) | set(df['enemy'])
+    assert df[(df['position'] == 'UTILITY') & (df['me'] == 5)].empty
+    assert len(df) == 2 * 9
+
+
+def test_nan_position_pair_in_first_match():
+    # 첫 매치에 포지션이 빈 블루/레드 한 쌍이 있어도 정상 포지션만 집계
+    rows = [('m1', np.nan, 'blue', 98, 1), ('m1', np.nan, 'red', 99, 0)]
+    rows += full_match('m1', [1, 2, 3, 4, 5], [11, 12, 13, 14, 15])
+    df = matchups_frame(build_matchups(make_players(rows)))
+
+    assert set(df['position']) == set(POSITIONS)
+    assert len(df) == 2 * 5
@@ -0,0 +1,69 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.purchases import PURCHASE_COLUMNS, UNDO_WINDOW_MS, real_purchases
+
+
+def make_items(rows):
+    # rows: (participantId, timestamp, event_seq, type, itemId), 모두 같은 매치
+    df = pd.DataFrame(rows, columns=['participantId', 'timestamp', 'event_seq', 'type', 'itemId'])
+    df.insert(0, 'match_id', 'm1')
+    return df
+
+
+def test_undo_within_window_cancels_purchase():
+    items = make_items([
+        (1, 60000, 0, 'ITEM_PURCHASED', 1055),
+        (1, 60000 + UNDO_WINDOW_MS, 1, 'ITEM_UNDO', 1055),
+        (1, 60500, 2, 'ITEM_PURCHASED', 2003),
+    ])
+    kept = real_purchases(items)
+
+    assert list(kept.columns) == PURCHASE_COLUMNS
+    assert kept['itemId'].tolist() == [2003]
+
+
+def test_undo_outside_window_keeps_purchase():
+    items = make_items([
+        (1, 60000, 0, 'ITEM_PURCHASED', 1055),
+        (1, 60000 + UNDO_WINDOW_MS + 1, 1, 'ITEM_UNDO', 1055),
+    ])
+    assert real_purchases(items)['itemId'].tolist() == [1055]
+
+
+def test_undo_only_matches_same_participant_and_item():
+    items = make_items([
+        (1, 60000, 0, 'ITEM_PURCHASED', 1055),
+        (2, 60000, 1, 'ITEM_PURCHASED', 1055),
+        (1, 60000, 2, 'ITEM_PURCHASED', 2003),
+        (2, 61000, 3, 'ITEM_UNDO', 1055),
+    ])
+    kept = real_purchases(items)
+    assert list(zip(kept['participantId'], kept['itemId'])) == [(1, 1055), (1, 2003)]
+
+
+def test_undo_before_purchase_is_ignored():
+    items = make_items([
+        (1, 59000, 0, 'ITEM_UNDO', 1055),
+        (1, 60000, 1, 'ITEM_PURCHASED', 1055),
+    ])
+    assert real_purchases(items)['itemId'].tolist() == [1055]
+
+
+def test_duplicate_same_timestamp_purchases():
+    # 같은 시각에 같은 아이템을 두 번 산 경우 둘 다 남고 event_seq 순으로 정렬
+    items = make_items([
+        (1, 60000, 1, 'ITEM_PURCHASED', 2003),
+        (1, 60000, 0, 'ITEM_PURCHASED', 2003),
+        (1, 60000, 2, 'ITEM_PURCHASED', 1055),
+    ])
+    kept = real_purchases(items)
+    assert kept['event_seq'].tolist() == [0, 1, 2]
+    assert kept['itemId'].tolist() == [2003, 2003, 1055]
+
+    # 창 안의 UNDO 하나는 (NOT EXISTS 와 같이) 그 이전의 같은 아이템 구매를 모두 취소
+    items = pd.concat([items, make_items([(1, 61000, 3, 'ITEM_UNDO', 2003)])], ignore_index=True)
+    assert real_purchases(items)['itemId'].tolist() == [1055]
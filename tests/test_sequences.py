@@ -0,0 +1,73 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.sequences import Sequences
+
+
+def make_skills(rows):
+    # rows: (match_id, participantId, timestamp, event_seq, skillSlot)
+    df = pd.DataFrame(rows, columns=['match_id', 'participantId', 'timestamp', 'event_seq', 'skillSlot'])
+    df['match_id'] = df['match_id'].astype('category')
+    return df
+
+
+def test_orders_by_timestamp_then_event_seq():
+    # 입력 순서와 무관하게 (timestamp, event_seq) 순, 같은 시각이면 event_seq 로 결정
+    skills = make_skills([
+        ('m1', 1, 3000, 5, 3),
+        ('m1', 1, 1000, 9, 1),
+        ('m1', 1, 3000, 4, 2),
+        ('m1', 2, 2000, 0, 2),
+        ('m1', 2, 1000, 1, 1),
+    ])
+    seq = Sequences(skills, 'skillSlot')
+
+    assert len(seq) == 2
+    assert seq.keys['participantId'].tolist() == [1, 2]
+    assert seq.head(3).tolist() == [[1, 2, 3], [1, 2, 0]]
+
+
+def test_participants_split_across_matches():
+    skills = make_skills([
+        ('m1', 1, 1000, 0, 1),
+        ('m2', 1, 1000, 0, 2),
+    ])
+    seq = Sequences(skills, 'skillSlot')
+    assert seq.keys['match_id'].tolist() == ['m1', 'm2']
+    assert seq.head(1).tolist() == [[1], [2]]
+
+
+def test_fewer_than_three_skill_points_are_filled():
+    skills = make_skills([
+        ('m1', 1, 1000, 0, 3),
+        ('m1', 2, 1000, 1, 2),
+        ('m1', 2, 2000, 2, 1),
+    ])
+    seq = Sequences(skills, 'skillSlot')
+
+    assert seq.head(3).tolist() == [[3, 0, 0], [2, 1, 0]]
+    assert seq.head(3, fill=-1).tolist() == [[3, -1, -1], [2, 1, -1]]
+    # 아무 스킬도 마스터하지 못하면 찍은 횟수 순, 같으면 Q/W/E 순
+    assert seq.mastery_order().tolist() == [[2, 0, 1], [0, 1, 2]]
+
+
+def test_mastery_order_by_time_reached():
+    # E 를 먼저 5번 찍고 Q 가 그다음, W 는 미도달
+    order = [3, 1, 3, 1, 3, 1, 3, 1, 3, 4, 1, 2, 2]
+    skills = make_skills([('m1', 1, 1000 * i, i, slot) for i, slot in enumerate(order)])
+    assert Sequences(skills, 'skillSlot').mastery_order().tolist() == [[2, 0, 1]]
+
+
+def test_mastery_ties_use_counts_then_slot_order():
+    # 아무도 5번에 도달하지 못함: W 3번, Q/E 2번씩 -> W, Q, E
+    order = [1, 2, 3, 2, 1, 3, 2]
+    skills = make_skills([('m1', 1, 1000 * i, i, slot) for i, slot in enumerate(order)])
+    assert Sequences(skills, 'skillSlot').mastery_order().tolist() == [[1, 0, 2]]
+
+    # 마스터한 스킬은 미도달 스킬보다 항상 앞, 미도달 E/W 동률은 W 가 먼저
+    order = [1, 1, 2, 1, 3, 1, 1]
+    skills = make_skills([('m1', 1, 1000 * i, i, slot) for i, slot in enumerate(order)])
+    assert Sequences(skills, 'skillSlot').mastery_order().tolist() == [[0, 1, 2]]